@@ -0,0 +1,65 @@
+"""
+Bulk Blog Generation Benchmark
+Generates posts for a content calendar of topics one /blog/generate call at
+a time and with one /blog/bulk call, and reports throughput in posts/minute
+
+Usage: python scripts/benchmark_blog_bulk.py [--topics 40] [--concurrency 4]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'routes'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'services'))
+
+from flask import Flask
+
+import ai_routes
+
+SUBJECTS = ["local AI", "SEO", "RAG pipelines", "on-device privacy", "content calendars"]
+ANGLES = ["for beginners", "best practices", "common mistakes", "case study", "checklist", "in 2026", "for small teams", "explained"]
+
+def calendar(count: int):
+    return [f"{SUBJECTS[i % len(SUBJECTS)]} {ANGLES[(i // len(SUBJECTS)) % len(ANGLES)]} #{i}" for i in range(count)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--topics', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--share-threshold', type=float, default=0.9)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    ai_routes.register_ai_routes(app)
+    client = app.test_client()
+    client.post('/api/ai/setup/sample-data')
+    topics = calendar(args.topics)
+
+    start = time.perf_counter()
+    sequential_ok = sum(
+        client.post('/api/ai/blog/generate', json={'topic': topic}).get_json()['success'] for topic in topics
+    )
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    response = client.post('/api/ai/blog/bulk', json={
+        'topics': topics,
+        'max_concurrency': args.concurrency,
+        'share_threshold': args.share_threshold
+    })
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    bulk = time.perf_counter() - start
+    summary = lines[-1]['summary']
+
+    print(f"{args.topics} topics, bulk concurrency {args.concurrency}\n")
+    print(f"{'mode':<11} {'posts':>6} {'seconds':>9} {'posts/min':>10} {'retrievals':>11}")
+    print(f"{'sequential':<11} {sequential_ok:>6} {sequential:>9.2f} {sequential_ok / sequential * 60:>10.1f} {args.topics:>11}")
+    print(f"{'bulk':<11} {summary['succeeded']:>6} {bulk:>9.2f} {summary['posts_per_minute']:>10.1f} {summary['retrievals']:>11}")
+
+    ai_routes.background_loop.shutdown()
+
+if __name__ == "__main__":
+    main()
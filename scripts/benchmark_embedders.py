@@ -0,0 +1,113 @@
+"""
+Embedder Benchmark
+Compares the mock MD5 embedder with the hashing embedder (pure Python and,
+when installed, numpy batches): embedding throughput on blog-length texts,
+and retrieval quality on a small labelled set of documents and queries
+(hit@1 and recall@k by cosine similarity)
+
+Usage: python scripts/benchmark_embedders.py [--texts 2000] [--top-k 3]
+"""
+
+import os
+import sys
+import math
+import time
+import random
+import argparse
+from typing import Callable, Dict, List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'services'))
+
+from ragService import LocalRAGService
+from hashingEmbedder import HashingEmbedder, NUMPY_AVAILABLE
+
+# topic -> (documents, queries); a query is relevant to every document of its topic
+LABELLED = {
+    "privacy": ([
+        "Local AI models process data on-device, so personal information never leaves your servers.",
+        "Keeping inference on-premises avoids sending customer data to third-party APIs.",
+        "Privacy regulations are easier to meet when prompts and documents stay on local hardware.",
+    ], ["how does local AI protect user privacy", "keep customer data off third-party servers"]),
+    "cost": ([
+        "Running open models locally removes per-token API fees and quota limits.",
+        "A single GPU server can replace a monthly cloud AI bill for steady workloads.",
+        "Local inference costs are fixed hardware costs instead of usage-based pricing.",
+    ], ["reduce API costs with local models", "cloud AI bill versus local GPU server pricing"]),
+    "rag": ([
+        "Retrieval-augmented generation grounds answers in documents from your own knowledge base.",
+        "RAG pipelines embed documents, retrieve the closest passages and pass them to the model as context.",
+        "Chunking documents well improves retrieval quality in a RAG knowledge base.",
+    ], ["what is retrieval-augmented generation", "how are documents retrieved as context for the model"]),
+    "seo": ([
+        "Search engine optimization starts with keyword research and descriptive page titles.",
+        "Meta descriptions and structured data help search engines understand your blog posts.",
+        "Internal links and fast page loads improve SEO rankings.",
+    ], ["improve blog SEO rankings", "keyword research and meta descriptions for search engines"]),
+    "reranking": ([
+        "A reranker scores each retrieved passage against the query with a cross-encoder.",
+        "Two-stage retrieval recalls many candidates cheaply, then reranks the top ones precisely.",
+        "Reranking within a latency budget trades precision for response time.",
+    ], ["cross-encoder reranker for retrieved passages", "two-stage retrieval with reranking latency budget"]),
+    "images": ([
+        "Vision-language models caption images and answer questions about screenshots.",
+        "Generated blog images should be resized and compressed before publishing.",
+        "Image preprocessing caches resized thumbnails for the vision model.",
+    ], ["vision model image captions", "resize and compress blog images"]),
+    "jobs": ([
+        "Background job queues let the API return immediately while workers generate posts.",
+        "Jobs persisted in SQLite resume after a restart instead of being lost.",
+        "Clients poll job status or subscribe to server-sent events until the job finishes.",
+    ], ["background workers for blog generation jobs", "poll job status with server-sent events"]),
+    "automation": ([
+        "Blog automation schedules posts from a content calendar of topics.",
+        "Automated publishing generates drafts, images and metadata for each scheduled post.",
+        "A content calendar keeps automated blog posting consistent week after week.",
+    ], ["schedule blog posts from a content calendar", "automate publishing of blog drafts"]),
+}
+
+def cosine(a: List[float], b: List[float]) -> float:
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+
+def evaluate(embed: Callable[[List[str]], List[List[float]]], top_k: int) -> Dict[str, float]:
+    documents = [(topic, text) for topic, (texts, _) in LABELLED.items() for text in texts]
+    queries = [(topic, text) for topic, (_, texts) in LABELLED.items() for text in texts]
+    doc_vectors = embed([text for _, text in documents])
+    query_vectors = embed([text for _, text in queries])
+
+    hits, recall = 0, 0.0
+    for (topic, _), query_vector in zip(queries, query_vectors):
+        ranked = sorted(range(len(documents)), key=lambda i: cosine(query_vector, doc_vectors[i]), reverse=True)
+        relevant = len(LABELLED[topic][0])
+        hits += documents[ranked[0]][0] == topic
+        recall += sum(documents[i][0] == topic for i in ranked[:top_k]) / min(relevant, top_k)
+    return {"hit@1": hits / len(queries), f"recall@{top_k}": recall / len(queries)}
+
+def throughput(embed: Callable[[List[str]], List[List[float]]], texts: List[str], batch_size: int = 64) -> float:
+    start = time.perf_counter()
+    for offset in range(0, len(texts), batch_size):
+        embed(texts[offset:offset + batch_size])
+    return len(texts) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--texts', type=int, default=2000, help='texts embedded for the throughput measurement')
+    parser.add_argument('--top-k', type=int, default=3)
+    args = parser.parse_args()
+
+    vocabulary = " ".join(text for texts, queries in LABELLED.values() for text in texts + queries).split()
+    texts = [" ".join(random.choices(vocabulary, k=random.randint(50, 300))) for _ in range(args.texts)]
+
+    rag = LocalRAGService.__new__(LocalRAGService)
+    embedders = {"mock-md5": lambda batch: [rag._generate_mock_embedding(text) for text in batch]}
+    embedders["hashing (python)"] = HashingEmbedder(use_numpy=False)
+    if NUMPY_AVAILABLE:
+        embedders["hashing (numpy)"] = HashingEmbedder(use_numpy=True)
+
+    print(f"{'embedder':<18} {'texts/s':>10} {'hit@1':>7} {'recall@' + str(args.top_k):>9}")
+    for name, embed in embedders.items():
+        quality = evaluate(embed, args.top_k)
+        print(f"{name:<18} {throughput(embed, texts):>10.0f} {quality['hit@1']:>7.2f} {quality[f'recall@{args.top_k}']:>9.2f}")
+
+if __name__ == '__main__':
+    main()
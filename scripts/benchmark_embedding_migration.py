@@ -0,0 +1,87 @@
+"""
+Embedding Migration Benchmark
+Fills a scratch RAG store, then re-embeds it into a second model in the
+background while querying continuously. Reports migration throughput and
+query latency before, during and after the switchover
+
+Usage: python scripts/benchmark_embedding_migration.py [--documents 2000] [--rate 500] [--batch-size 32]
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import hashlib
+import tempfile
+import argparse
+import threading
+from typing import List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'services'))
+
+from ragService import LocalRAGService
+
+TOPICS = ["local AI", "retrieval", "blog automation", "SEO", "privacy", "embeddings", "reranking", "caching"]
+
+def sha_embedding(texts: List[str]) -> List[List[float]]:
+    """A second 384-dimensional model to migrate to"""
+    return [[byte / 255.0 - 0.5 for byte in hashlib.sha256(text.encode()).digest()] * 12 for text in texts]
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=500.0, help='documents re-embedded per second')
+    parser.add_argument('--batch-size', type=int, default=32)
+    args = parser.parse_args()
+
+    rag = LocalRAGService(storage_path=tempfile.mkdtemp(prefix="rag_migration_"))
+    asyncio.run(rag.add_documents([
+        (f"Document {i} on {TOPICS[i % len(TOPICS)]}: " + " ".join(random.choices(TOPICS, k=30)), {"n": i})
+        for i in range(args.documents)
+    ]))
+    # Pin the current model, so registering sha-384 does not start an untimed migration to it
+    rag.configured_model = rag.embedding_model
+    rag.register_embedder("sha-384", sha_embedding)
+    print(f"Store: {len(rag.documents)} documents embedded with {rag.embedding_model}")
+
+    phases = {"before": [], "during migration": [], "after": []}
+    phase = ["before"]
+    stop = threading.Event()
+
+    def query_loop():
+        loop = asyncio.new_event_loop()
+        while not stop.is_set():
+            start = time.perf_counter()
+            loop.run_until_complete(rag.retrieve_documents(random.choice(TOPICS), 5))
+            phases[phase[0]].append(time.perf_counter() - start)
+        loop.close()
+
+    querier = threading.Thread(target=query_loop)
+    querier.start()
+    time.sleep(1.0)
+
+    phase[0] = "during migration"
+    migration = rag.start_migration("sha-384", batch_size=args.batch_size, rate=args.rate)
+    while migration.state == "running":
+        time.sleep(0.05)
+    phase[0] = "after"
+    time.sleep(1.0)
+    stop.set()
+    querier.join()
+
+    report = migration.to_dict()
+    print(f"Migration {report['state']}: {report['embedded']} documents in {report['elapsed_s']:.2f}s "
+          f"({report['embedded'] / report['elapsed_s']:.0f} docs/s, limit {args.rate:.0f}); now serving {rag.embedding_model}")
+    for label, latencies in phases.items():
+        print(f"{label:<18} {len(latencies):>6} queries  p50 {percentile(latencies, 0.5) * 1000:7.2f}ms  "
+              f"p99 {percentile(latencies, 0.99) * 1000:7.2f}ms")
+
+if __name__ == '__main__':
+    main()
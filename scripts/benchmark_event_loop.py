@@ -0,0 +1,84 @@
+"""
+AI Routes Event Loop Benchmark
+Compares request throughput of the AI blueprint when coroutines run on a
+per-thread event loop (AI_ASYNC_MODE=per_call) against one shared
+background loop (AI_ASYNC_MODE=background), under concurrent request threads
+
+Usage: python scripts/benchmark_event_loop.py [--requests 2000] [--threads 1 8 32]
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'routes'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'services'))
+
+from flask import Flask
+
+import ai_routes
+
+ENDPOINTS = {
+    'rag': ('/api/ai/rag/query', {'query': 'benefits of local AI models', 'top_k': 3}),
+    'generate': ('/api/ai/generate', {'prompt': 'Write a short intro about local AI', 'max_tokens': 100}),
+    'enhanced': ('/api/ai/enhanced/query', {'query': 'local AI for blog automation'}),
+}
+
+def run(app: Flask, endpoint: str, requests: int, threads: int) -> Dict[str, float]:
+    path, body = ENDPOINTS[endpoint]
+    text_field = 'query' if 'query' in body else 'prompt'
+    latencies: List[float] = []
+
+    def worker(count: int):
+        client = app.test_client()
+        for i in range(count):
+            # Distinct prompts, so identical requests are not coalesced
+            payload = {**body, text_field: f"{body[text_field]} {threading.get_ident()} {i}"}
+            start = time.perf_counter()
+            response = client.post(path, json=payload)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+
+    per_thread = max(1, requests // threads)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for future in [pool.submit(worker, per_thread) for _ in range(threads)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='rag')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    ai_routes.register_ai_routes(app)
+    app.test_client().post('/api/ai/setup/sample-data')
+
+    print(f"{args.requests} POST {ENDPOINTS[args.endpoint][0]} requests per run\n")
+    print(f"{'mode':<11} {'threads':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8}")
+    for threads in args.threads:
+        for mode in ('per_call', 'background'):
+            ai_routes.AI_ASYNC_MODE = mode
+            result = run(app, args.endpoint, args.requests, threads)
+            print(f"{mode:<11} {threads:>7} {result['rps']:>9.1f} {result['p50']:>8.2f} {result['p95']:>8.2f}")
+
+    ai_routes.background_loop.shutdown()
+
+if __name__ == "__main__":
+    main()
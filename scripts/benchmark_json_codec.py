@@ -0,0 +1,97 @@
+"""
+JSON Codec Benchmark
+Compares stdlib json (indented, as the services used to write it, and
+default) against jsonCodec on representative API and storage payloads:
+encode time, body size, and gzip/br size of the encoded body
+
+Usage: python scripts/benchmark_json_codec.py [--iterations 200]
+"""
+
+import os
+import sys
+import json
+import time
+import gzip
+import random
+import argparse
+from typing import Any, Callable, Dict
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'routes'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'services'))
+
+import jsonCodec
+
+def rag_result_payload() -> Dict[str, Any]:
+    sources = [{
+        "content": " ".join(f"passage {i} word{j}" for j in range(80)),
+        "metadata": {"title": f"Document {i}", "category": "ai", "created_at": "2026-01-01T00:00:00"},
+        "score": random.random()
+    } for i in range(5)]
+    return {
+        "success": True,
+        "query": "benefits of local AI models",
+        "answer": "Local AI models keep data on the device and avoid network latency. " * 8,
+        "sources": sources,
+        "processing_time": 0.0123,
+        "context": {"budget": 3000, "tokens_used": 1800, "tokens_saved": 200, "passages": 5}
+    }
+
+def rag_store_payload(documents: int = 500, dimensions: int = 384) -> Dict[str, Any]:
+    return {
+        "documents": {
+            f"doc_{i}": {
+                "id": f"doc_{i}",
+                "content": f"Document {i} about local AI, retrieval and blog automation. " * 10,
+                "metadata": {"title": f"Document {i}"},
+                "embedding": [random.uniform(-1, 1) for _ in range(dimensions)],
+                "created_at": "2026-01-01T00:00:00"
+            } for i in range(documents)
+        }
+    }
+
+def capabilities_payload() -> Dict[str, Any]:
+    try:
+        import ai_common
+        return {"success": True, "capabilities": ai_common.capabilities_payload()}
+    except ImportError:
+        # Services not importable; a payload of the same shape
+        return {"success": True, "capabilities": {
+            f"service_{i}": {"available": True, "features": [f"feature_{j}" for j in range(10)]} for i in range(8)
+        }}
+
+def time_encode(encode: Callable[[Any], bytes], payload: Any, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        encode(payload)
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    random.seed(0)
+    payloads = {
+        'capabilities': capabilities_payload(),
+        'rag result': rag_result_payload(),
+        'rag store': rag_store_payload(),
+    }
+    encoders = {
+        'json indent=2': lambda obj: json.dumps(obj, indent=2, default=str).encode(),
+        'json default': lambda obj: json.dumps(obj, default=str).encode(),
+        f'codec ({jsonCodec.JSON_BACKEND})': jsonCodec.dumps,
+    }
+    brotli_available = jsonCodec.brotli is not None
+
+    print(f"{'payload':<13} {'encoder':<15} {'encode ms':>10} {'bytes':>10} {'gzip':>9} {'br':>9}")
+    for name, payload in payloads.items():
+        iterations = max(1, args.iterations // 20) if name == 'rag store' else args.iterations
+        for label, encode in encoders.items():
+            body = encode(payload)
+            encode_ms = time_encode(encode, payload, iterations)
+            gzipped = len(gzip.compress(body, compresslevel=jsonCodec.GZIP_LEVEL))
+            brotli_size = len(jsonCodec.brotli.compress(body, quality=jsonCodec.BROTLI_QUALITY)) if brotli_available else '-'
+            print(f"{name:<13} {label:<15} {encode_ms:>10.3f} {len(body):>10} {gzipped:>9} {brotli_size:>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Multimodal Batch Benchmark
+Measures images/s for per-call process_multimodal against
+process_multimodal_batch with a cold and a warm preprocessing cache
+
+Usage: python scripts/benchmark_multimodal_batch.py [--images 200] [--batch-size 16]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'services'))
+
+from localAIService import LocalAIService, ImagePreprocessor
+
+def create_synthetic_images(directory: str, count: int, size=(1280, 720)):
+    """Write noise images (Pillow) or PNG-tagged random bytes as stand-ins for the blog library"""
+    try:
+        from PIL import Image
+    except ImportError:
+        Image = None
+
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"image_{i}.jpg" if Image else f"image_{i}.png")
+        if Image:
+            Image.frombytes("RGB", size, os.urandom(size[0] * size[1] * 3)).save(path, "JPEG", quality=85)
+        else:
+            with open(path, 'wb') as f:
+                f.write(b"\x89PNG\r\n\x1a\n" + os.urandom(256 * 1024))
+        paths.append(path)
+    return paths, Image is not None
+
+async def run(paths, batch_size: int):
+    items = [(f"Describe image {i} for the blog", path) for i, path in enumerate(paths)]
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        service = LocalAIService()
+        service.image_preprocessor = ImagePreprocessor(cache_dir=os.path.join(cache_dir, "single"))
+        start = time.perf_counter()
+        for text, path in items:
+            await service.process_multimodal(text, path)
+        single = len(items) / (time.perf_counter() - start)
+
+        service.image_preprocessor = ImagePreprocessor(cache_dir=os.path.join(cache_dir, "batch"))
+        cold = await service.process_multimodal_batch(items, batch_size=batch_size)
+        warm = await service.process_multimodal_batch(items, batch_size=batch_size)
+        service.shutdown()
+
+    return single, cold.metadata, warm.metadata
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as image_dir:
+        paths, decoded = create_synthetic_images(image_dir, args.images)
+        single, cold, warm = asyncio.run(run(paths, args.batch_size))
+
+    print(f"{args.images} images, batch size {args.batch_size}, decoding {'with Pillow' if decoded else 'disabled (Pillow not installed)'}\n")
+    print(f"{'mode':<22} {'images/s':>10} {'cache hits':>11}")
+    print(f"{'per-call (cold cache)':<22} {single:>10.1f} {'-':>11}")
+    print(f"{'batch (cold cache)':<22} {cold['images_per_second']:>10.1f} {cold['cache_hits']:>11}")
+    print(f"{'batch (warm cache)':<22} {warm['images_per_second']:>10.1f} {warm['cache_hits']:>11}")
+
+if __name__ == "__main__":
+    main()
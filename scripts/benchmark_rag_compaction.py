@@ -0,0 +1,91 @@
+"""
+RAG Compaction Benchmark
+Fills a scratch RAG store, then keeps querying it while a share of the
+documents is deleted and updated. Reports query latency before, during and
+after the background compaction those tombstones trigger, to check that
+queries do not stall while the embedding matrix is swapped
+
+Usage: python scripts/benchmark_rag_compaction.py [--documents 2000] [--churn 0.4]
+"""
+
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import argparse
+import threading
+from typing import List
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'services'))
+
+from ragService import LocalRAGService
+
+TOPICS = ["local AI", "retrieval", "blog automation", "SEO", "privacy", "embeddings", "reranking", "caching"]
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def summary(label: str, latencies: List[float]) -> str:
+    return (f"{label:<18} {len(latencies):>6} queries  p50 {percentile(latencies, 0.5) * 1000:7.2f}ms  "
+            f"p99 {percentile(latencies, 0.99) * 1000:7.2f}ms  max {max(latencies, default=0.0) * 1000:7.2f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--documents', type=int, default=2000)
+    parser.add_argument('--churn', type=float, default=0.4, help='fraction of documents deleted or updated')
+    parser.add_argument('--top-k', type=int, default=5)
+    args = parser.parse_args()
+
+    rag = LocalRAGService(storage_path=tempfile.mkdtemp(prefix="rag_compaction_"))
+    doc_ids = asyncio.run(rag.add_documents([
+        (f"Document {i} on {TOPICS[i % len(TOPICS)]}: " + " ".join(random.choices(TOPICS, k=30)), {"n": i})
+        for i in range(args.documents)
+    ]))
+    print(f"Store: {len(rag.documents)} documents, compaction at {rag.compact_dead_fraction:.0%} dead rows")
+
+    phases = {"before": [], "during churn": [], "after": []}
+    phase = ["before"]
+    stop = threading.Event()
+
+    def query_loop():
+        loop = asyncio.new_event_loop()
+        while not stop.is_set():
+            start = time.perf_counter()
+            loop.run_until_complete(rag.retrieve_documents(random.choice(TOPICS), args.top_k))
+            phases[phase[0]].append(time.perf_counter() - start)
+        loop.close()
+
+    querier = threading.Thread(target=query_loop)
+    querier.start()
+    time.sleep(1.0)
+
+    phase[0] = "during churn"
+    churned = random.sample(doc_ids, int(len(doc_ids) * args.churn))
+    start = time.perf_counter()
+    for i, doc_id in enumerate(churned):
+        if i % 2:
+            asyncio.run(rag.delete_document(doc_id))
+        else:
+            asyncio.run(rag.update_document(doc_id, metadata={"n": i, "updated": True}))
+    while rag._compacting:
+        time.sleep(0.01)
+    churn_time = time.perf_counter() - start
+
+    phase[0] = "after"
+    time.sleep(1.0)
+    stop.set()
+    querier.join()
+
+    stats = rag.get_stats()
+    print(f"Churned {len(churned)} documents in {churn_time:.2f}s; {stats['compactions']} compactions, "
+          f"{stats['index_rows']} rows ({stats['dead_rows']} dead) for {stats['total_documents']} documents")
+    for label, latencies in phases.items():
+        print(summary(label, latencies))
+
+if __name__ == '__main__':
+    main()
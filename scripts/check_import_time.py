@@ -0,0 +1,68 @@
+"""
+Import-Time Budget Check
+Imports a service module under `python -X importtime` in a fresh interpreter
+and fails if its cumulative import time exceeds the budget, or if it pulls in
+modules that should only load on first inference (Nexa bindings, process pools)
+
+Usage: python scripts/check_import_time.py [--module localAIService] [--budget-ms 100]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+from typing import Dict, Tuple
+
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'services')
+
+# Modules that must stay out of the import path of the service
+DEFERRED_MODULES = (
+    'llm', 'embedder', 'vlm',  # Nexa SDK bindings
+    'concurrent.futures.process',
+    'multiprocessing',
+)
+
+def measure(module: str) -> Tuple[int, Dict[str, int]]:
+    """Import module in a fresh interpreter; return its cumulative time (us) and all imported modules"""
+    env = dict(os.environ, PYTHONPATH=SERVICES_DIR)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=env, check=True
+    )
+
+    imported = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imported[name.strip()] = int(cumulative)
+    return imported[module], imported
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='localAIService')
+    parser.add_argument('--budget-ms', type=float, default=100.0)
+    parser.add_argument('--runs', type=int, default=5, help='best of N runs is compared against the budget')
+    args = parser.parse_args()
+
+    runs = [measure(args.module) for _ in range(args.runs)]
+    best_us, imported = min(runs, key=lambda run: run[0])
+
+    failures = []
+    if best_us / 1000 > args.budget_ms:
+        failures.append(f"import took {best_us / 1000:.1f}ms (budget {args.budget_ms:.1f}ms)")
+    for module in DEFERRED_MODULES:
+        if module in imported:
+            failures.append(f"{module} is imported eagerly")
+
+    slowest = sorted(imported.items(), key=lambda item: item[1], reverse=True)[:10]
+    print(f"{args.module}: {best_us / 1000:.1f}ms cumulative (best of {args.runs}, budget {args.budget_ms:.1f}ms)")
+    for name, cumulative in slowest:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+"""
+Directory Ingest
+Crawls content directories (markdown, text and exported blog JSON) into the
+RAG knowledge base. Re-runs only re-index files that changed since the last
+crawl and drop the documents of deleted files; --watch keeps re-crawling
+
+Usage: python scripts/ingest_directories.py [--watch] [--interval 5] [--workers 4] DIR [DIR ...]
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src', 'services'))
+
+from directoryCrawler import DirectoryCrawler
+from documentParser import INGEST_CHUNK_CHARS
+
+def print_report(report):
+    print(json.dumps(report.to_dict(), indent=2))
+
+async def run(args):
+    crawler = DirectoryCrawler(manifest_path=args.manifest, workers=args.workers, chunk_chars=args.chunk_chars)
+    try:
+        if args.watch:
+            await crawler.watch(args.roots, interval=args.interval, callback=print_report)
+        else:
+            print_report(await crawler.crawl(args.roots))
+    finally:
+        crawler.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('roots', nargs='+', help='directories or files to ingest')
+    parser.add_argument('--watch', action='store_true', help='keep re-crawling until interrupted')
+    parser.add_argument('--interval', type=float, default=5.0, help='seconds between crawls in watch mode')
+    parser.add_argument('--workers', type=int, default=None, help='parser processes (default: CPU count, at most 8)')
+    parser.add_argument('--manifest', default=None, help='manifest path (default: next to the RAG storage)')
+    parser.add_argument('--chunk-chars', type=int, default=INGEST_CHUNK_CHARS)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+AI API Load Test: Flask vs ASGI
+Starts the AI API under the threaded Flask/Werkzeug server and under uvicorn
+(ai_asgi), then drives each with many concurrent connections and reports
+throughput, latency and server memory. --delay-ms adds simulated backend
+wait to every RAG query so requests spend their time waiting, not computing
+
+Usage: python scripts/load_test_ai_api.py [--concurrency 10 100 1000] [--requests 2000] [--delay-ms 200]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'src', 'routes'))
+sys.path.append(os.path.join(ROOT, 'src', 'services'))
+
+PATH = '/api/ai/rag/query'
+
+def serve(kind: str, port: int, delay_ms: float, admission: bool):
+    """Run one server in this process (invoked by the load test in a subprocess)"""
+    import logging
+    logging.disable(logging.INFO)
+
+    import aiOrchestrator
+    if not admission:
+        # Measure the serving model, not load shedding
+        for gate in aiOrchestrator.orchestrator.admission.values():
+            gate.limit = gate.max_queue = 1_000_000
+    if delay_ms:
+        original = aiOrchestrator.query_rag
+
+        async def slow_query_rag(*args, **kwargs):
+            await asyncio.sleep(delay_ms / 1000)
+            return await original(*args, **kwargs)
+        aiOrchestrator.query_rag = slow_query_rag
+
+    if kind == 'flask':
+        import werkzeug.serving
+        from flask import Flask
+        import ai_routes
+
+        werkzeug.serving.LISTEN_QUEUE = 4096
+        app = Flask(__name__)
+        ai_routes.register_ai_routes(app)
+        werkzeug.serving.run_simple('127.0.0.1', port, app, threaded=True)
+    else:
+        import uvicorn
+        import ai_asgi
+
+        uvicorn.run(ai_asgi.app, host='127.0.0.1', port=port, log_level='warning', backlog=4096)
+
+async def post(port: int, body: Dict) -> Tuple[int, float]:
+    """Minimal HTTP/1.1 POST over a fresh connection; returns (status, seconds)"""
+    payload = json.dumps(body).encode()
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(
+            f"POST {PATH} HTTP/1.1\r\nHost: 127.0.0.1\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload
+        )
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        await reader.read()
+    finally:
+        writer.close()
+    return status, time.perf_counter() - start
+
+async def wait_until_ready(port: int, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await post(port, {"query": "warmup"})
+            return
+        except (OSError, IndexError, ValueError):
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+async def drive(port: int, requests: int, concurrency: int) -> Dict[str, float]:
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+    latencies: List[float] = []
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                # Distinct queries, so identical requests are not coalesced
+                status, elapsed = await post(port, {"query": f"local AI benefits {i}", "top_k": 3})
+                if status == 200:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+            except (OSError, IndexError, ValueError):
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000 if latencies else 0.0
+    return {"rps": len(latencies) / elapsed, "p50": pick(0.50), "p99": pick(0.99), "errors": errors}
+
+def server_rss_mb(pid: int) -> float:
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--delay-ms', type=float, default=200.0)
+    parser.add_argument('--admission', action='store_true', help='keep the default admission limits (requests may be shed)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--serve', choices=['flask', 'asgi'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.delay_ms, args.admission)
+        return
+
+    print(f"{args.requests} POST {PATH} per run, simulated backend wait {args.delay_ms:.0f}ms\n")
+    print(f"{'server':<7} {'conns':>6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'RSS MB':>8}")
+    for kind in ('flask', 'asgi'):
+        command = [sys.executable, os.path.abspath(__file__), '--serve', kind, '--port', str(args.port), '--delay-ms', str(args.delay_ms)]
+        if args.admission:
+            command.append('--admission')
+        server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            asyncio.run(wait_until_ready(args.port))
+            for concurrency in args.concurrency:
+                result = asyncio.run(drive(args.port, args.requests, concurrency))
+                print(f"{kind:<7} {concurrency:>6} {result['rps']:>9.1f} {result['p50']:>9.1f} {result['p99']:>9.1f} "
+                      f"{result['errors']:>7} {server_rss_mb(server.pid):>8.1f}")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
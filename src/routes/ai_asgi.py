@@ -0,0 +1,716 @@
+"""
+AI Services ASGI App
+Serves the same endpoints as the Flask ai_bp blueprint natively on asyncio,
+so a waiting or streaming request costs a coroutine instead of a worker thread
+
+Requires starlette and uvicorn (requirements.txt); Flask is not needed
+Run locally: uvicorn ai_asgi:app --app-dir src/routes --port 8001
+"""
+
+import asyncio
+from dataclasses import asdict
+from functools import wraps
+from typing import Dict, Any, Optional
+import logging
+
+from starlette.applications import Starlette
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware import Middleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+# Import AI services and the framework-neutral helpers shared with the Flask routes
+try:
+    from ..services.aiOrchestrator import (
+        orchestrator,
+        AdmissionRejected,
+        generate_ai_response,
+        query_knowledge_base,
+        enhanced_ai_query,
+        get_orchestrator_status
+    )
+    from ..services.ragService import (
+        add_document_to_rag,
+        delete_document_from_rag,
+        update_document_in_rag,
+        get_embedding_status,
+        start_embedding_migration,
+        cancel_embedding_migration
+    )
+    from ..services.metricsService import get_metrics_text
+    from ..services.tracingService import tracer, get_recent_traces
+    from ..services.jsonCodec import dumps, compress
+    from ..services.jobQueue import job_queue, get_job, get_job_stats
+    from ..services.documentIngest import IngestTooLarge, MAX_INGEST_BYTES
+    from .ai_common import (
+        BLOG_SAMPLE_DOCUMENTS,
+        parse_timeout_ms,
+        parse_batch_requests,
+        JOB_EVENTS_HEARTBEAT,
+        create_ingester,
+        parse_migration_request,
+        parse_blog_request,
+        parse_bulk_blog_request,
+        stream_blog_posts,
+        wants_async,
+        generate_blog_post,
+        submit_blog_job,
+        sse_event,
+        STATUS_CACHE_CONTROL,
+        VersionedSnapshot,
+        matching_etag,
+        encoded_etag,
+        status_snapshot,
+        capabilities_snapshot,
+        run_service_tests
+    )
+except ImportError:
+    # Handle relative imports
+    import sys
+    import os
+    sys.path.append(os.path.dirname(__file__))
+    sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
+
+    from aiOrchestrator import (
+        orchestrator,
+        AdmissionRejected,
+        generate_ai_response,
+        query_knowledge_base,
+        enhanced_ai_query,
+        get_orchestrator_status
+    )
+    from ragService import (
+        add_document_to_rag,
+        delete_document_from_rag,
+        update_document_in_rag,
+        get_embedding_status,
+        start_embedding_migration,
+        cancel_embedding_migration
+    )
+    from metricsService import get_metrics_text
+    from tracingService import tracer, get_recent_traces
+    from jsonCodec import dumps, compress
+    from jobQueue import job_queue, get_job, get_job_stats
+    from documentIngest import IngestTooLarge, MAX_INGEST_BYTES
+    from ai_common import (
+        BLOG_SAMPLE_DOCUMENTS,
+        parse_timeout_ms,
+        parse_batch_requests,
+        JOB_EVENTS_HEARTBEAT,
+        create_ingester,
+        parse_migration_request,
+        parse_blog_request,
+        parse_bulk_blog_request,
+        stream_blog_posts,
+        wants_async,
+        generate_blog_post,
+        submit_blog_job,
+        sse_event,
+        STATUS_CACHE_CONTROL,
+        VersionedSnapshot,
+        matching_etag,
+        encoded_etag,
+        status_snapshot,
+        capabilities_snapshot,
+        run_service_tests
+    )
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PREFIX = '/api/ai'
+
+# Seconds between checks for job updates in SSE streams
+JOB_EVENTS_POLL_INTERVAL = 0.25
+
+# Bodies at least this large are compressed in a worker thread, not on the event loop
+THREADED_COMPRESSION_BYTES = 64 * 1024
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with the fast codec (compact, orjson when installed)"""
+    
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+class CompressionMiddleware:
+    """
+    gzip/br-encode complete responses above the size threshold when the client accepts it
+    Streaming responses (more than one body message) pass through unchanged
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+            
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        start_message = None
+        
+        async def send_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if start_message is None:
+                return await send(message)
+                
+            start, start_message = start_message, None
+            headers = MutableHeaders(scope=start)
+            if message.get("more_body") or "content-encoding" in headers:
+                await send(start)
+                return await send(message)
+                
+            body = message.get("body", b"")
+            if len(body) >= THREADED_COMPRESSION_BYTES:
+                body, encoding = await asyncio.to_thread(compress, body, accept_encoding)
+            else:
+                body, encoding = compress(body, accept_encoding)
+            headers.add_vary_header("Accept-Encoding")
+            if encoding:
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                if "etag" in headers:
+                    # A different body needs a different tag, or caches mix up the encodings
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                message = {**message, "body": body}
+            await send(start)
+            await send(message)
+            
+        await self.app(scope, receive, send_compressed)
+
+async def read_json(request: Request) -> Optional[Dict[str, Any]]:
+    """Request body as a JSON object, or None when missing or malformed"""
+    try:
+        data = await request.json()
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+def error_response(message: str, status_code: int) -> FastJSONResponse:
+    return FastJSONResponse({"success": False, "error": message}, status_code=status_code)
+
+def overloaded_response(error: AdmissionRejected) -> FastJSONResponse:
+    """429 with Retry-After for requests shed by admission control"""
+    return FastJSONResponse({
+        "success": False,
+        "error": str(error),
+        "reason": error.reason,
+        "retry_after": error.retry_after
+    }, status_code=429, headers={'Retry-After': str(int(error.retry_after))})
+
+def json_response(payload: Dict[str, Any]) -> FastJSONResponse:
+    """Serialize inside its own span, so serialization cost shows up in traces"""
+    with tracer.span("serialize_response"):
+        return FastJSONResponse(payload)
+
+def snapshot_response(request: Request, snapshot: VersionedSnapshot) -> Response:
+    """Cached snapshot body, or 304 Not Modified when the client already has it"""
+    body, etag = snapshot.get()
+    headers = {'ETag': etag, 'Cache-Control': STATUS_CACHE_CONTROL}
+    held = matching_etag(request.headers.get('If-None-Match'), etag)
+    if held:
+        headers['ETag'] = held
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
+
+def traced_route(endpoint):
+    """Trace the whole request, including response serialization, as the root span"""
+    @wraps(endpoint)
+    async def wrapper(request: Request):
+        with tracer.span(f"http {request.method} {request.url.path}") as span:
+            response = await endpoint(request)
+            span.set_attribute("http.status_code", response.status_code)
+            return response
+    return wrapper
+
+def request_timeout_ms(request: Request, data: Dict[str, Any]) -> float:
+    return parse_timeout_ms(data, request.headers.get('X-Request-Timeout-Ms'))
+
+async def get_ai_status(request: Request) -> Response:
+    """Get AI services status"""
+    try:
+        return snapshot_response(request, status_snapshot)
+    except Exception as e:
+        logger.error(f"❌ Status check failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def get_ai_metrics(request: Request) -> Response:
+    """Latency histograms and counters in Prometheus text format"""
+    try:
+        return Response(get_metrics_text(), media_type='text/plain; version=0.0.4; charset=utf-8')
+    except Exception as e:
+        logger.error(f"❌ Metrics export failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def get_debug_traces(request: Request) -> Response:
+    """Most recent sampled traces from the in-memory ring"""
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', 20)), 200))
+        return FastJSONResponse(get_recent_traces(limit))
+    except Exception as e:
+        logger.error(f"❌ Trace listing failed: {str(e)}")
+        return error_response(str(e), 500)
+
+@traced_route
+async def generate_text(request: Request) -> Response:
+    """Generate text using local AI"""
+    try:
+        data = await read_json(request)
+        if not data:
+            return error_response("JSON data required", 400)
+        prompt = data.get('prompt')
+        if not prompt:
+            return error_response("Prompt required", 400)
+        try:
+            timeout_ms = request_timeout_ms(request, data)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        result = await generate_ai_response(
+            prompt=prompt,
+            model=data.get('model', 'default'),
+            max_tokens=data.get('max_tokens', 500),
+            temperature=data.get('temperature', 0.7),
+            timeout_ms=timeout_ms
+        )
+
+        logger.info(f"✅ Text generation: {prompt[:50]}... -> {len(result.get('text', ''))} chars")
+        return json_response(result)
+
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.error(f"❌ Text generation failed: {str(e)}")
+        return error_response(str(e), 500)
+
+@traced_route
+async def rag_query(request: Request) -> Response:
+    """Query RAG knowledge base"""
+    try:
+        data = await read_json(request)
+        if not data:
+            return error_response("JSON data required", 400)
+        query = data.get('query')
+        if not query:
+            return error_response("Query required", 400)
+        try:
+            timeout_ms = request_timeout_ms(request, data)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        rerank_options = {
+            key: data[key]
+            for key in ('rerank', 'candidate_k', 'rerank_batch_size', 'rerank_budget_ms', 'max_context_tokens')
+            if key in data
+        }
+        result = await query_knowledge_base(
+            query, top_k=data.get('top_k', 5), timeout_ms=timeout_ms, **rerank_options
+        )
+
+        logger.info(f"✅ RAG query: {query[:50]}... -> {len(result.get('sources', []))} sources")
+        return json_response(result)
+
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.error(f"❌ RAG query failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def add_rag_document(request: Request) -> Response:
+    """Add document to RAG knowledge base"""
+    try:
+        data = await read_json(request)
+        if not data:
+            return error_response("JSON data required", 400)
+        content = data.get('content')
+        if not content:
+            return error_response("Document content required", 400)
+
+        metadata = data.get('metadata', {})
+        doc_id = await add_document_to_rag(content, metadata)
+
+        logger.info(f"✅ Document added to RAG: {doc_id} ({len(content)} chars)")
+        return FastJSONResponse({
+            "success": True,
+            "document_id": doc_id,
+            "content_length": len(content),
+            "metadata": metadata
+        })
+
+    except Exception as e:
+        logger.error(f"❌ Document addition failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def update_rag_document(request: Request) -> Response:
+    """Replace a document's content and/or metadata, keeping its id"""
+    try:
+        doc_id = request.path_params['doc_id']
+        data = await read_json(request)
+        if not data or ('content' not in data and 'metadata' not in data):
+            return error_response("Document content or metadata required", 400)
+        content = data.get('content')
+        if content is not None and (not isinstance(content, str) or not content):
+            return error_response("Document content must be a non-empty string", 400)
+
+        doc = await update_document_in_rag(doc_id, content, data.get('metadata'))
+        if doc is None:
+            return error_response("Document not found", 404)
+
+        logger.info(f"✅ Document updated in RAG: {doc_id}")
+        return FastJSONResponse({
+            "success": True,
+            "document_id": doc_id,
+            "content_length": len(doc.content),
+            "metadata": doc.metadata
+        })
+
+    except Exception as e:
+        logger.error(f"❌ Document update failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def delete_rag_document(request: Request) -> Response:
+    """Delete a document; it stops matching queries immediately"""
+    try:
+        doc_id = request.path_params['doc_id']
+        if not await delete_document_from_rag(doc_id):
+            return error_response("Document not found", 404)
+
+        logger.info(f"✅ Document deleted from RAG: {doc_id}")
+        return FastJSONResponse({"success": True, "document_id": doc_id})
+
+    except Exception as e:
+        logger.error(f"❌ Document deletion failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def get_rag_embeddings(request: Request) -> Response:
+    """Embedding model in use, available models and migration progress"""
+    try:
+        return FastJSONResponse({"success": True, "embeddings": get_embedding_status()})
+    except Exception as e:
+        logger.error(f"❌ Embedding status failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def migrate_rag_embeddings(request: Request) -> Response:
+    """Re-embed the knowledge base with another model in the background"""
+    try:
+        try:
+            model_id, options = parse_migration_request(await read_json(request))
+            migration = start_embedding_migration(model_id, **options)
+        except ValueError as e:
+            return error_response(str(e), 400)
+        except RuntimeError as e:
+            return error_response(str(e), 409)
+
+        logger.info(f"✅ Embedding migration to {model_id}: {migration['state']}")
+        return FastJSONResponse({"success": True, "migration": migration}, status_code=202)
+
+    except Exception as e:
+        logger.error(f"❌ Embedding migration failed to start: {str(e)}")
+        return error_response(str(e), 500)
+
+async def cancel_rag_migration(request: Request) -> Response:
+    """Cancel the running embedding migration"""
+    if not cancel_embedding_migration():
+        return error_response("No embedding migration running", 404)
+    return FastJSONResponse({"success": True, "embeddings": get_embedding_status()})
+
+@traced_route
+async def ingest_rag_documents(request: Request) -> Response:
+    """
+    Stream a large upload into the knowledge base
+    The body (text, markdown, or NDJSON documents with Content-Type
+    application/x-ndjson) is chunked and embedded while it is read
+    """
+    try:
+        content_length = request.headers.get('content-length')
+        if content_length and content_length.isdigit() and int(content_length) > MAX_INGEST_BYTES:
+            return error_response(f"Upload exceeds the {MAX_INGEST_BYTES} byte limit", 413)
+        try:
+            ingester = create_ingester(request.headers.get('content-type'), dict(request.query_params))
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        try:
+            try:
+                async for block in request.stream():
+                    if block:
+                        await ingester.feed(block)
+                report = await ingester.finish()
+            finally:
+                # Persist what was added even when the upload failed part-way
+                await ingester.aclose()
+        except IngestTooLarge as e:
+            return FastJSONResponse({"success": False, "error": str(e), "ingested": ingester.report.to_dict()}, status_code=413)
+        except ValueError as e:
+            return FastJSONResponse({
+                "success": False,
+                "error": f"Malformed upload: {str(e)}",
+                "ingested": ingester.report.to_dict()
+            }, status_code=400)
+
+        logger.info(f"✅ Upload ingested into RAG: {report.chunks} chunks, {report.bytes_received} bytes")
+        return FastJSONResponse({"success": True, **report.to_dict()})
+
+    except Exception as e:
+        logger.error(f"❌ Upload ingestion failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def enhanced_query(request: Request) -> Response:
+    """Enhanced query using all AI services"""
+    try:
+        data = await read_json(request)
+        if not data:
+            return error_response("JSON data required", 400)
+        query = data.get('query')
+        if not query:
+            return error_response("Query required", 400)
+        try:
+            timeout_ms = request_timeout_ms(request, data)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        result = await enhanced_ai_query(
+            query=query,
+            use_rag=data.get('use_rag', True),
+            max_tokens=data.get('max_tokens', 800),
+            temperature=data.get('temperature', 0.7),
+            max_context_tokens=data.get('max_context_tokens'),
+            timeout_ms=timeout_ms
+        )
+
+        logger.info(f"✅ Enhanced query: {query[:50]}... -> {len(result.get('steps', []))} steps")
+        return json_response(result)
+
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.error(f"❌ Enhanced query failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def batch_requests(request: Request) -> Response:
+    """Run many AI requests concurrently and stream results as NDJSON as they complete"""
+    try:
+        data = await read_json(request)
+        if not data:
+            return error_response("JSON data required", 400)
+        try:
+            requests, max_concurrency = parse_batch_requests(data)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        async def stream_results():
+            # A client disconnect cancels this generator, which cancels the remaining work
+            responses = orchestrator.process_batch(requests, max_concurrency)
+            try:
+                async for response in responses:
+                    yield dumps(asdict(response)) + b"\n"
+            finally:
+                await responses.aclose()
+
+        logger.info(f"✅ Batch accepted: {len(requests)} requests (concurrency {max_concurrency})")
+        return StreamingResponse(stream_results(), media_type='application/x-ndjson')
+
+    except Exception as e:
+        logger.error(f"❌ Batch request failed: {str(e)}")
+        return error_response(str(e), 500)
+
+@traced_route
+async def generate_blog_content(request: Request) -> Response:
+    """Generate blog content using AI services"""
+    try:
+        data = await read_json(request)
+        if not data:
+            return error_response("JSON data required", 400)
+        try:
+            params = parse_blog_request(data)
+            timeout_ms = request_timeout_ms(request, data)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        if wants_async(data, request.headers.get('Prefer')):
+            # The job is persisted to SQLite; keep the write off the event loop
+            accepted = await asyncio.to_thread(
+                submit_blog_job, params, data, request.headers.get('X-Request-Timeout-Ms')
+            )
+            return FastJSONResponse(accepted, status_code=202, headers={'Location': accepted["status_url"]})
+
+        return json_response(await generate_blog_post(params, timeout_ms))
+
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.error(f"❌ Blog generation failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def generate_blog_bulk(request: Request) -> Response:
+    """Generate posts for many topics concurrently and stream each as NDJSON when it finishes"""
+    try:
+        data = await read_json(request)
+        if not data:
+            return error_response("JSON data required", 400)
+        try:
+            posts, max_concurrency, share_threshold = parse_bulk_blog_request(data)
+            timeout_ms = request_timeout_ms(request, data)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        async def stream_posts():
+            # A client disconnect cancels this generator, which cancels the remaining posts
+            results = stream_blog_posts(posts, timeout_ms, max_concurrency, share_threshold)
+            try:
+                async for line in results:
+                    yield dumps(line) + b"\n"
+            finally:
+                await results.aclose()
+
+        logger.info(f"✅ Bulk blog generation accepted: {len(posts)} topics (concurrency {max_concurrency})")
+        return StreamingResponse(stream_posts(), media_type='application/x-ndjson')
+
+    except Exception as e:
+        logger.error(f"❌ Bulk blog generation failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def get_jobs_status(request: Request) -> Response:
+    """Job queue depth, worker utilisation and latency"""
+    try:
+        return FastJSONResponse({"success": True, "jobs": await asyncio.to_thread(get_job_stats)})
+    except Exception as e:
+        logger.error(f"❌ Job stats failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def get_job_status(request: Request) -> Response:
+    """Current state of a background job, with its result once finished"""
+    job = await asyncio.to_thread(get_job, request.path_params['job_id'])
+    if job is None:
+        return error_response("Job not found", 404)
+    return FastJSONResponse({"success": True, "job": job.to_dict()})
+
+async def job_events(job_id: str):
+    """SSE stream of a job's state; polls the queue's version so no thread is held per subscriber"""
+    last_update = None
+    version = None
+    idle = 0.0
+    while True:
+        if job_queue.version != version:
+            version = job_queue.version
+            job = await asyncio.to_thread(get_job, job_id)
+            if job is None:
+                yield sse_event("error", {"error": "Job not found"})
+                return
+            if job.updated_at != last_update:
+                last_update, idle = job.updated_at, 0.0
+                yield sse_event(job.status, job.to_dict())
+                if job.done:
+                    return
+        if idle >= JOB_EVENTS_HEARTBEAT:
+            idle = 0.0
+            yield b": keep-alive\n\n"
+        await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+        idle += JOB_EVENTS_POLL_INTERVAL
+
+async def stream_job_events(request: Request) -> Response:
+    """Server-sent events for a background job until it finishes"""
+    job_id = request.path_params['job_id']
+    if await asyncio.to_thread(get_job, job_id) is None:
+        return error_response("Job not found", 404)
+    return StreamingResponse(job_events(job_id), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+async def setup_sample_data(request: Request) -> Response:
+    """Setup sample data for testing"""
+    try:
+        await orchestrator.setup_sample_data()
+        for sample in BLOG_SAMPLE_DOCUMENTS:
+            await add_document_to_rag(sample["content"], sample["metadata"])
+            
+        return FastJSONResponse({
+            "success": True,
+            "message": "Sample data setup completed",
+            "documents_added": len(BLOG_SAMPLE_DOCUMENTS) + 4,  # 4 from orchestrator setup
+            "status": get_orchestrator_status()
+        })
+
+    except Exception as e:
+        logger.error(f"❌ Sample data setup failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def get_capabilities(request: Request) -> Response:
+    """Get AI service capabilities"""
+    try:
+        return snapshot_response(request, capabilities_snapshot)
+    except Exception as e:
+        logger.error(f"❌ Capabilities check failed: {str(e)}")
+        return error_response(str(e), 500)
+
+async def test_ai_services(request: Request) -> Response:
+    """Test all AI services"""
+    try:
+        test_results = await run_service_tests()
+        return FastJSONResponse({
+            "success": True,
+            "test_results": test_results,
+            "all_tests_passed": all(result.get("success", False) for result in test_results.values()),
+            "services_tested": len(test_results),
+            "timestamp": orchestrator.response_history[-1].metadata.get("timestamp") if orchestrator.response_history else None
+        })
+    except Exception as e:
+        logger.error(f"❌ AI services test failed: {str(e)}")
+        return error_response(str(e), 500)
+
+routes = [
+    Route(f'{PREFIX}/status', get_ai_status, methods=['GET']),
+    Route(f'{PREFIX}/metrics', get_ai_metrics, methods=['GET']),
+    Route(f'{PREFIX}/debug/traces', get_debug_traces, methods=['GET']),
+    Route(f'{PREFIX}/generate', generate_text, methods=['POST']),
+    Route(f'{PREFIX}/rag/query', rag_query, methods=['POST']),
+    Route(f'{PREFIX}/rag/add-document', add_rag_document, methods=['POST']),
+    Route(f'{PREFIX}/rag/documents/{{doc_id}}', update_rag_document, methods=['PUT', 'PATCH']),
+    Route(f'{PREFIX}/rag/documents/{{doc_id}}', delete_rag_document, methods=['DELETE']),
+    Route(f'{PREFIX}/rag/embeddings', get_rag_embeddings, methods=['GET']),
+    Route(f'{PREFIX}/rag/embeddings/migrate', migrate_rag_embeddings, methods=['POST']),
+    Route(f'{PREFIX}/rag/embeddings/migrate', cancel_rag_migration, methods=['DELETE']),
+    Route(f'{PREFIX}/rag/ingest', ingest_rag_documents, methods=['POST']),
+    Route(f'{PREFIX}/enhanced/query', enhanced_query, methods=['POST']),
+    Route(f'{PREFIX}/batch', batch_requests, methods=['POST']),
+    Route(f'{PREFIX}/blog/generate', generate_blog_content, methods=['POST']),
+    Route(f'{PREFIX}/blog/bulk', generate_blog_bulk, methods=['POST']),
+    Route(f'{PREFIX}/jobs', get_jobs_status, methods=['GET']),
+    Route(f'{PREFIX}/jobs/{{job_id}}', get_job_status, methods=['GET']),
+    Route(f'{PREFIX}/jobs/{{job_id}}/events', stream_job_events, methods=['GET']),
+    Route(f'{PREFIX}/setup/sample-data', setup_sample_data, methods=['POST']),
+    Route(f'{PREFIX}/capabilities', get_capabilities, methods=['GET']),
+    Route(f'{PREFIX}/test', test_ai_services, methods=['GET'])
+]
+
+async def not_found(request: Request, exc) -> Response:
+    return FastJSONResponse({
+        "success": False,
+        "error": "Endpoint not found",
+        "available_endpoints": [route.path for route in routes]
+    }, status_code=404)
+
+async def internal_error(request: Request, exc) -> Response:
+    return FastJSONResponse({
+        "success": False,
+        "error": "Internal server error",
+        "message": "Please check the logs for more details"
+    }, status_code=500)
+
+def create_ai_asgi_app(debug: bool = False) -> Starlette:
+    """ASGI app exposing the AI API on the shared orchestrator"""
+    app = Starlette(
+        debug=debug,
+        routes=routes,
+        middleware=[Middleware(CompressionMiddleware)],
+        exception_handlers={404: not_found, 500: internal_error}
+    )
+    # Resume jobs left queued or running by a previous process
+    job_queue.start()
+    logger.info("✅ AI ASGI app created")
+    return app
+
+app = create_ai_asgi_app()
@@ -3,40 +3,111 @@ AI Services API Routes
 Provides REST API endpoints for local AI capabilities
 """
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request
+import os
 import asyncio
-import json
-from typing import Dict, Any
+from dataclasses import asdict
+from functools import wraps
+from typing import Dict, Any, Optional
 import logging
 
-# Import AI services
+# Import AI services and the framework-neutral helpers shared with the ASGI app
 try:
     from ..services.aiOrchestrator import (
         orchestrator, 
+        AdmissionRejected,
         generate_ai_response, 
         query_knowledge_base, 
         enhanced_ai_query,
         get_orchestrator_status
     )
-    from ..services.ragService import add_document_to_rag, get_rag_stats
-    from ..services.mcpService import get_mcp_capabilities, add_mcp_context
-    from ..services.localAIService import get_ai_stats
+    from ..services.ragService import (
+        add_document_to_rag,
+        delete_document_from_rag,
+        update_document_in_rag,
+        get_embedding_status,
+        start_embedding_migration,
+        cancel_embedding_migration
+    )
+    from ..services.metricsService import get_metrics_text
+    from ..services.tracingService import tracer, get_recent_traces
+    from ..services.jsonCodec import dumps, compress
+    from ..services.jobQueue import job_queue, get_job, get_job_stats
+    from ..services.documentIngest import IngestTooLarge, MAX_INGEST_BYTES
+    from .ai_common import (
+        BLOG_SAMPLE_DOCUMENTS,
+        JOB_EVENTS_HEARTBEAT,
+        STATUS_CACHE_CONTROL,
+        background_loop,
+        parse_timeout_ms,
+        parse_batch_requests,
+        parse_blog_request,
+        parse_bulk_blog_request,
+        parse_migration_request,
+        create_ingester,
+        stream_blog_posts,
+        wants_async,
+        generate_blog_post,
+        submit_blog_job,
+        sse_event,
+        VersionedSnapshot,
+        matching_etag,
+        encoded_etag,
+        status_snapshot,
+        capabilities_snapshot,
+        run_service_tests
+    )
 except ImportError:
     # Handle relative imports
     import sys
     import os
+    sys.path.append(os.path.dirname(__file__))
     sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'services'))
     
     from aiOrchestrator import (
         orchestrator, 
+        AdmissionRejected,
         generate_ai_response, 
         query_knowledge_base, 
         enhanced_ai_query,
         get_orchestrator_status
     )
-    from ragService import add_document_to_rag, get_rag_stats
-    from mcpService import get_mcp_capabilities, add_mcp_context
-    from localAIService import get_ai_stats
+    from ragService import (
+        add_document_to_rag,
+        delete_document_from_rag,
+        update_document_in_rag,
+        get_embedding_status,
+        start_embedding_migration,
+        cancel_embedding_migration
+    )
+    from metricsService import get_metrics_text
+    from tracingService import tracer, get_recent_traces
+    from jsonCodec import dumps, compress
+    from jobQueue import job_queue, get_job, get_job_stats
+    from documentIngest import IngestTooLarge, MAX_INGEST_BYTES
+    from ai_common import (
+        BLOG_SAMPLE_DOCUMENTS,
+        JOB_EVENTS_HEARTBEAT,
+        STATUS_CACHE_CONTROL,
+        background_loop,
+        parse_timeout_ms,
+        parse_batch_requests,
+        parse_blog_request,
+        parse_bulk_blog_request,
+        parse_migration_request,
+        create_ingester,
+        stream_blog_posts,
+        wants_async,
+        generate_blog_post,
+        submit_blog_job,
+        sse_event,
+        VersionedSnapshot,
+        matching_etag,
+        encoded_etag,
+        status_snapshot,
+        capabilities_snapshot,
+        run_service_tests
+    )
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -45,8 +116,18 @@ logger = logging.getLogger(__name__)
 # Create Blueprint
 ai_bp = Blueprint('ai', __name__, url_prefix='/api/ai')
 
+# Size of the blocks read from a streamed upload
+INGEST_READ_SIZE = 64 * 1024
+
+# How request threads run coroutines: "background" submits them to one shared
+# event loop thread, "per_call" runs each on the request thread's own loop
+AI_ASYNC_MODE = os.environ.get("AI_ASYNC_MODE", "background")
+
 def run_async(coro):
     """Helper to run async functions in sync context"""
+    if AI_ASYNC_MODE == "background":
+        return background_loop.run(coro)
+    
     try:
         loop = asyncio.get_event_loop()
     except RuntimeError:
@@ -55,56 +136,142 @@ def run_async(coro):
     
     return loop.run_until_complete(coro)
 
+def read_json() -> Optional[Dict[str, Any]]:
+    """Request body as a JSON object, or None when missing or malformed (like the ASGI app)"""
+    data = request.get_json(silent=True)
+    return data if isinstance(data, dict) else None
+
+def request_timeout_ms(data: Dict[str, Any]) -> float:
+    return parse_timeout_ms(data, request.headers.get('X-Request-Timeout-Ms'))
+
+def job_events(job_id: str):
+    """SSE stream of a job's state: one event per change, ending when the job is done"""
+    version = job_queue.version
+    last_update = None
+    while True:
+        job = get_job(job_id)
+        if job is None:
+            yield sse_event("error", {"error": "Job not found"})
+            return
+        if job.updated_at != last_update:
+            last_update = job.updated_at
+            yield sse_event(job.status, job.to_dict())
+            if job.done:
+                return
+        changed = job_queue.wait_for_change(version, JOB_EVENTS_HEARTBEAT)
+        if changed == version:
+            yield b": keep-alive\n\n"
+        version = changed
+
+def traced_route(view):
+    """Trace the whole request, including response serialization, as the root span"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        with tracer.span(f"http {request.method} {request.url_rule.rule}") as span:
+            response = view(*args, **kwargs)
+            status = response[1] if isinstance(response, tuple) else response.status_code
+            span.set_attribute("http.status_code", status)
+            return response
+    return wrapper
+
+def fast_jsonify(payload: Any) -> Response:
+    """JSON response encoded with the fast codec (compact, orjson when installed)"""
+    return Response(dumps(payload), content_type='application/json')
+
+def snapshot_response(snapshot: VersionedSnapshot) -> Response:
+    """Cached snapshot body, or 304 Not Modified when the client already has it"""
+    body, etag = snapshot.get()
+    headers = {'ETag': etag, 'Cache-Control': STATUS_CACHE_CONTROL}
+    held = matching_etag(request.headers.get('If-None-Match'), etag)
+    if held:
+        headers['ETag'] = held
+        return Response(status=304, headers=headers)
+    return Response(body, content_type='application/json', headers=headers)
+
+def json_response(payload: Dict[str, Any]):
+    """Serialize inside its own span, so serialization cost shows up in traces"""
+    with tracer.span("serialize_response"):
+        return fast_jsonify(payload)
+
+def overloaded_response(error: AdmissionRejected):
+    """429 with Retry-After for requests shed by admission control"""
+    response = fast_jsonify({
+        "success": False,
+        "error": str(error),
+        "reason": error.reason,
+        "retry_after": error.retry_after
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(int(error.retry_after))
+    return response
+
 @ai_bp.route('/status', methods=['GET'])
 def get_ai_status():
     """Get AI services status"""
     try:
-        orchestrator_status = get_orchestrator_status()
-        rag_stats = get_rag_stats()
-        mcp_capabilities = get_mcp_capabilities()
-        ai_stats = get_ai_stats()
-        
-        return jsonify({
-            "success": True,
-            "status": {
-                "orchestrator": orchestrator_status,
-                "rag": rag_stats,
-                "mcp": {
-                    "tools_count": len(mcp_capabilities.get("tools", [])),
-                    "contexts_count": len(mcp_capabilities.get("contexts", [])),
-                    "resources_count": len(mcp_capabilities.get("resources", [])),
-                    "initialized": mcp_capabilities.get("initialized", False)
-                },
-                "local_ai": ai_stats,
-                "timestamp": orchestrator_status.get("timestamp", "unknown")
-            }
-        })
+        return snapshot_response(status_snapshot)
         
     except Exception as e:
         logger.error(f"❌ Status check failed: {str(e)}")
-        return jsonify({
+        return fast_jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@ai_bp.route('/metrics', methods=['GET'])
+def get_ai_metrics():
+    """Latency histograms and counters in Prometheus text format"""
+    try:
+        return Response(get_metrics_text(), content_type='text/plain; version=0.0.4; charset=utf-8')
+        
+    except Exception as e:
+        logger.error(f"❌ Metrics export failed: {str(e)}")
+        return fast_jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@ai_bp.route('/debug/traces', methods=['GET'])
+def get_debug_traces():
+    """Most recent sampled traces from the in-memory ring"""
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 200))
+        return fast_jsonify(get_recent_traces(limit))
+        
+    except Exception as e:
+        logger.error(f"❌ Trace listing failed: {str(e)}")
+        return fast_jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
 @ai_bp.route('/generate', methods=['POST'])
+@traced_route
 def generate_text():
     """Generate text using local AI"""
     try:
-        data = request.get_json()
+        data = read_json()
         if not data:
-            return jsonify({
+            return fast_jsonify({
                 "success": False,
                 "error": "JSON data required"
             }), 400
         
         prompt = data.get('prompt')
         if not prompt:
-            return jsonify({
+            return fast_jsonify({
                 "success": False,
                 "error": "Prompt required"
             }), 400
         
+        try:
+            timeout_ms = request_timeout_ms(data)
+        except ValueError as e:
+            return fast_jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
+        
         # Extract parameters
         model = data.get('model', 'default')
         max_tokens = data.get('max_tokens', 500)
@@ -115,49 +282,68 @@ def generate_text():
             prompt=prompt,
             model=model,
             max_tokens=max_tokens,
-            temperature=temperature
+            temperature=temperature,
+            timeout_ms=timeout_ms
         ))
         
         logger.info(f"✅ Text generation: {prompt[:50]}... -> {len(result.get('text', ''))} chars")
-        return jsonify(result)
+        return json_response(result)
         
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"❌ Text generation failed: {str(e)}")
-        return jsonify({
+        return fast_jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
 @ai_bp.route('/rag/query', methods=['POST'])
+@traced_route
 def rag_query():
     """Query RAG knowledge base"""
     try:
-        data = request.get_json()
+        data = read_json()
         if not data:
-            return jsonify({
+            return fast_jsonify({
                 "success": False,
                 "error": "JSON data required"
             }), 400
         
         query = data.get('query')
         if not query:
-            return jsonify({
+            return fast_jsonify({
                 "success": False,
                 "error": "Query required"
             }), 400
         
+        try:
+            timeout_ms = request_timeout_ms(data)
+        except ValueError as e:
+            return fast_jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
+        
         # Extract parameters
         top_k = data.get('top_k', 5)
+        rerank_options = {
+            key: data[key]
+            for key in ('rerank', 'candidate_k', 'rerank_batch_size', 'rerank_budget_ms', 'max_context_tokens')
+            if key in data
+        }
         
         # Query RAG
-        result = run_async(query_knowledge_base(query, top_k=top_k))
+        result = run_async(query_knowledge_base(query, top_k=top_k, timeout_ms=timeout_ms, **rerank_options))
         
         logger.info(f"✅ RAG query: {query[:50]}... -> {len(result.get('sources', []))} sources")
-        return jsonify(result)
+        return json_response(result)
         
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"❌ RAG query failed: {str(e)}")
-        return jsonify({
+        return fast_jsonify({
             "success": False,
             "error": str(e)
         }), 500
@@ -166,16 +352,16 @@ def rag_query():
 def add_rag_document():
     """Add document to RAG knowledge base"""
     try:
-        data = request.get_json()
+        data = read_json()
         if not data:
-            return jsonify({
+            return fast_jsonify({
                 "success": False,
                 "error": "JSON data required"
             }), 400
         
         content = data.get('content')
         if not content:
-            return jsonify({
+            return fast_jsonify({
                 "success": False,
                 "error": "Document content required"
             }), 400
@@ -186,7 +372,7 @@ def add_rag_document():
         doc_id = run_async(add_document_to_rag(content, metadata))
         
         logger.info(f"✅ Document added to RAG: {doc_id} ({len(content)} chars)")
-        return jsonify({
+        return fast_jsonify({
             "success": True,
             "document_id": doc_id,
             "content_length": len(content),
@@ -195,29 +381,223 @@ def add_rag_document():
         
     except Exception as e:
         logger.error(f"❌ Document addition failed: {str(e)}")
-        return jsonify({
+        return fast_jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@ai_bp.route('/rag/documents/<doc_id>', methods=['PUT', 'PATCH'])
+def update_rag_document(doc_id):
+    """Replace a document's content and/or metadata, keeping its id"""
+    try:
+        data = read_json()
+        if not data or ('content' not in data and 'metadata' not in data):
+            return fast_jsonify({
+                "success": False,
+                "error": "Document content or metadata required"
+            }), 400
+        
+        content = data.get('content')
+        if content is not None and (not isinstance(content, str) or not content):
+            return fast_jsonify({
+                "success": False,
+                "error": "Document content must be a non-empty string"
+            }), 400
+        
+        doc = run_async(update_document_in_rag(doc_id, content, data.get('metadata')))
+        if doc is None:
+            return fast_jsonify({
+                "success": False,
+                "error": "Document not found"
+            }), 404
+        
+        logger.info(f"✅ Document updated in RAG: {doc_id}")
+        return fast_jsonify({
+            "success": True,
+            "document_id": doc_id,
+            "content_length": len(doc.content),
+            "metadata": doc.metadata
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Document update failed: {str(e)}")
+        return fast_jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@ai_bp.route('/rag/documents/<doc_id>', methods=['DELETE'])
+def delete_rag_document(doc_id):
+    """Delete a document; it stops matching queries immediately"""
+    try:
+        if not run_async(delete_document_from_rag(doc_id)):
+            return fast_jsonify({
+                "success": False,
+                "error": "Document not found"
+            }), 404
+        
+        logger.info(f"✅ Document deleted from RAG: {doc_id}")
+        return fast_jsonify({
+            "success": True,
+            "document_id": doc_id
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Document deletion failed: {str(e)}")
+        return fast_jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@ai_bp.route('/rag/embeddings', methods=['GET'])
+def get_rag_embeddings():
+    """Embedding model in use, available models and migration progress"""
+    try:
+        return fast_jsonify({
+            "success": True,
+            "embeddings": get_embedding_status()
+        })
+    except Exception as e:
+        logger.error(f"❌ Embedding status failed: {str(e)}")
+        return fast_jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@ai_bp.route('/rag/embeddings/migrate', methods=['POST'])
+def migrate_rag_embeddings():
+    """
+    Re-embed the knowledge base with another model in the background
+    Queries keep using the current vectors until the switchover; poll
+    GET /rag/embeddings for progress
+    """
+    try:
+        try:
+            model_id, options = parse_migration_request(request.get_json(silent=True))
+            migration = start_embedding_migration(model_id, **options)
+        except ValueError as e:
+            return fast_jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
+        except RuntimeError as e:
+            return fast_jsonify({
+                "success": False,
+                "error": str(e)
+            }), 409
+        
+        logger.info(f"✅ Embedding migration to {model_id}: {migration['state']}")
+        return fast_jsonify({
+            "success": True,
+            "migration": migration
+        }), 202
+        
+    except Exception as e:
+        logger.error(f"❌ Embedding migration failed to start: {str(e)}")
+        return fast_jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@ai_bp.route('/rag/embeddings/migrate', methods=['DELETE'])
+def cancel_rag_migration():
+    """Cancel the running embedding migration"""
+    if not cancel_embedding_migration():
+        return fast_jsonify({
+            "success": False,
+            "error": "No embedding migration running"
+        }), 404
+    return fast_jsonify({
+        "success": True,
+        "embeddings": get_embedding_status()
+    })
+
+@ai_bp.route('/rag/ingest', methods=['POST'])
+def ingest_rag_documents():
+    """
+    Stream a large upload into the knowledge base
+    The body (text, markdown, or NDJSON documents with Content-Type
+    application/x-ndjson) is chunked and embedded while it is read
+    """
+    try:
+        if request.content_length is not None and request.content_length > MAX_INGEST_BYTES:
+            return fast_jsonify({
+                "success": False,
+                "error": f"Upload exceeds the {MAX_INGEST_BYTES} byte limit"
+            }), 413
+        
+        try:
+            ingester = create_ingester(request.content_type, request.args)
+        except ValueError as e:
+            return fast_jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
+        
+        try:
+            try:
+                while True:
+                    block = request.stream.read(INGEST_READ_SIZE)
+                    if not block:
+                        break
+                    run_async(ingester.feed(block))
+                report = run_async(ingester.finish())
+            finally:
+                # Persist what was added even when the upload failed part-way
+                ingester.close()
+        except IngestTooLarge as e:
+            return fast_jsonify({
+                "success": False,
+                "error": str(e),
+                "ingested": ingester.report.to_dict()
+            }), 413
+        except ValueError as e:
+            return fast_jsonify({
+                "success": False,
+                "error": f"Malformed upload: {str(e)}",
+                "ingested": ingester.report.to_dict()
+            }), 400
+        
+        logger.info(f"✅ Upload ingested into RAG: {report.chunks} chunks, {report.bytes_received} bytes")
+        return fast_jsonify({
+            "success": True,
+            **report.to_dict()
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Upload ingestion failed: {str(e)}")
+        return fast_jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
 @ai_bp.route('/enhanced/query', methods=['POST'])
+@traced_route
 def enhanced_query():
     """Enhanced query using all AI services"""
     try:
-        data = request.get_json()
+        data = read_json()
         if not data:
-            return jsonify({
+            return fast_jsonify({
                 "success": False,
                 "error": "JSON data required"
             }), 400
         
         query = data.get('query')
         if not query:
-            return jsonify({
+            return fast_jsonify({
                 "success": False,
                 "error": "Query required"
             }), 400
         
+        try:
+            timeout_ms = request_timeout_ms(data)
+        except ValueError as e:
+            return fast_jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
+        
         # Extract parameters
         use_rag = data.get('use_rag', True)
         max_tokens = data.get('max_tokens', 800)
@@ -228,98 +608,185 @@ def enhanced_query():
             query=query,
             use_rag=use_rag,
             max_tokens=max_tokens,
-            temperature=temperature
+            temperature=temperature,
+            max_context_tokens=data.get('max_context_tokens'),
+            timeout_ms=timeout_ms
         ))
         
         logger.info(f"✅ Enhanced query: {query[:50]}... -> {len(result.get('steps', []))} steps")
-        return jsonify(result)
+        return json_response(result)
         
+    except AdmissionRejected as e:
+        return overloaded_response(e)
     except Exception as e:
         logger.error(f"❌ Enhanced query failed: {str(e)}")
-        return jsonify({
+        return fast_jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@ai_bp.route('/batch', methods=['POST'])
+def batch_requests():
+    """Run many AI requests concurrently and stream results as NDJSON as they complete"""
+    try:
+        data = read_json()
+        if not data:
+            return fast_jsonify({
+                "success": False,
+                "error": "JSON data required"
+            }), 400
+        
+        try:
+            requests, max_concurrency = parse_batch_requests(data)
+        except ValueError as e:
+            return fast_jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
+        
+        def stream_results():
+            responses = orchestrator.process_batch(requests, max_concurrency)
+            try:
+                while True:
+                    try:
+                        response = run_async(responses.__anext__())
+                    except StopAsyncIteration:
+                        break
+                    yield dumps(asdict(response)) + b"\n"
+            finally:
+                run_async(responses.aclose())
+        
+        logger.info(f"✅ Batch accepted: {len(requests)} requests (concurrency {max_concurrency})")
+        return Response(stream_results(), mimetype='application/x-ndjson')
+        
+    except Exception as e:
+        logger.error(f"❌ Batch request failed: {str(e)}")
+        return fast_jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
 @ai_bp.route('/blog/generate', methods=['POST'])
+@traced_route
 def generate_blog_content():
     """Generate blog content using AI services"""
     try:
-        data = request.get_json()
+        data = read_json()
         if not data:
-            return jsonify({
+            return fast_jsonify({
                 "success": False,
                 "error": "JSON data required"
             }), 400
         
-        topic = data.get('topic')
-        if not topic:
-            return jsonify({
+        try:
+            params = parse_blog_request(data)
+            timeout_ms = request_timeout_ms(data)
+        except ValueError as e:
+            return fast_jsonify({
                 "success": False,
-                "error": "Blog topic required"
+                "error": str(e)
             }), 400
         
-        # Extract parameters
-        content_type = data.get('type', 'article')  # article, tutorial, review, etc.
-        length = data.get('length', 'medium')  # short, medium, long
-        tone = data.get('tone', 'professional')  # professional, casual, technical
-        keywords = data.get('keywords', [])
-        
-        # Build enhanced prompt for blog generation
-        prompt = f"""
-Create a {content_type} about "{topic}" with the following specifications:
-- Length: {length}
-- Tone: {tone}
-- Keywords to include: {', '.join(keywords) if keywords else 'relevant keywords'}
-
-Please structure the content with:
-1. Engaging title
-2. Introduction
-3. Main content sections
-4. Conclusion
-5. Relevant tags/categories
-
-Focus on providing valuable, informative content that would be suitable for a blog.
-"""
+        # Long generations run as a job; the client polls or subscribes instead of holding the connection
+        if wants_async(data, request.headers.get('Prefer')):
+            accepted = submit_blog_job(params, data, request.headers.get('X-Request-Timeout-Ms'))
+            return fast_jsonify(accepted), 202, {'Location': accepted["status_url"]}
         
-        # Use enhanced query for better results
-        result = run_async(enhanced_ai_query(
-            query=prompt,
-            use_rag=True,
-            max_tokens=1200,
-            temperature=0.8
-        ))
+        blog_content = run_async(generate_blog_post(params, timeout_ms))
+        return json_response(blog_content)
         
-        if result['success'] and result['result']:
-            # Parse and structure the blog content
-            blog_content = {
-                "success": True,
-                "topic": topic,
-                "content": result['result'],
-                "type": content_type,
-                "length": length,
-                "tone": tone,
-                "keywords": keywords,
-                "processing_steps": len(result.get('steps', [])),
-                "processing_time": result.get('processing_time', 0),
-                "generated_at": orchestrator.response_history[-1].metadata.get('timestamp') if orchestrator.response_history else None
-            }
-        else:
-            blog_content = {
+    except AdmissionRejected as e:
+        return overloaded_response(e)
+    except Exception as e:
+        logger.error(f"❌ Blog generation failed: {str(e)}")
+        return fast_jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@ai_bp.route('/blog/bulk', methods=['POST'])
+def generate_blog_bulk():
+    """Generate posts for many topics concurrently and stream each as NDJSON when it finishes"""
+    try:
+        data = read_json()
+        if not data:
+            return fast_jsonify({
                 "success": False,
-                "error": result.get('error', 'Blog generation failed')
-            }
+                "error": "JSON data required"
+            }), 400
         
-        logger.info(f"✅ Blog content generated: {topic[:50]}... -> {len(str(result.get('result', '')))} chars")
-        return jsonify(blog_content)
+        try:
+            posts, max_concurrency, share_threshold = parse_bulk_blog_request(data)
+            timeout_ms = request_timeout_ms(data)
+        except ValueError as e:
+            return fast_jsonify({
+                "success": False,
+                "error": str(e)
+            }), 400
+        
+        def stream_posts():
+            results = stream_blog_posts(posts, timeout_ms, max_concurrency, share_threshold)
+            try:
+                while True:
+                    try:
+                        line = run_async(results.__anext__())
+                    except StopAsyncIteration:
+                        break
+                    yield dumps(line) + b"\n"
+            finally:
+                run_async(results.aclose())
+        
+        logger.info(f"✅ Bulk blog generation accepted: {len(posts)} topics (concurrency {max_concurrency})")
+        return Response(stream_posts(), mimetype='application/x-ndjson')
         
     except Exception as e:
-        logger.error(f"❌ Blog generation failed: {str(e)}")
-        return jsonify({
+        logger.error(f"❌ Bulk blog generation failed: {str(e)}")
+        return fast_jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+@ai_bp.route('/jobs', methods=['GET'])
+def get_jobs_status():
+    """Job queue depth, worker utilisation and latency"""
+    try:
+        return fast_jsonify({
+            "success": True,
+            "jobs": get_job_stats()
+        })
+        
+    except Exception as e:
+        logger.error(f"❌ Job stats failed: {str(e)}")
+        return fast_jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@ai_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Current state of a background job, with its result once finished"""
+    job = get_job(job_id)
+    if job is None:
+        return fast_jsonify({
+            "success": False,
+            "error": "Job not found"
+        }), 404
+    return fast_jsonify({
+        "success": True,
+        "job": job.to_dict()
+    })
+
+@ai_bp.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Server-sent events for a background job until it finishes"""
+    if get_job(job_id) is None:
+        return fast_jsonify({
+            "success": False,
+            "error": "Job not found"
+        }), 404
+    return Response(job_events(job_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @ai_bp.route('/setup/sample-data', methods=['POST'])
 def setup_sample_data():
     """Setup sample data for testing"""
@@ -328,34 +795,19 @@ def setup_sample_data():
         run_async(orchestrator.setup_sample_data())
         
         # Add blog-specific sample data
-        blog_samples = [
-            {
-                "content": "Blog automation with local AI models provides cost-effective content generation, maintains privacy, and ensures consistent availability without depending on external APIs.",
-                "metadata": {"type": "blog_guide", "topic": "automation"}
-            },
-            {
-                "content": "SEO optimization techniques include keyword research, content structure, meta descriptions, internal linking, and regular content updates to improve search rankings.",
-                "metadata": {"type": "seo_guide", "topic": "optimization"}
-            },
-            {
-                "content": "Local AI deployment offers benefits like data privacy, reduced latency, cost predictability, and independence from internet connectivity for critical applications.",
-                "metadata": {"type": "technical_guide", "topic": "local_ai"}
-            }
-        ]
-        
-        for sample in blog_samples:
+        for sample in BLOG_SAMPLE_DOCUMENTS:
             run_async(add_document_to_rag(sample["content"], sample["metadata"]))
         
-        return jsonify({
+        return fast_jsonify({
             "success": True,
             "message": "Sample data setup completed",
-            "documents_added": len(blog_samples) + 4,  # 4 from orchestrator setup
+            "documents_added": len(BLOG_SAMPLE_DOCUMENTS) + 4,  # 4 from orchestrator setup
             "status": get_orchestrator_status()
         })
         
     except Exception as e:
         logger.error(f"❌ Sample data setup failed: {str(e)}")
-        return jsonify({
+        return fast_jsonify({
             "success": False,
             "error": str(e)
         }), 500
@@ -364,42 +816,11 @@ def setup_sample_data():
 def get_capabilities():
     """Get AI service capabilities"""
     try:
-        capabilities = {
-            "text_generation": {
-                "available": orchestrator.services_status.get("local_ai", False),
-                "models": ["default", "creative", "precise"],
-                "max_tokens": 2000,
-                "features": ["completion", "chat", "creative_writing"]
-            },
-            "rag": {
-                "available": orchestrator.services_status.get("rag", False),
-                "features": ["document_ingestion", "semantic_search", "context_retrieval"],
-                "supported_formats": ["text", "markdown", "json"]
-            },
-            "mcp": {
-                "available": orchestrator.services_status.get("mcp", False),
-                "tools": get_mcp_capabilities().get("tools", []),
-                "features": ["tool_calling", "context_management", "resource_handling"]
-            },
-            "multimodal": {
-                "available": False,  # Will be enabled with full Nexa SDK integration
-                "planned_features": ["text_to_image", "text_to_audio", "text_to_video", "audio_to_text"]
-            },
-            "blog_automation": {
-                "available": True,
-                "features": ["content_generation", "seo_optimization", "topic_research", "automated_publishing"]
-            }
-        }
-        
-        return jsonify({
-            "success": True,
-            "capabilities": capabilities,
-            "orchestrator_status": get_orchestrator_status()
-        })
+        return snapshot_response(capabilities_snapshot)
         
     except Exception as e:
         logger.error(f"❌ Capabilities check failed: {str(e)}")
-        return jsonify({
+        return fast_jsonify({
             "success": False,
             "error": str(e)
         }), 500
@@ -408,45 +829,12 @@ def get_capabilities():
 def test_ai_services():
     """Test all AI services"""
     try:
-        test_results = {}
-        
-        # Test text generation
-        try:
-            gen_result = run_async(generate_ai_response("Test prompt for AI generation"))
-            test_results["text_generation"] = {
-                "success": gen_result["success"],
-                "response_length": len(gen_result.get("text", "")),
-                "processing_time": gen_result.get("processing_time", 0)
-            }
-        except Exception as e:
-            test_results["text_generation"] = {"success": False, "error": str(e)}
-        
-        # Test RAG
-        try:
-            rag_result = run_async(query_knowledge_base("local AI benefits"))
-            test_results["rag"] = {
-                "success": rag_result["success"],
-                "sources_found": len(rag_result.get("sources", [])),
-                "confidence": rag_result.get("confidence", 0)
-            }
-        except Exception as e:
-            test_results["rag"] = {"success": False, "error": str(e)}
-        
-        # Test enhanced query
-        try:
-            enhanced_result = run_async(enhanced_ai_query("What is blog automation?"))
-            test_results["enhanced"] = {
-                "success": enhanced_result["success"],
-                "steps_completed": len(enhanced_result.get("steps", [])),
-                "processing_time": enhanced_result.get("processing_time", 0)
-            }
-        except Exception as e:
-            test_results["enhanced"] = {"success": False, "error": str(e)}
+        test_results = run_async(run_service_tests())
         
         # Overall test status
         all_tests_passed = all(result.get("success", False) for result in test_results.values())
         
-        return jsonify({
+        return fast_jsonify({
             "success": True,
             "test_results": test_results,
             "all_tests_passed": all_tests_passed,
@@ -456,24 +844,50 @@ def test_ai_services():
         
     except Exception as e:
         logger.error(f"❌ AI services test failed: {str(e)}")
-        return jsonify({
+        return fast_jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+@ai_bp.after_request
+def compress_response(response: Response) -> Response:
+    """gzip/br-encode buffered responses above the size threshold when the client accepts it"""
+    if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+        return response
+    
+    body, encoding = compress(response.get_data(), request.headers.get('Accept-Encoding', ''))
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if 'ETag' in response.headers:
+            # A different body needs a different tag, or caches mix up the encodings
+            response.headers['ETag'] = encoded_etag(response.headers['ETag'], encoding)
+    return response
+
 # Error handlers
 @ai_bp.errorhandler(404)
 def not_found(error):
-    return jsonify({
+    return fast_jsonify({
         "success": False,
         "error": "Endpoint not found",
         "available_endpoints": [
             "/api/ai/status",
+            "/api/ai/metrics",
             "/api/ai/generate",
             "/api/ai/rag/query",
             "/api/ai/rag/add-document",
+            "/api/ai/rag/documents/<doc_id>",
+            "/api/ai/rag/embeddings",
+            "/api/ai/rag/embeddings/migrate",
+            "/api/ai/rag/ingest",
             "/api/ai/enhanced/query",
+            "/api/ai/batch",
             "/api/ai/blog/generate",
+            "/api/ai/blog/bulk",
+            "/api/ai/jobs",
+            "/api/ai/jobs/<job_id>",
+            "/api/ai/jobs/<job_id>/events",
             "/api/ai/setup/sample-data",
             "/api/ai/capabilities",
             "/api/ai/test"
@@ -482,7 +896,7 @@ def not_found(error):
 
 @ai_bp.errorhandler(500)
 def internal_error(error):
-    return jsonify({
+    return fast_jsonify({
         "success": False,
         "error": "Internal server error",
         "message": "Please check the logs for more details"
@@ -492,5 +906,9 @@ def internal_error(error):
 def register_ai_routes(app):
     """Register AI routes with Flask app"""
     app.register_blueprint(ai_bp)
-    logger.info("✅ AI routes registered successfully")
+    app.extensions['ai_event_loop'] = background_loop
+    app.extensions['ai_job_queue'] = job_queue
+    # Resume jobs left queued or running by a previous process
+    job_queue.start()
+    logger.info(f"✅ AI routes registered successfully (async mode: {AI_ASYNC_MODE})")
     return ai_bp
\ No newline at end of file
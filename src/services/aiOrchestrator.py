@@ -3,10 +3,18 @@ Local AI Orchestrator Service
 Combines LocalAI, RAG, and MCP services for comprehensive local AI capabilities
 """
 
+import math
+import time
+import atexit
 import asyncio
 import json
-from typing import Dict, List, Any, Optional, Union
-from dataclasses import dataclass
+import hashlib
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Union, Deque, Callable, Awaitable, Tuple, AsyncIterator
+from dataclasses import dataclass, replace
 import logging
 from datetime import datetime
 
@@ -15,6 +23,10 @@ try:
     from .localAIService import local_ai_service, generate_text, generate_embeddings
     from .ragService import rag_service, query_rag, add_document_to_rag
     from .mcpService import mcp_service, call_mcp_tool, add_mcp_context
+    from .metricsService import metrics
+    from .requestDeadline import DeadlineExceeded, current_deadline, deadline_from_timeout, deadline_scope, expired, remaining, within_deadline
+    from .tracingService import tracer
+    from .contextPacker import pack_context, context_budget
 except ImportError:
     # Handle relative imports when running as script
     import sys
@@ -24,6 +36,10 @@ except ImportError:
     from localAIService import local_ai_service, generate_text, generate_embeddings
     from ragService import rag_service, query_rag, add_document_to_rag
     from mcpService import mcp_service, call_mcp_tool, add_mcp_context
+    from metricsService import metrics
+    from requestDeadline import DeadlineExceeded, current_deadline, deadline_from_timeout, deadline_scope, expired, remaining, within_deadline
+    from tracingService import tracer
+    from contextPacker import pack_context, context_budget
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -36,6 +52,7 @@ class AIRequest:
     prompt: str
     parameters: Dict[str, Any]
     context: Optional[Dict[str, Any]] = None
+    deadline: Optional[float] = None  # absolute time.monotonic(); parameters["timeout_ms"] is used otherwise
 
 @dataclass
 class AIResponse:
@@ -46,21 +63,341 @@ class AIResponse:
     error: Optional[str] = None
     processing_time: float = 0.0
 
+@dataclass
+class PipelineStep:
+    name: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]  # receives outputs of finished steps
+    depends_on: Tuple[str, ...] = ()
+    metric: Optional[str] = None  # step_duration_seconds label used to estimate the step's latency
+
+async def run_pipeline(steps: List[PipelineStep]) -> Tuple[Dict[str, Any], Dict[str, Dict[str, Any]]]:
+    """
+    Run a small dependency graph of async steps
+    Each step starts as soon as the steps it depends on have finished, so
+    independent steps run concurrently. Dependencies that are not part of the
+    graph are ignored, and a failed step yields None for its dependents.
+    A step is skipped (also yielding None) when the request deadline has passed
+    or is closer than the step's median latency.
+    Returns step outputs and per-step timings (ms relative to pipeline start)
+    """
+    outputs: Dict[str, Any] = {}
+    timings: Dict[str, Dict[str, Any]] = {}
+    tasks: Dict[str, asyncio.Task] = {}
+    pipeline_start = time.perf_counter()
+    
+    async def execute(step: PipelineStep):
+        dependencies = [tasks[name] for name in step.depends_on if name in tasks]
+        if dependencies:
+            await asyncio.gather(*dependencies)
+        
+        start = time.perf_counter()
+        left = remaining()
+        if left is not None:
+            estimate = metrics.histogram("step_duration_seconds", step=step.metric).quantile(0.5) if step.metric else 0.0
+            if left <= estimate:
+                outputs[step.name] = None
+                timings[step.name] = {"started_ms": (start - pipeline_start) * 1000, "duration_ms": 0.0, "skipped": "deadline"}
+                logger.warning(f"⏱️ Pipeline step {step.name} skipped: {max(left, 0) * 1000:.0f}ms left, needs ~{estimate * 1000:.0f}ms")
+                return
+                
+        error = None
+        with tracer.span(f"pipeline.{step.name}") as span:
+            try:
+                outputs[step.name] = await step.run(outputs)
+            except Exception as e:
+                outputs[step.name] = None
+                error = str(e)
+                span.set_error(e)
+                logger.error(f"❌ Pipeline step {step.name} failed: {error}")
+        timings[step.name] = {
+            "started_ms": (start - pipeline_start) * 1000,
+            "duration_ms": (time.perf_counter() - start) * 1000,
+            **({"error": error} if error else {})
+        }
+    
+    for step in steps:
+        tasks[step.name] = asyncio.ensure_future(execute(step))
+    await asyncio.gather(*tasks.values())
+    return outputs, timings
+
+# Prompt of the enhanced pipeline when retrieved context is available
+ENHANCED_PROMPT = "Context:\n{context}\n\nQuery: {query}\n\nPlease provide a comprehensive answer based on the context above."
+
+# Seconds past the deadline that steps get to return partial results
+DEADLINE_GRACE = 0.05
+
+# Request types whose identical in-flight duplicates are coalesced
+COALESCED_REQUEST_TYPES = ("rag_query", "enhanced")
+
+class _Flight:
+    def __init__(self, deadline: Optional[float] = None):
+        self.future: Future = Future()
+        self.waiters = 1
+        self.deadline = deadline
+        self.task: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def covers(self, deadline: Optional[float]) -> bool:
+        """The work runs at least as long as a caller with this deadline could wait"""
+        return self.deadline is None or (deadline is not None and deadline <= self.deadline)
+
+class SingleFlight:
+    """
+    Deduplicates identical in-flight work
+    The first caller starts the work as its own task; identical calls that
+    arrive before it finishes wait for the same result. Results are delivered
+    through a concurrent future so callers on other event loops can share it.
+    A caller that is cancelled stops waiting without disturbing the others;
+    the work itself is only cancelled once nobody is waiting for it.
+    The work runs under its first caller's deadline, so a caller only joins
+    a flight whose deadline is no earlier than its own; one with more time
+    starts a new flight, which later identical callers then join.
+    """
+    
+    def __init__(self):
+        self.coalesced = 0
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+    
+    async def run(self, key: str, work: Callable[[], Awaitable[Any]], deadline: Optional[float] = None) -> Tuple[Any, bool]:
+        """Run work() once per key at a time; returns (result, shared_with_earlier_caller)"""
+        with self._lock:
+            flight = self._inflight.get(key)
+            shared = flight is not None and flight.covers(deadline)
+            if shared:
+                flight.waiters += 1
+                self.coalesced += 1
+            else:
+                flight = self._inflight[key] = _Flight(deadline)
+        
+        if not shared:
+            flight.loop = asyncio.get_running_loop()
+            flight.task = asyncio.ensure_future(work())
+            flight.task.add_done_callback(lambda task: self._finish(key, flight, task))
+        
+        try:
+            return await asyncio.shield(asyncio.wrap_future(flight.future)), shared
+        except asyncio.CancelledError:
+            with self._lock:
+                flight.waiters -= 1
+                abandoned = flight.waiters == 0
+                # Later callers start afresh instead of joining work that is being cancelled
+                if abandoned and self._inflight.get(key) is flight:
+                    del self._inflight[key]
+            if abandoned and flight.task is not None:
+                flight.loop.call_soon_threadsafe(flight.task.cancel)
+            raise
+    
+    def _finish(self, key: str, flight: _Flight, task: asyncio.Task):
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+        if task.cancelled():
+            flight.future.cancel()
+        elif task.exception() is not None:
+            flight.future.set_exception(task.exception())
+        else:
+            flight.future.set_result(task.result())
+
+# Concurrent executions allowed per request type before requests queue
+DEFAULT_ADMISSION_LIMITS = {
+    "generate": 4,
+    "rag_query": 8,
+    "tool_call": 8,
+    "multimodal": 2,
+    "enhanced": 4
+}
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed because its type is overloaded"""
+    
+    def __init__(self, request_type: str, reason: str, retry_after: float):
+        super().__init__(f"{request_type} requests are overloaded ({reason}), retry after {retry_after:.0f}s")
+        self.request_type = request_type
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionGate:
+    """
+    Concurrency limit with a bounded FIFO wait queue for one request type
+    Requests are rejected up front when the queue is full or the predicted
+    wait (queue position x EWMA service time / limit) exceeds max_wait.
+    Slots are handed directly to the next waiter, which may be on another
+    event loop, so the gate is shared safely by all request threads.
+    """
+    
+    def __init__(self, request_type: str, limit: int, max_queue: int = 32, max_wait: float = 10.0, alpha: float = 0.2):
+        self.request_type = request_type
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.alpha = alpha
+        self.active = 0
+        self.admitted = 0
+        self.shed = 0
+        self.service_time: Optional[float] = None
+        self._waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+    
+    def predicted_wait(self) -> float:
+        """Expected queueing delay for a request arriving now"""
+        return (len(self._waiters) + 1) / self.limit * (self.service_time or 0.0)
+    
+    def _publish(self):
+        metrics.set_gauge("admission_active", self.active, type=self.request_type)
+        metrics.set_gauge("admission_queue_depth", len(self._waiters), type=self.request_type)
+    
+    def _reject(self, reason: str):
+        self.shed += 1
+        metrics.inc("admission_shed_total", type=self.request_type, reason=reason)
+        raise AdmissionRejected(self.request_type, reason, max(1.0, math.ceil(self.predicted_wait())))
+    
+    async def acquire(self):
+        with self._lock:
+            if self.active < self.limit and not self._waiters:
+                self.active += 1
+                self.admitted += 1
+                self._publish()
+                return
+            if len(self._waiters) >= self.max_queue:
+                self._reject("queue_full")
+            if self.predicted_wait() > self.max_wait:
+                self._reject("deadline")
+            
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+            self._publish()
+        
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = waiter in self._waiters
+                if queued:
+                    self._waiters.remove(waiter)
+                    self._publish()
+            # The slot was already handed to us; pass it on
+            if not queued and waiter[1].done() and not waiter[1].cancelled():
+                self.release()
+            raise
+        
+        with self._lock:
+            self.admitted += 1
+    
+    def release(self, service_time: Optional[float] = None):
+        with self._lock:
+            if service_time is not None:
+                self.service_time = service_time if self.service_time is None else (
+                    self.alpha * service_time + (1 - self.alpha) * self.service_time
+                )
+            if self._waiters:
+                loop, future = self._waiters.popleft()
+                loop.call_soon_threadsafe(self._hand_over, future)
+            else:
+                self.active -= 1
+            self._publish()
+    
+    def _hand_over(self, future: asyncio.Future):
+        """Give a released slot to a waiter (on the waiter's loop)"""
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "shed": self.shed,
+            "predicted_wait": self.predicted_wait()
+        }
+    
+    def get_config(self) -> Dict[str, Any]:
+        """The gate's settings, without the live counters"""
+        return {"limit": self.limit, "max_queue": self.max_queue, "max_wait": self.max_wait}
+
+class RunningStats:
+    """
+    Request aggregates maintained incrementally as responses arrive
+    Lifetime totals, a sliding window over the last `window` responses and an
+    exponentially weighted processing time are all O(1) to update and read
+    """
+    
+    def __init__(self, window: int = 1000, alpha: float = 0.1):
+        self.alpha = alpha
+        self.total = 0
+        self.successes = 0
+        self.total_time = 0.0
+        self.ewma_time: Optional[float] = None
+        self._window: Deque[tuple] = deque(maxlen=window)
+        self._window_successes = 0
+        self._window_time = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, success: bool, processing_time: float):
+        with self._lock:
+            self.total += 1
+            self.successes += success
+            self.total_time += processing_time
+            self.ewma_time = processing_time if self.ewma_time is None else (
+                self.alpha * processing_time + (1 - self.alpha) * self.ewma_time
+            )
+            
+            # Subtract the entry the window is about to evict
+            if len(self._window) == self._window.maxlen:
+                old_success, old_time = self._window[0]
+                self._window_successes -= old_success
+                self._window_time -= old_time
+            self._window.append((success, processing_time))
+            self._window_successes += success
+            self._window_time += processing_time
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            window_count = len(self._window)
+            return {
+                "avg_processing_time": self.total_time / self.total if self.total else 0,
+                "success_rate": self.successes / self.total if self.total else 0,
+                "ewma_processing_time": self.ewma_time or 0,
+                "recent": {
+                    "window": window_count,
+                    "avg_processing_time": self._window_time / window_count if window_count else 0,
+                    "success_rate": self._window_successes / window_count if window_count else 0
+                }
+            }
+
 class LocalAIOrchestrator:
     """
     Local AI Orchestrator
     Provides unified interface for all local AI capabilities
     """
     
-    def __init__(self):
+    def __init__(self, history_capacity: int = 1000, coalesce: bool = True, admission_limits: Optional[Dict[str, int]] = None,
+                 max_queue: int = 32, max_wait: float = 10.0):
         self.is_initialized = False
         self.services_status = {
             "local_ai": False,
             "rag": False,
             "mcp": False
         }
-        self.request_history: List[AIRequest] = []
-        self.response_history: List[AIResponse] = []
+        # Recent history only; lifetime aggregates live in self.stats
+        self.history_capacity = history_capacity
+        self.request_history: Deque[AIRequest] = deque(maxlen=history_capacity)
+        self.response_history: Deque[AIResponse] = deque(maxlen=history_capacity)
+        self.request_count = 0
+        self.stats = RunningStats(window=history_capacity)
+        self.coalesce = coalesce
+        self.single_flight = SingleFlight()
+        self.admission = {
+            request_type: AdmissionGate(request_type, limit, max_queue, max_wait)
+            for request_type, limit in (admission_limits or DEFAULT_ADMISSION_LIMITS).items()
+        }
+        
+        # Single worker so post-response writes are applied in order
+        self._background = ThreadPoolExecutor(max_workers=1, thread_name_prefix="orchestrator-background")
         
         logger.info("🎭 Initializing Local AI Orchestrator")
         self._initialize()
@@ -84,8 +421,20 @@ class LocalAIOrchestrator:
     async def process_request(self, request: AIRequest) -> AIResponse:
         """
         Process an AI request using appropriate services
+        Each request is traced as an ai.request span with a child span per service call
         """
-        start_time = datetime.now()
+        with tracer.span("ai.request", **{"request.type": request.type, "request.id": request.id}) as span:
+            response = await self._process_request(request)
+            span.set_attribute("success", response.success)
+            if response.error:
+                span.set_attribute("error", response.error)
+            if response.metadata.get("coalesced"):
+                span.set_attribute("coalesced", True)
+            return response
+    
+    async def _process_request(self, request: AIRequest) -> AIResponse:
+        """Run a request under its deadline and record the response"""
+        start_time = time.perf_counter()
         
         try:
             if not self.is_initialized:
@@ -99,51 +448,189 @@ class LocalAIOrchestrator:
             
             # Store request
             self.request_history.append(request)
+            self.request_count += 1
             
-            # Route request based on type
-            if request.type == "generate":
-                result = await self._handle_generate_request(request)
-            elif request.type == "rag_query":
-                result = await self._handle_rag_request(request)
-            elif request.type == "tool_call":
-                result = await self._handle_tool_request(request)
-            elif request.type == "multimodal":
-                result = await self._handle_multimodal_request(request)
-            elif request.type == "enhanced":
-                result = await self._handle_enhanced_request(request)
-            else:
-                result = AIResponse(
-                    id=request.id,
-                    success=False,
-                    result=None,
-                    metadata={},
-                    error=f"Unknown request type: {request.type}"
-                )
-            
+            # Every service call below sees the request deadline
+            deadline = request.deadline or deadline_from_timeout(request.parameters.get("timeout_ms"))
+            with deadline_scope(deadline):
+                if expired():
+                    raise DeadlineExceeded("admission")
+                    
+                # Identical in-flight requests share one execution. Steps inside
+                # degrade at the deadline; the grace period lets them return
+                # partial results before the whole request is cancelled
+                key = self._coalescing_key(request)
+                if key is None:
+                    result = await within_deadline(self._admit_and_route(request), "request", grace=DEADLINE_GRACE)
+                else:
+                    result, shared = await within_deadline(self._run_coalesced(key, request), "request", grace=DEADLINE_GRACE)
+                    if shared:
+                        result = replace(result, id=request.id, metadata={**result.metadata, "coalesced": True})
+                        metrics.inc("coalesced_requests_total", type=request.type)
+                        
             # Calculate processing time
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             result.processing_time = processing_time
             
             # Store response
-            self.response_history.append(result)
+            self._record_response(request.type, result)
             
             logger.info(f"🎯 Request processed: {request.type} in {processing_time:.2f}s")
             return result
             
+        except AdmissionRejected:
+            logger.warning(f"🚦 Request shed: {request.type} ({request.id})")
+            raise
         except Exception as e:
-            processing_time = (datetime.now() - start_time).total_seconds()
+            processing_time = time.perf_counter() - start_time
             error_response = AIResponse(
                 id=request.id,
                 success=False,
                 result=None,
-                metadata={},
+                metadata={"deadline_exceeded": isinstance(e, DeadlineExceeded)},
                 error=str(e),
                 processing_time=processing_time
             )
-            self.response_history.append(error_response)
+            self._record_response(request.type, error_response)
+            if isinstance(e, DeadlineExceeded):
+                metrics.inc("deadline_exceeded_total", type=request.type, step=e.step)
             logger.error(f"❌ Request processing failed: {str(e)}")
             return error_response
     
+    async def process_batch(self, requests: List[AIRequest], max_concurrency: int = 8) -> AsyncIterator[AIResponse]:
+        """
+        Process many requests concurrently (at most max_concurrency at a time)
+        Responses are yielded as they complete, not in request order. Query
+        embeddings for all retrieval requests are computed in one batch first.
+        """
+        retrieval_prompts = [
+            request.prompt for request in requests
+            if request.type == "rag_query" or (
+                request.type == "enhanced" and request.parameters.get("use_rag", True)
+                and "retrieval" not in (request.context or {})
+            )
+        ]
+        if retrieval_prompts and self.services_status["rag"]:
+            await rag_service.embed_queries(retrieval_prompts)
+        
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run_one(request: AIRequest) -> AIResponse:
+            async with semaphore:
+                try:
+                    return await self.process_request(request)
+                except AdmissionRejected as e:
+                    return AIResponse(
+                        id=request.id,
+                        success=False,
+                        result=None,
+                        metadata={"rejected": True, "retry_after": e.retry_after},
+                        error=str(e)
+                    )
+        
+        tasks = [asyncio.ensure_future(run_one(request)) for request in requests]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Consumer went away early: stop the remaining work
+            for task in tasks:
+                task.cancel()
+    
+    async def _run_coalesced(self, key: str, request: AIRequest) -> Tuple[AIResponse, bool]:
+        """
+        Share an identical in-flight execution; (response, shared)
+        A shared result that ran out of time (degraded or failed at the
+        deadline) is not handed to a caller that still has time: it runs alone
+        """
+        try:
+            result, shared = await self.single_flight.run(key, lambda: self._admit_and_route(request), current_deadline())
+        except DeadlineExceeded:
+            if expired():
+                raise
+            result, shared = None, True
+        if shared and (result is None or self._ran_out_of_time(result)) and not expired():
+            metrics.inc("coalesced_reruns_total", type=request.type)
+            logger.info(f"🔁 Shared result ran out of time; rerunning {request.type} request {request.id} alone")
+            return await self._admit_and_route(request), False
+        return result, shared
+    
+    @staticmethod
+    def _ran_out_of_time(response: AIResponse) -> bool:
+        return bool(response.metadata.get("degraded") or response.metadata.get("deadline_exceeded"))
+    
+    async def _admit_and_route(self, request: AIRequest) -> AIResponse:
+        """Wait for an admission slot for the request type, then run it"""
+        gate = self.admission.get(request.type)
+        if gate is None:
+            return await self._route_request(request)
+        
+        with tracer.span("admission.wait", **{"request.type": request.type}):
+            await gate.acquire()
+        start = time.perf_counter()
+        try:
+            return await self._route_request(request)
+        finally:
+            gate.release(time.perf_counter() - start)
+    
+    async def _route_request(self, request: AIRequest) -> AIResponse:
+        """Route request based on type"""
+        if request.type == "generate":
+            return await self._handle_generate_request(request)
+        elif request.type == "rag_query":
+            return await self._handle_rag_request(request)
+        elif request.type == "tool_call":
+            return await self._handle_tool_request(request)
+        elif request.type == "multimodal":
+            return await self._handle_multimodal_request(request)
+        elif request.type == "enhanced":
+            return await self._handle_enhanced_request(request)
+        return AIResponse(
+            id=request.id,
+            success=False,
+            result=None,
+            metadata={},
+            error=f"Unknown request type: {request.type}"
+        )
+    
+    def _coalescing_key(self, request: AIRequest) -> Optional[str]:
+        """Normalized identity of a request whose result can be shared, or None"""
+        if not self.coalesce or request.type not in COALESCED_REQUEST_TYPES:
+            return None
+        prompt = " ".join(request.prompt.split()).lower()
+        parameters = {key: value for key, value in request.parameters.items() if key != "timeout_ms"}
+        return json.dumps([request.type, prompt, parameters, self._context_digest(request.context)], sort_keys=True, default=str)
+    
+    @staticmethod
+    def _context_digest(context: Optional[Dict[str, Any]]) -> Optional[str]:
+        """
+        Short stable digest of a request's context for the coalescing key
+        A shared retrieval is identified by its sources' ids and scores, so
+        their text and the packing report are never serialized for the key
+        """
+        if not context:
+            return None
+        retrieval = context.get("retrieval")
+        if isinstance(retrieval, dict):
+            sources = [(source.get("id"), source.get("score")) for source in retrieval.get("sources", [])]
+            context = {**context, "retrieval": [retrieval.get("retrieval_query"), retrieval.get("success"), sources]}
+        return hashlib.blake2b(json.dumps(context, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+    
+    def _record_response(self, request_type: str, response: AIResponse):
+        """Keep the response in recent history and update running aggregates and metrics"""
+        self.response_history.append(response)
+        self.stats.record(response.success, response.processing_time)
+        metrics.observe("request_duration_seconds", response.processing_time, type=request_type)
+        metrics.inc("requests_total", type=request_type, outcome="success" if response.success else "error")
+    
+    @staticmethod
+    def _observe_rag_timings(result: Dict[str, Any]):
+        """Record the RAG service's per-stage timings as pipeline steps"""
+        timings = result.get("timings") or {}
+        for stage, step in (("retrieval_ms", "retrieval"), ("rerank_ms", "rerank"), ("generation_ms", "rag_answer")):
+            if stage in timings:
+                metrics.observe("step_duration_seconds", timings[stage] / 1000, step=step)
+    
     async def _handle_generate_request(self, request: AIRequest) -> AIResponse:
         """Handle text generation request"""
         try:
@@ -162,12 +649,13 @@ class LocalAIOrchestrator:
             temperature = request.parameters.get("temperature", 0.7)
             
             # Generate text
-            result = await generate_text(
-                prompt=request.prompt,
-                model=model,
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
+            with tracer.span("local_ai.generate_text", model=model), metrics.timer("step_duration_seconds", step="generation"):
+                result = await generate_text(
+                    prompt=request.prompt,
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
             
             return AIResponse(
                 id=request.id,
@@ -204,9 +692,16 @@ class LocalAIOrchestrator:
             
             # Extract parameters
             top_k = request.parameters.get("top_k", 5)
+            rerank_options = {
+                key: request.parameters[key]
+                for key in ("rerank", "candidate_k", "rerank_batch_size", "rerank_budget_ms", "max_context_tokens")
+                if key in request.parameters
+            }
             
             # Query RAG
-            result = await query_rag(request.prompt, top_k)
+            with tracer.span("rag.query", top_k=top_k):
+                result = await query_rag(request.prompt, top_k, **rerank_options)
+            self._observe_rag_timings(result)
             
             return AIResponse(
                 id=request.id,
@@ -216,6 +711,10 @@ class LocalAIOrchestrator:
                     "top_k": top_k,
                     "sources_count": len(result.get("sources", [])),
                     "confidence": result.get("confidence", 0.0),
+                    "rerank": result.get("rerank", "disabled"),
+                    "timings": result.get("timings", {}),
+                    "degraded": result.get("degraded", False),
+                    "context": result.get("context", {}),
                     "service": "rag"
                 },
                 error=result.get("error")
@@ -256,7 +755,8 @@ class LocalAIOrchestrator:
                 )
             
             # Call MCP tool
-            result = await call_mcp_tool(tool_name, tool_params)
+            with tracer.span("mcp.call_tool", tool=tool_name), metrics.timer("step_duration_seconds", step="tool_call"):
+                result = await call_mcp_tool(tool_name, tool_params)
             
             return AIResponse(
                 id=request.id,
@@ -315,60 +815,127 @@ class LocalAIOrchestrator:
             )
     
     async def _handle_enhanced_request(self, request: AIRequest) -> AIResponse:
-        """Handle enhanced request combining multiple services"""
+        """
+        Handle enhanced request combining multiple services
+        RAG retrieval and MCP context lookup run concurrently, generation waits
+        for both, and context storage is deferred until after the response.
+        A query_rag result in request.context["retrieval"] (e.g. shared by
+        related requests of a batch) is used instead of querying RAG again
+        """
         try:
+            query = request.prompt
+            use_rag = request.parameters.get("use_rag", True)
+            max_tokens = request.parameters.get("max_tokens", 800)
+            shared_retrieval = (request.context or {}).get("retrieval")
+            context_report: Dict[str, Any] = {}
+            
+            async def rag_query(outputs):
+                if shared_retrieval is not None:
+                    return shared_retrieval
+                with tracer.span("rag.query", top_k=3):
+                    # Whole passages: the context packer, not a preview cut-off, decides what fits
+                    result = await query_rag(query, 3, full_content=True)
+                self._observe_rag_timings(result)
+                return result
+            
+            async def context_lookup(outputs):
+                with tracer.span("mcp.call_tool", tool="search_documents"), metrics.timer("step_duration_seconds", step="tool_call"):
+                    # Only stored contexts sharing most of the prompt's words are worth packing
+                    return await call_mcp_tool("search_documents", {"query": query, "limit": 3, "min_score": 0.5})
+            
+            async def text_generation(outputs):
+                if not self.services_status["local_ai"]:
+                    return None
+                
+                # Enhance prompt with RAG context and related stored contexts,
+                # packed by relevance into what the context window leaves after the answer
+                candidates = []
+                rag_result = outputs.get("rag_query")
+                if rag_result and rag_result["success"]:
+                    candidates.extend((source["content"], source.get("score", 0.0)) for source in rag_result["sources"])
+                lookup = outputs.get("context_lookup")
+                if lookup and lookup["success"]:
+                    # Stored contexts are unscored keyword matches; rank them after retrieved sources
+                    candidates.extend((match.get("content_preview", ""), -1.0) for match in lookup["result"].get("results", []))
+                
+                prompt = query
+                if use_rag and candidates:
+                    budget = context_budget(ENHANCED_PROMPT.format(context="", query=query), max_tokens,
+                                            limit=request.parameters.get("max_context_tokens"))
+                    packed = pack_context(candidates, budget)
+                    context_report.update(packed.report())
+                    if packed.passages:
+                        prompt = ENHANCED_PROMPT.format(context=packed.text, query=query)
+                
+                with tracer.span("local_ai.generate_text", prompt_chars=len(prompt)), metrics.timer("step_duration_seconds", step="generation"):
+                    return await generate_text(
+                        prompt=prompt,
+                        max_tokens=max_tokens,
+                        temperature=request.parameters.get("temperature", 0.7)
+                    )
+                    
+            steps = [PipelineStep("text_generation", text_generation, depends_on=("rag_query", "context_lookup"), metric="generation")]
+            if use_rag:
+                steps += [PipelineStep("rag_query", rag_query), PipelineStep("context_lookup", context_lookup, metric="tool_call")]
+                
+            outputs, timings = await run_pipeline(steps)
+            
             # Enhanced workflow: RAG + Local AI + MCP tools
             enhanced_result = {
                 "steps": [],
                 "final_result": None,
-                "combined_metadata": {}
+                "combined_metadata": {},
+                "degraded": False
             }
             
-            # Step 1: RAG query if context needed
-            if request.parameters.get("use_rag", True):
-                rag_result = await query_rag(request.prompt, 3)
+            if use_rag:
+                rag_result = outputs.get("rag_query") or {}
                 enhanced_result["steps"].append({
                     "step": "rag_query",
-                    "success": rag_result["success"],
-                    "sources": len(rag_result.get("sources", []))
+                    "success": rag_result.get("success", False),
+                    "sources": len(rag_result.get("sources", [])),
+                    **timings["rag_query"]
                 })
-                
-                if rag_result["success"]:
-                    # Enhance prompt with RAG context
-                    context = "\n".join([source["content"] for source in rag_result["sources"][:2]])
-                    enhanced_prompt = f"Context:\n{context}\n\nQuery: {request.prompt}\n\nPlease provide a comprehensive answer based on the context above."
-                    request.prompt = enhanced_prompt
-            
-            # Step 2: Generate response with local AI
-            if self.services_status["local_ai"]:
-                ai_result = await generate_text(
-                    prompt=request.prompt,
-                    max_tokens=request.parameters.get("max_tokens", 800),
-                    temperature=request.parameters.get("temperature", 0.7)
-                )
+                lookup = outputs.get("context_lookup") or {}
+                enhanced_result["steps"].append({
+                    "step": "context_lookup",
+                    "success": lookup.get("success", False),
+                    "matches": (lookup.get("result") or {}).get("total_found", 0),
+                    **timings["context_lookup"]
+                })
+            
+            ai_result = outputs.get("text_generation")
+            if ai_result is not None:
                 enhanced_result["steps"].append({
                     "step": "text_generation",
                     "success": ai_result["success"],
-                    "tokens": ai_result.get("tokens_used", 0)
+                    "tokens": ai_result.get("tokens_used", 0),
+                    "context": context_report,
+                    **timings["text_generation"]
                 })
                 
                 if ai_result["success"]:
                     enhanced_result["final_result"] = ai_result["text"]
-            
-            # Step 3: Add to context for future use
-            if enhanced_result["final_result"]:
-                context_id = add_mcp_context(
-                    f"Enhanced Query Result",
-                    {
-                        "query": request.prompt,
-                        "result": enhanced_result["final_result"],
-                        "timestamp": datetime.now().isoformat()
-                    },
-                    {"type": "enhanced_query", "query_id": request.id}
+            elif "skipped" in timings["text_generation"]:
+                enhanced_result["steps"].append({"step": "text_generation", "success": False, **timings["text_generation"]})
+                
+            # Out of time for generation: fall back to the RAG answer
+            generation_timed_out = "skipped" in timings["text_generation"] or (
+                ai_result is not None and (ai_result.get("metadata") or {}).get("deadline_exceeded")
+            )
+            rag_answer = (outputs.get("rag_query") or {}).get("answer")
+            if not enhanced_result["final_result"] and generation_timed_out and rag_answer:
+                enhanced_result["final_result"] = rag_answer
+                enhanced_result["degraded"] = True
+                
+            # Add to context for future use, after the response has been returned
+            if enhanced_result["final_result"] and not enhanced_result["degraded"]:
+                self._run_in_background(
+                    self._store_enhanced_context, request.id, query, enhanced_result["final_result"]
                 )
                 enhanced_result["steps"].append({
                     "step": "context_storage",
-                    "context_id": context_id
+                    "background": True
                 })
             
             return AIResponse(
@@ -378,7 +945,9 @@ class LocalAIOrchestrator:
                 metadata={
                     "service": "enhanced",
                     "steps_completed": len(enhanced_result["steps"]),
-                    "services_used": ["rag", "local_ai", "mcp"]
+                    "services_used": ["rag", "local_ai", "mcp"],
+                    "degraded": enhanced_result["degraded"],
+                    "deadline_exceeded": generation_timed_out and not enhanced_result["final_result"]
                 }
             )
             
@@ -391,15 +960,62 @@ class LocalAIOrchestrator:
                 error=str(e)
             )
     
-    def get_status(self) -> Dict[str, Any]:
-        """Get orchestrator status"""
+    @staticmethod
+    def _store_enhanced_context(request_id: str, query: str, result: str) -> str:
+        """Persist an enhanced query result as MCP context (runs off the request path)"""
+        with tracer.span("mcp.add_context", background=True), metrics.timer("step_duration_seconds", step="persistence"):
+            return add_mcp_context(
+                f"Enhanced Query Result",
+                {
+                    "query": query,
+                    "result": result,
+                    "timestamp": datetime.now().isoformat()
+                },
+                {"type": "enhanced_query", "query_id": request_id}
+            )
+    
+    def _run_in_background(self, fn: Callable, *args) -> Future:
+        """Run post-response work on the background worker; failures are logged"""
+        def log_failure(future: Future):
+            if not future.cancelled() and future.exception():
+                logger.error(f"❌ Background task {fn.__name__} failed: {future.exception()}")
+        
+        # Carry the caller's context so background spans join the request trace
+        future = self._background.submit(contextvars.copy_context().run, fn, *args)
+        future.add_done_callback(log_failure)
+        return future
+    
+    def shutdown(self, wait: bool = True):
+        """Finish pending background work"""
+        self._background.shutdown(wait=wait)
+    
+    @property
+    def state_version(self) -> Tuple:
+        """
+        Cheap token that changes whenever get_status(live=False) would
+        Requests do not count as changes, so traffic never rebuilds the status
+        snapshots; their counters are exported as metrics instead
+        """
+        return (self.is_initialized, tuple(self.services_status.values()))
+    
+    def get_status(self, live: bool = True) -> Dict[str, Any]:
+        """Get orchestrator status; live=False leaves out the per-request counters"""
+        if not live:
+            return {
+                "initialized": self.is_initialized,
+                "services": self.services_status,
+                "history_capacity": self.history_capacity,
+                "admission": {request_type: gate.get_config() for request_type, gate in self.admission.items()}
+            }
         return {
             "initialized": self.is_initialized,
             "services": self.services_status,
-            "request_count": len(self.request_history),
-            "response_count": len(self.response_history),
-            "avg_processing_time": sum(r.processing_time for r in self.response_history) / len(self.response_history) if self.response_history else 0,
-            "success_rate": sum(1 for r in self.response_history if r.success) / len(self.response_history) if self.response_history else 0
+            "request_count": self.request_count,
+            "response_count": self.stats.total,
+            "history_capacity": self.history_capacity,
+            "coalesced_requests": self.single_flight.coalesced,
+            "admission": {request_type: gate.get_status() for request_type, gate in self.admission.items()},
+            **self.stats.snapshot()
         }
     
     async def setup_sample_data(self):
@@ -422,6 +1038,7 @@ class LocalAIOrchestrator:
 
 # Global orchestrator instance
 orchestrator = LocalAIOrchestrator()
+atexit.register(orchestrator.shutdown)
 
 # Convenience functions
 async def generate_ai_response(prompt: str, model: str = "default", **kwargs) -> Dict[str, Any]:
@@ -462,18 +1079,22 @@ async def enhanced_ai_query(query: str, **kwargs) -> Dict[str, Any]:
         parameters=kwargs
     )
     
-    response = await orchestrator.process_request(request)
+    return enhanced_response_summary(await orchestrator.process_request(request))
+
+def enhanced_response_summary(response: AIResponse) -> Dict[str, Any]:
+    """Client-facing view of an enhanced request's response"""
     return {
         "success": response.success,
         "result": response.result.get("final_result") if response.success else None,
         "steps": response.result.get("steps", []) if response.success else [],
+        "degraded": response.metadata.get("degraded", False),
         "error": response.error,
         "processing_time": response.processing_time
     }
 
-def get_orchestrator_status() -> Dict[str, Any]:
+def get_orchestrator_status(live: bool = True) -> Dict[str, Any]:
     """Get orchestrator status"""
-    return orchestrator.get_status()
+    return orchestrator.get_status(live)
 
 if __name__ == "__main__":
     # Test the orchestrator
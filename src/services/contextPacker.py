@@ -0,0 +1,170 @@
+"""
+Context Packer
+Fits retrieved passages into a prompt's token budget: most relevant first,
+near-duplicates dropped, with a report of the tokens spent and saved
+"""
+
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Tuple, FrozenSet
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Context window of the local model, in tokens
+MODEL_CONTEXT_WINDOW = int(os.environ.get("LOCAL_AI_CONTEXT_WINDOW", "4096"))
+
+# Words, numbers and punctuation; long words cost about one token per 4 characters
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+_SHINGLE_SIZE = 3
+
+# Token counts of recent passages, keyed by a digest so the cache never holds their text
+_TOKEN_CACHE_ENTRIES = 8192
+_token_cache: "OrderedDict[bytes, int]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+def _count_tokens(text: str) -> int:
+    return sum(max(1, (len(piece) + 3) // 4) for piece in _TOKEN_PATTERN.findall(text))
+
+def count_tokens(text: str) -> int:
+    """Approximate token count of text (cached, passages recur across requests)"""
+    key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+    with _token_cache_lock:
+        tokens = _token_cache.get(key)
+        if tokens is not None:
+            _token_cache.move_to_end(key)
+            return tokens
+    tokens = _count_tokens(text)
+    with _token_cache_lock:
+        _token_cache[key] = tokens
+        if len(_token_cache) > _TOKEN_CACHE_ENTRIES:
+            _token_cache.popitem(last=False)
+    return tokens
+
+@lru_cache(maxsize=8192)
+def _shingles(text: str) -> FrozenSet[Tuple[str, ...]]:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < _SHINGLE_SIZE:
+        return frozenset([tuple(words)]) if words else frozenset()
+    return frozenset(tuple(words[i:i + _SHINGLE_SIZE]) for i in range(len(words) - _SHINGLE_SIZE + 1))
+
+def _similarity(a: FrozenSet, b: FrozenSet) -> float:
+    """Jaccard similarity of two shingle sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def _truncate(text: str, budget: int) -> str:
+    """
+    Longest word-boundary prefix of text that fits in budget tokens
+    Tokens never span whitespace, so a prefix costs the sum of its words
+    and is counted in one pass without caching the prefixes
+    """
+    words = text.split()
+    used = 0
+    for count, word in enumerate(words):
+        used += _count_tokens(word)
+        if used > budget:
+            return " ".join(words[:count])
+    return " ".join(words)
+
+@dataclass
+class PackedContext:
+    text: str
+    passages: List[str]
+    tokens_used: int  # including passage labels and separators
+    tokens_available: int  # tokens of all candidate passages
+    budget: int
+    overhead_tokens: int = 0
+    dropped_duplicates: int = 0
+    dropped_over_budget: int = 0
+    truncated: int = 0
+    sources: List[int] = field(default_factory=list)  # indexes of the packed candidates
+    
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_available - (self.tokens_used - self.overhead_tokens)
+    
+    def report(self) -> Dict[str, Any]:
+        return {
+            "budget": self.budget,
+            "tokens_used": self.tokens_used,
+            "tokens_saved": self.tokens_saved,
+            "passages": len(self.passages),
+            "dropped_duplicates": self.dropped_duplicates,
+            "dropped_over_budget": self.dropped_over_budget,
+            "truncated": self.truncated
+        }
+
+def context_budget(prompt: str = "", max_tokens: int = 500, context_window: int = MODEL_CONTEXT_WINDOW,
+                   limit: Optional[int] = None) -> int:
+    """Tokens left for context once the prompt and the generated answer are accounted for"""
+    budget = context_window - max_tokens - count_tokens(prompt)
+    if limit is not None:
+        budget = min(budget, limit)
+    return max(0, budget)
+
+def pack_context(
+    candidates: List[Tuple[str, float]],
+    budget: int,
+    duplicate_threshold: float = 0.7,
+    min_passage_tokens: int = 32,
+    separator: str = "\n\n",
+    label: Optional[str] = None
+) -> PackedContext:
+    """
+    Greedily pack (text, relevance) candidates into a token budget
+    Candidates are taken in order of relevance; one that mostly repeats an
+    already packed passage is dropped, and one that does not fit is cut to
+    the remaining budget if at least min_passage_tokens are left, otherwise
+    skipped so smaller, less relevant passages can still fill the gap.
+    label, if given, is formatted with the passage number as a heading
+    """
+    order = sorted(range(len(candidates)), key=lambda i: candidates[i][1], reverse=True)
+    separator_tokens = count_tokens(separator)
+    packed = PackedContext(
+        text="",
+        passages=[],
+        tokens_used=0,
+        tokens_available=sum(count_tokens(text) for text, _ in candidates),
+        budget=budget
+    )
+    packed_shingles: List[FrozenSet] = []
+    
+    for index in order:
+        text = candidates[index][0].strip()
+        if not text:
+            continue
+            
+        shingles = _shingles(text)
+        if any(_similarity(shingles, other) >= duplicate_threshold for other in packed_shingles):
+            packed.dropped_duplicates += 1
+            continue
+            
+        heading = label.format(len(packed.passages) + 1) + "\n" if label else ""
+        overhead = count_tokens(heading) + (separator_tokens if packed.passages else 0)
+        left = budget - packed.tokens_used - overhead
+        tokens = count_tokens(text)
+        if tokens > left:
+            if left < min_passage_tokens:
+                packed.dropped_over_budget += 1
+                continue
+            text = _truncate(text, left)
+            tokens = count_tokens(text)
+            packed.truncated += 1
+            
+        packed.passages.append(heading + text)
+        packed.sources.append(index)
+        packed_shingles.append(shingles)
+        packed.tokens_used += tokens + overhead
+        packed.overhead_tokens += overhead
+        
+    packed.text = separator.join(packed.passages)
+    return packed
@@ -0,0 +1,227 @@
+"""
+Directory Crawler
+Mirrors content directories into the RAG store. Files are parsed in a
+process pool; a (path, mtime, size, hash) manifest lets re-crawls skip
+unchanged files and replace or remove the documents of changed and
+deleted ones
+"""
+
+import os
+import time
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Iterator
+import logging
+
+try:
+    from .ragService import rag_service, LocalRAGService
+    from .jsonCodec import dump_file, load_file
+    from .documentParser import parse_file, SUPPORTED_EXTENSIONS, INGEST_CHUNK_CHARS
+except ImportError:
+    # Handle relative imports when running as script
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    
+    from ragService import rag_service, LocalRAGService
+    from jsonCodec import dump_file, load_file
+    from documentParser import parse_file, SUPPORTED_EXTENSIONS, INGEST_CHUNK_CHARS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Directories never descended into (hidden directories are skipped as well)
+EXCLUDED_DIRS = {"node_modules", "__pycache__", "dist", "build", "venv"}
+
+# Below this many files to parse, the default thread executor beats starting worker processes
+MIN_POOL_FILES = 8
+
+@dataclass
+class CrawlReport:
+    files_seen: int = 0
+    unchanged: int = 0  # skipped on mtime and size
+    unchanged_content: int = 0  # touched, but the same content hash
+    added: int = 0
+    changed: int = 0
+    deleted: int = 0
+    chunks_added: int = 0
+    documents_removed: int = 0
+    errors: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0
+    
+    @property
+    def files_per_second(self) -> float:
+        return self.files_seen / self.elapsed if self.elapsed else 0.0
+    
+    @property
+    def skip_rate(self) -> float:
+        return (self.unchanged + self.unchanged_content) / self.files_seen if self.files_seen else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "files_seen": self.files_seen,
+            "unchanged": self.unchanged,
+            "unchanged_content": self.unchanged_content,
+            "added": self.added,
+            "changed": self.changed,
+            "deleted": self.deleted,
+            "chunks_added": self.chunks_added,
+            "documents_removed": self.documents_removed,
+            "errors": self.errors,
+            "elapsed_s": self.elapsed,
+            "files_per_s": self.files_per_second,
+            "skip_rate": self.skip_rate
+        }
+
+class DirectoryCrawler:
+    """
+    Incremental directory ingestion into a RAG service
+    The manifest maps each crawled file to its mtime, size, content hash and
+    the ids of the documents made from it, and is saved after every crawl.
+    """
+    
+    def __init__(self, rag: Optional[LocalRAGService] = None, manifest_path: Optional[str] = None,
+                 workers: Optional[int] = None, chunk_chars: int = INGEST_CHUNK_CHARS):
+        self.rag = rag or rag_service
+        self.manifest_path = Path(manifest_path) if manifest_path else self.rag.storage_path / "crawl_manifest.json"
+        self.workers = workers or min(8, os.cpu_count() or 1)
+        self.chunk_chars = chunk_chars
+        self.manifest: Dict[str, Dict[str, Any]] = load_file(self.manifest_path) if self.manifest_path.exists() else {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: the workers only need the parser, not this process's threads and services
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+    
+    @staticmethod
+    def iter_files(roots: Iterable[str]) -> Iterator[str]:
+        """Supported files under the roots (roots may also be files)"""
+        for root in roots:
+            root = os.path.abspath(root)
+            if os.path.isfile(root):
+                yield root
+                continue
+            for directory, subdirectories, files in os.walk(root):
+                subdirectories[:] = sorted(d for d in subdirectories if not d.startswith(".") and d not in EXCLUDED_DIRS)
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                        yield os.path.join(directory, name)
+    
+    async def crawl(self, roots: List[str]) -> CrawlReport:
+        """Bring the store in line with the files under roots"""
+        start = time.perf_counter()
+        report = CrawlReport()
+        roots = [os.path.abspath(root) for root in roots]
+        seen = set()
+        to_parse: Dict[str, os.stat_result] = {}
+        
+        for path in self.iter_files(roots):
+            seen.add(path)
+            report.files_seen += 1
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                report.errors[path] = str(e)
+                continue
+            entry = self.manifest.get(path)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                report.unchanged += 1
+            else:
+                to_parse[path] = stat
+                
+        await self._parse_and_index(to_parse, report)
+        
+        # Files that were crawled under these roots before but are gone now
+        for path in [path for path in self.manifest if path not in seen and self._under(path, roots)]:
+            report.documents_removed += await self._remove(path)
+            report.deleted += 1
+            
+        if report.added or report.changed or report.deleted:
+            await asyncio.to_thread(self.rag.persist)
+        await asyncio.to_thread(dump_file, self.manifest, self.manifest_path)
+        
+        report.elapsed = time.perf_counter() - start
+        logger.info(
+            f"🕷️ Crawled {report.files_seen} files in {report.elapsed:.2f}s ({report.files_per_second:.0f} files/s, "
+            f"{report.skip_rate:.0%} skipped): {report.added} added, {report.changed} changed, {report.deleted} deleted"
+        )
+        return report
+    
+    async def _parse_and_index(self, to_parse: Dict[str, os.stat_result], report: CrawlReport):
+        if not to_parse:
+            return
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool() if len(to_parse) >= MIN_POOL_FILES else None
+        
+        async def parse(path: str):
+            try:
+                return path, await loop.run_in_executor(pool, parse_file, path, (self.manifest.get(path) or {}).get("hash"), self.chunk_chars), None
+            except BrokenProcessPool as e:
+                # A worker died; start a fresh pool on the next crawl
+                self._pool = None
+                return path, None, e
+            except Exception as e:
+                return path, None, e
+                
+        for next_done in asyncio.as_completed([parse(path) for path in to_parse]):
+            path, parsed, error = await next_done
+            if error is not None:
+                logger.warning(f"⚠️ Could not parse {path}: {str(error)}")
+                report.errors[path] = str(error)
+                continue
+            await self._index(parsed, to_parse[path], report)
+    
+    async def _index(self, parsed: Dict[str, Any], stat: os.stat_result, report: CrawlReport):
+        path = parsed["path"]
+        previous = self.manifest.get(path)
+        entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "hash": parsed["hash"]}
+        if parsed["unchanged"]:
+            report.unchanged_content += 1
+            self.manifest[path] = {**previous, **entry}
+            return
+            
+        if previous:
+            report.documents_removed += await self._remove(path)
+            report.changed += 1
+        else:
+            report.added += 1
+        doc_ids = await self.rag.add_documents(parsed["chunks"], persist=False) if parsed["chunks"] else []
+        report.chunks_added += len(doc_ids)
+        self.manifest[path] = {**entry, "doc_ids": doc_ids}
+    
+    async def _remove(self, path: str) -> int:
+        """Drop a file's manifest entry and its documents that no other file shares"""
+        entry = self.manifest.pop(path, None) or {}
+        shared = {doc_id for other in self.manifest.values() for doc_id in other.get("doc_ids", [])}
+        return await self.rag.delete_documents([doc_id for doc_id in entry.get("doc_ids", []) if doc_id not in shared], persist=False)
+    
+    @staticmethod
+    def _under(path: str, roots: List[str]) -> bool:
+        return any(path == root or path.startswith(root.rstrip(os.sep) + os.sep) for root in roots)
+    
+    async def watch(self, roots: List[str], interval: float = 5.0, callback=None):
+        """Re-crawl every interval seconds until cancelled (unchanged files cost one stat each)"""
+        while True:
+            report = await self.crawl(roots)
+            if callback is not None:
+                callback(report)
+            await asyncio.sleep(interval)
+    
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+async def crawl_directories(roots: List[str], **kwargs) -> Dict[str, Any]:
+    """Crawl directories into the RAG knowledge base once"""
+    crawler = DirectoryCrawler(**kwargs)
+    try:
+        return (await crawler.crawl(roots)).to_dict()
+    finally:
+        crawler.close()
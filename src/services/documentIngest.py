@@ -0,0 +1,184 @@
+"""
+Document Ingest
+Streaming ingestion into the RAG store: uploaded text, markdown or NDJSON is
+decoded, chunked and embedded in batches as it arrives, so memory is bounded
+by the chunk and batch size rather than the size of the upload
+"""
+
+import os
+import time
+import codecs
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+
+try:
+    from .ragService import rag_service, LocalRAGService
+    from .jsonCodec import loads
+    from .documentParser import TextChunker, chunk_text, INGEST_CHUNK_CHARS
+except ImportError:
+    # Handle relative imports when running as script
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    
+    from ragService import rag_service, LocalRAGService
+    from jsonCodec import loads
+    from documentParser import TextChunker, chunk_text, INGEST_CHUNK_CHARS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Largest accepted upload, in bytes
+MAX_INGEST_BYTES = int(os.environ.get("AI_INGEST_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Longest accepted NDJSON line, in bytes; a record is buffered whole until its line ends
+MAX_RECORD_BYTES = int(os.environ.get("AI_INGEST_MAX_RECORD_BYTES", str(8 * 1024 * 1024)))
+
+# Chunks embedded per batch
+INGEST_BATCH_SIZE = int(os.environ.get("AI_INGEST_BATCH_SIZE", "32"))
+
+class IngestTooLarge(Exception):
+    """Upload (or one of its NDJSON records) exceeded the size ceiling"""
+    
+    def __init__(self, limit: int, what: str = "Upload"):
+        super().__init__(f"{what} exceeds the {limit} byte limit")
+        self.limit = limit
+
+@dataclass
+class IngestReport:
+    source: str
+    format: str
+    bytes_received: int = 0
+    documents: int = 0  # NDJSON records, or 1 for a text upload
+    chunks: int = 0
+    batches: int = 0
+    skipped: int = 0  # NDJSON records without string content or with non-object metadata
+    elapsed: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "format": self.format,
+            "bytes_received": self.bytes_received,
+            "documents": self.documents,
+            "chunks": self.chunks,
+            "batches": self.batches,
+            "skipped": self.skipped,
+            "elapsed_s": self.elapsed,
+            "mb_per_s": self.bytes_received / self.elapsed / 1e6 if self.elapsed else 0.0
+        }
+
+class StreamingIngester:
+    """
+    Incremental ingestion of one upload
+    feed() each block as it arrives and finish() at the end. format is
+    "text" (plain text or markdown, one document) or "ndjson" (one
+    {"content", "metadata"} object per line, each chunked separately;
+    a record is held whole until its line ends, up to max_record_bytes).
+    """
+    
+    def __init__(self, format: str = "text", source: str = "upload", metadata: Optional[Dict[str, Any]] = None,
+                 rag: Optional[LocalRAGService] = None, max_bytes: int = MAX_INGEST_BYTES,
+                 max_record_bytes: int = MAX_RECORD_BYTES, chunk_chars: int = INGEST_CHUNK_CHARS,
+                 batch_size: int = INGEST_BATCH_SIZE):
+        if format not in ("text", "ndjson"):
+            raise ValueError(f"Unsupported ingest format: {format}")
+        self.format = format
+        self.source = source
+        self.metadata = metadata or {}
+        self.rag = rag or rag_service
+        self.max_bytes = max_bytes
+        self.max_record_bytes = max_record_bytes
+        self.chunk_chars = chunk_chars
+        self.batch_size = batch_size
+        self.report = IngestReport(source=source, format=format)
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._chunker = TextChunker(chunk_chars)
+        self._line = ""
+        self._pending: List[Tuple[str, Dict[str, Any]]] = []
+        self._start = time.perf_counter()
+        self._closed = False
+    
+    async def feed(self, data: bytes):
+        """Add the next block of the upload"""
+        self.report.bytes_received += len(data)
+        if self.report.bytes_received > self.max_bytes:
+            raise IngestTooLarge(self.max_bytes)
+        text = self._decoder.decode(data)
+        if self.format == "text":
+            self._queue(self._chunker.feed(text), self.metadata)
+        else:
+            *lines, self._line = (self._line + text).split("\n")
+            self._check_record(self._line)
+            for line in lines:
+                self._parse_record(line)
+        await self._flush(self.batch_size)
+    
+    async def finish(self) -> IngestReport:
+        """Ingest what is left and persist the store"""
+        try:
+            text = self._decoder.decode(b"", final=True)
+            if self.format == "text":
+                self._queue(self._chunker.feed(text) + self._chunker.finish(), self.metadata)
+                self.report.documents = 1 if self.report.chunks else 0
+            else:
+                self._parse_record(self._line + text)
+                self._line = ""
+            await self._flush(1)
+        finally:
+            await self.aclose()
+        logger.info(f"📥 Ingested {self.report.source}: {self.report.chunks} chunks from {self.report.bytes_received} bytes in {self.report.elapsed:.2f}s")
+        return self.report
+    
+    def close(self):
+        """Persist whatever was added, e.g. after a failed or aborted upload"""
+        if self._closed:
+            return
+        self._closed = True
+        if self.report.batches:
+            self.rag.persist()
+        self.report.elapsed = time.perf_counter() - self._start
+    
+    async def aclose(self):
+        """close() for event loop callers: the store is rewritten in a worker thread"""
+        await asyncio.to_thread(self.close)
+    
+    def _check_record(self, line: str):
+        """IngestTooLarge once a (possibly unfinished) NDJSON line passes max_record_bytes"""
+        # A character is at most 4 bytes in UTF-8, so short lines are never encoded
+        if len(line) * 4 > self.max_record_bytes and len(line.encode()) > self.max_record_bytes:
+            raise IngestTooLarge(self.max_record_bytes, "NDJSON record")
+    
+    def _parse_record(self, line: str):
+        self._check_record(line)
+        line = line.strip()
+        if not line:
+            return
+        record = loads(line)
+        content = record.get("content") if isinstance(record, dict) else None
+        record_metadata = record.get("metadata") if isinstance(record, dict) else None
+        if not content or not isinstance(content, str) or not isinstance(record_metadata, (dict, type(None))):
+            self.report.skipped += 1
+            return
+        self.report.documents += 1
+        metadata = {**self.metadata, **(record_metadata or {})}
+        self._queue(chunk_text(content, self.chunk_chars), metadata)
+    
+    def _queue(self, chunks: List[str], metadata: Dict[str, Any]):
+        for chunk in chunks:
+            self._pending.append((chunk, {**metadata, "source": self.source, "chunk": self.report.chunks}))
+            self.report.chunks += 1
+    
+    async def _flush(self, minimum: int):
+        """Embed and store pending chunks in batches while at least `minimum` are waiting"""
+        while self._pending and len(self._pending) >= minimum:
+            batch, self._pending = self._pending[:self.batch_size], self._pending[self.batch_size:]
+            await self.rag.add_documents(batch, persist=False)
+            self.report.batches += 1
+
+def ingest_format(content_type: Optional[str]) -> str:
+    """Ingest format for a request Content-Type (NDJSON, otherwise text or markdown)"""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return "ndjson" if media_type in ("application/x-ndjson", "application/jsonl", "application/ndjson") else "text"
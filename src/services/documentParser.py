@@ -0,0 +1,120 @@
+"""
+Document Parser
+Turns text, markdown and exported blog JSON into chunks for the RAG store.
+Kept free of service imports so parsing worker processes start cheaply
+"""
+
+import os
+import hashlib
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    from .jsonCodec import loads
+except ImportError:
+    # Handle relative imports when running as script
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    
+    from jsonCodec import loads
+
+# Target chunk size in characters
+INGEST_CHUNK_CHARS = int(os.environ.get("AI_INGEST_CHUNK_CHARS", "2000"))
+
+# File types the parser understands
+SUPPORTED_EXTENSIONS = {".md": "markdown", ".markdown": "markdown", ".txt": "text", ".json": "json"}
+
+# Preferred split points, best first
+_BOUNDARIES = ("\n#", "\n\n", "\n", ". ", " ")
+
+# Post fields holding the body of an exported blog post, best first
+_POST_BODY_FIELDS = ("content", "body", "markdown", "text", "searchText", "excerpt")
+_POST_METADATA_FIELDS = ("id", "title", "slug", "category", "tags", "publishedAt", "url")
+
+class TextChunker:
+    """
+    Splits text fed in pieces into chunks of at most chunk_chars
+    Cuts at a markdown heading, paragraph, line, sentence or word boundary in
+    the second half of the window, whichever comes first in that order
+    """
+    
+    def __init__(self, chunk_chars: int = INGEST_CHUNK_CHARS):
+        self.chunk_chars = chunk_chars
+        self.buffer = ""
+    
+    def _cut(self, window: str) -> int:
+        for boundary in _BOUNDARIES:
+            position = window.rfind(boundary, self.chunk_chars // 2)
+            if position != -1:
+                # A heading starts the next chunk; other separators end this one
+                return position + 1 if boundary == "\n#" else position + len(boundary)
+        return len(window)
+    
+    def feed(self, text: str) -> List[str]:
+        """Complete chunks available after adding text"""
+        self.buffer += text
+        chunks = []
+        while len(self.buffer) > self.chunk_chars:
+            cut = self._cut(self.buffer[:self.chunk_chars])
+            chunks.append(self.buffer[:cut].strip())
+            self.buffer = self.buffer[cut:]
+        return [chunk for chunk in chunks if chunk]
+    
+    def finish(self) -> List[str]:
+        """The remaining text as a last chunk"""
+        rest, self.buffer = self.buffer.strip(), ""
+        return [rest] if rest else []
+
+def chunk_text(text: str, chunk_chars: int = INGEST_CHUNK_CHARS) -> List[str]:
+    chunker = TextChunker(chunk_chars)
+    return chunker.feed(text) + chunker.finish()
+
+def markdown_title(text: str) -> Optional[str]:
+    """First top-level heading of a markdown document"""
+    for line in text.splitlines():
+        if line.startswith("# "):
+            return line[2:].strip()
+    return None
+
+def blog_posts(data: Any) -> List[Tuple[str, Dict[str, Any]]]:
+    """(text, metadata) of each post in exported blog JSON: a post, a list of posts, or {"posts": [...]}"""
+    if isinstance(data, dict):
+        data = data.get("posts", [data])
+    if not isinstance(data, list):
+        return []
+        
+    posts = []
+    for post in data:
+        if not isinstance(post, dict):
+            continue
+        body = next((post[field] for field in _POST_BODY_FIELDS if isinstance(post.get(field), str) and post[field].strip()), None)
+        if body is None:
+            continue
+        title = post.get("title")
+        text = f"{title}\n\n{body}" if isinstance(title, str) and title not in body else body
+        posts.append((text, {field: post[field] for field in _POST_METADATA_FIELDS if field in post}))
+    return posts
+
+def parse_file(path: str, known_hash: Optional[str] = None, chunk_chars: int = INGEST_CHUNK_CHARS) -> Dict[str, Any]:
+    """
+    Read and chunk one file (runs in a worker process)
+    Returns its content hash and (content, metadata) chunks; chunks are not
+    produced when the hash equals known_hash, i.e. the content is unchanged
+    """
+    kind = SUPPORTED_EXTENSIONS.get(os.path.splitext(path)[1].lower(), "text")
+    with open(path, "rb") as f:
+        raw = f.read()
+    content_hash = hashlib.sha256(raw).hexdigest()
+    if content_hash == known_hash:
+        return {"path": path, "hash": content_hash, "unchanged": True, "chunks": []}
+        
+    text = raw.decode("utf-8", errors="replace")
+    if kind == "json":
+        documents = blog_posts(loads(raw))
+    else:
+        documents = [(text, {"title": markdown_title(text)} if kind == "markdown" else {})]
+        
+    chunks = []
+    for document_text, metadata in documents:
+        for index, chunk in enumerate(chunk_text(document_text, chunk_chars)):
+            chunks.append((chunk, {**metadata, "path": path, "type": kind, "chunk": index}))
+    return {"path": path, "hash": content_hash, "unchanged": False, "chunks": chunks}
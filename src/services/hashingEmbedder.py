@@ -0,0 +1,123 @@
+"""
+Hashing Embedder
+Dependency-free text embeddings for offline retrieval: word unigrams and
+bigrams are hashed into a fixed number of signed buckets, weighted by
+sublinear term frequency and L2-normalised, so texts sharing vocabulary get
+similar vectors. Batches are accumulated with numpy when it is installed
+"""
+
+import os
+import re
+import math
+import zlib
+from collections import Counter
+from typing import Dict, List, Tuple
+import logging
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Vector size; the same as the mock embedder's, so stores and scans cost the same
+HASHING_EMBEDDING_DIM = int(os.environ.get("AI_HASHING_EMBEDDING_DIM", "384"))
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+# Distinct tokens whose crc32 is remembered before the cache starts over
+TOKEN_CACHE_SIZE = 100_000
+
+# Mixes the previous tokens' hash into the next token's (the 32-bit FNV prime)
+_CHAIN_MULTIPLIER = 0x01000193
+
+# Frequent words that carry no topic; dropped before n-grams are formed
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in into is it its of on or so "
+    "than that the their them there these they this to was we were what when which who why will with "
+    "you your".split()
+)
+
+class HashingEmbedder:
+    """
+    Feature-hashing vectorizer usable as a RAG embedder
+    Each n-gram lands in bucket hash % dim with a sign taken from the top
+    hash bit, so colliding n-grams tend to cancel rather than add up.
+    Calling the embedder with a list of texts returns their vectors.
+    """
+    
+    def __init__(self, dim: int = HASHING_EMBEDDING_DIM, ngram_range: Tuple[int, int] = (1, 2), use_numpy: bool = NUMPY_AVAILABLE):
+        if dim < 1 or ngram_range[0] < 1 or ngram_range[1] < ngram_range[0]:
+            raise ValueError("dim and ngram_range must be positive and ordered")
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.use_numpy = use_numpy and NUMPY_AVAILABLE
+        self._hashes: Dict[str, int] = {}
+        # Changing the dimension or n-grams changes every vector, so it is a different model
+        self.model_id = f"hashing-v1-{dim}" + ("" if ngram_range == (1, 2) else f"-ng{ngram_range[0]}{ngram_range[1]}")
+    
+    def _token_hash(self, token: str) -> int:
+        h = self._hashes.get(token)
+        if h is None:
+            if len(self._hashes) >= TOKEN_CACHE_SIZE:
+                self._hashes.clear()
+            h = self._hashes[token] = zlib.crc32(token.encode())
+        return h
+    
+    def _gram_hashes(self, text: str) -> List[int]:
+        """32-bit hash of every n-gram; an n-gram's hash chains its tokens' crc32s"""
+        hashes = [self._token_hash(token) for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+        low, high = self.ngram_range
+        grams = list(hashes) if low == 1 else []
+        chained = hashes
+        for n in range(2, high + 1):
+            chained = [((h * _CHAIN_MULTIPLIER) ^ hashes[i + n - 1]) & 0xFFFFFFFF for i, h in enumerate(chained[:-1])]
+            if n >= low:
+                grams.extend(chained)
+        return grams
+    
+    def _features(self, text: str) -> List[Tuple[int, float]]:
+        """(bucket, signed weight) of each distinct n-gram"""
+        dim = self.dim
+        features = []
+        for h, count in Counter(self._gram_hashes(text)).items():
+            weight = 1.0 + math.log(count) if count > 1 else 1.0
+            features.append((h % dim, weight if h & 0x80000000 else -weight))
+        return features
+    
+    def embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dim
+        for bucket, weight in self._features(text):
+            vector[bucket] += weight
+        norm = math.sqrt(sum(value * value for value in vector))
+        return [value / norm for value in vector] if norm else vector
+    
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts"""
+        if not self.use_numpy:
+            return [self.embed_one(text) for text in texts]
+            
+        rows, buckets, weights = [], [], []
+        for row, text in enumerate(texts):
+            for bucket, weight in self._features(text):
+                rows.append(row)
+                buckets.append(bucket)
+                weights.append(weight)
+        matrix = np.zeros((len(texts), self.dim))
+        np.add.at(matrix, (np.array(rows, dtype=np.intp), np.array(buckets, dtype=np.intp)), weights)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return (matrix / np.where(norms == 0, 1.0, norms)).tolist()
+        
+    __call__ = embed
+
+# Global embedder instance
+hashing_embedder = HashingEmbedder()
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Hashing embeddings for a batch of texts"""
+    return hashing_embedder.embed(texts)
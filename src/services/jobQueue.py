@@ -0,0 +1,398 @@
+"""
+Job Queue
+Background jobs persisted in SQLite: submit returns a job id immediately, a
+bounded pool of worker threads runs the jobs, and queued or interrupted jobs
+resume after a restart. Several processes may share one database: a running
+job is leased to the process running it, and only expired leases are resumed
+"""
+
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import atexit
+import threading
+from concurrent.futures import CancelledError
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Any, Optional, Callable, Tuple
+import logging
+
+try:
+    from .metricsService import metrics
+    from .jsonCodec import dumps_str, loads
+except ImportError:
+    # Handle relative imports when running as script
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    
+    from metricsService import metrics
+    from jsonCodec import dumps_str, loads
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATES = ("succeeded", "failed")
+
+# Seconds a claimed job stays leased to its process; renewed while it runs
+JOB_LEASE_SECONDS = float(os.environ.get("AI_JOB_LEASE_SECONDS", "60"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    run_after REAL NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, run_after, created_at);
+"""
+
+# Columns added after the first release, for databases created before them
+_ADDED_COLUMNS = {"owner": "TEXT", "lease_until": "REAL"}
+
+_COLUMNS = "id, type, payload, status, attempts, result, error, created_at, updated_at, started_at, finished_at"
+
+class RetryJob(Exception):
+    """Raised by a handler to put its job back in the queue after a delay (e.g. when overloaded)"""
+    
+    def __init__(self, reason: str, delay: float = 5.0):
+        super().__init__(reason)
+        self.delay = delay
+
+@dataclass
+class Job:
+    id: str
+    type: str
+    payload: Dict[str, Any]
+    status: str  # queued, running, succeeded, failed
+    attempts: int
+    result: Any
+    error: Optional[str]
+    created_at: float
+    updated_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    
+    @classmethod
+    def from_row(cls, row: tuple) -> "Job":
+        job_id, job_type, payload, status, attempts, result, error, created_at, updated_at, started_at, finished_at = row
+        return cls(
+            id=job_id,
+            type=job_type,
+            payload=loads(payload),
+            status=status,
+            attempts=attempts,
+            result=loads(result) if result is not None else None,
+            error=error,
+            created_at=created_at,
+            updated_at=updated_at,
+            started_at=started_at,
+            finished_at=finished_at
+        )
+    
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATES
+    
+    def to_dict(self, include_payload: bool = False) -> Dict[str, Any]:
+        data = asdict(self)
+        if not include_payload:
+            data.pop("payload")
+        data["wait_time"] = (self.started_at or time.time()) - self.created_at
+        data["run_time"] = (self.finished_at or time.time()) - self.started_at if self.started_at else None
+        return data
+
+class JobQueue:
+    """
+    SQLite-backed job queue with a fixed pool of worker threads
+    Handlers are plain callables registered per job type; they run on the
+    worker threads, so at most `workers` jobs execute at once. Every state
+    change bumps `version` and wakes threads blocked in wait_for_change.
+    Claims are conditional updates, so processes sharing the database never
+    run the same job twice; each renews the leases of its running jobs, and
+    jobs whose lease expired (their process died) are queued again.
+    """
+    
+    def __init__(self, db_path: str = "/tmp/job_storage/jobs.db", workers: int = 2, max_attempts: int = 3,
+                 retention: float = 7 * 24 * 3600, poll_interval: float = 1.0, lease_seconds: float = JOB_LEASE_SECONDS):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.workers = max(1, workers)
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self.version = 0
+        self.busy = 0
+        
+        # One connection in autocommit mode, serialized by the lock
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, column_type in _ADDED_COLUMNS.items():
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {column_type}")
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._started_at: Optional[float] = None
+        self._busy_time = 0.0
+        
+        logger.info(f"🗂️ Job queue storage: {self.db_path}")
+    
+    def register_handler(self, job_type: str, handler: Callable[[Dict[str, Any]], Any]):
+        """Run jobs of job_type with handler(payload); its return value is the job result"""
+        self.handlers[job_type] = handler
+    
+    def start(self):
+        """Start the workers on first use, resuming jobs whose process died"""
+        with self._changed:
+            if self._threads or self._stopping:
+                return
+            resumed, exhausted = self._recover_expired_locked()
+            pruned = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?", (*TERMINAL_STATES, time.time() - self.retention)
+            ).rowcount
+            self._started_at = time.monotonic()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True) for i in range(self.workers)
+            ]
+            self._threads.append(threading.Thread(target=self._keep_leases, name="job-leases", daemon=True))
+            for thread in self._threads:
+                thread.start()
+            self._changed_locked()
+        logger.info(
+            f"⚙️ Started {self.workers} job workers ({resumed} resumed, {exhausted} out of attempts, {pruned} expired jobs pruned)"
+        )
+    
+    def _recover_expired_locked(self) -> Tuple[int, int]:
+        """
+        Queue again the running jobs whose lease expired; (resumed, failed) (caller holds the lock)
+        Jobs leased to a live process are left alone. One that was running on
+        its last allowed attempt is failed instead of run again
+        """
+        now = time.time()
+        expired = "status = 'running' AND (lease_until IS NULL OR lease_until < ?)"
+        exhausted = self._conn.execute(
+            f"UPDATE jobs SET status = 'failed', error = ?, updated_at = ?, finished_at = ?, owner = NULL "
+            f"WHERE {expired} AND attempts >= ?",
+            (f"interrupted on its last attempt (max_attempts={self.max_attempts})", now, now, now, self.max_attempts)
+        ).rowcount
+        resumed = self._conn.execute(
+            f"UPDATE jobs SET status = 'queued', updated_at = ?, owner = NULL WHERE {expired}", (now, now)
+        ).rowcount
+        return resumed, exhausted
+    
+    def _keep_leases(self):
+        """Renew this process's leases and recover jobs whose process died, until shutdown"""
+        interval = self.lease_seconds / 3
+        while True:
+            with self._changed:
+                if self._changed.wait_for(lambda: self._stopping, interval):
+                    return
+                self._conn.execute(
+                    "UPDATE jobs SET lease_until = ? WHERE status = 'running' AND owner = ?",
+                    (time.time() + self.lease_seconds, self.owner)
+                )
+                resumed, exhausted = self._recover_expired_locked()
+                if resumed or exhausted:
+                    logger.info(f"🔁 Recovered {resumed} jobs with expired leases ({exhausted} out of attempts)")
+                    self._changed_locked()
+    
+    def submit(self, job_type: str, payload: Dict[str, Any]) -> Job:
+        """Persist a new job and return it without waiting for it to run"""
+        if job_type not in self.handlers:
+            raise ValueError(f"No handler registered for job type: {job_type}")
+            
+        now = time.time()
+        job = Job(id=uuid.uuid4().hex, type=job_type, payload=payload, status="queued", attempts=0,
+                  result=None, error=None, created_at=now, updated_at=now)
+        with self._changed:
+            self._conn.execute(
+                "INSERT INTO jobs (id, type, payload, status, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job.id, job_type, dumps_str(payload), now, now)
+            )
+            self._changed_locked()
+        metrics.inc("jobs_submitted_total", type=job_type)
+        self.start()
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+    
+    def wait_for_change(self, version: int, timeout: float) -> int:
+        """Block until any job changes after `version` (or timeout); returns the current version"""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != version or self._stopping, timeout)
+            return self.version
+    
+    def _changed_locked(self):
+        """Record a state change (caller holds the lock)"""
+        self.version += 1
+        queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        metrics.set_gauge("job_queue_depth", queued)
+        metrics.set_gauge("job_workers_busy", self.busy)
+        self._changed.notify_all()
+    
+    def _claim(self) -> Optional[Job]:
+        """
+        Lease the oldest runnable job to this process and mark it running (caller holds the lock)
+        The update only succeeds while the job is still queued, so a job another
+        process claimed first is skipped rather than run twice
+        """
+        now = time.time()
+        while True:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE status = 'queued' AND run_after <= ? ORDER BY created_at LIMIT 1", (now,)
+            ).fetchone()
+            if row is None:
+                return None
+            job = Job.from_row(row)
+            if job.attempts >= self.max_attempts:
+                # Requeued (e.g. interrupted) after its last allowed attempt
+                error = f"gave up after {job.attempts} attempts" + (f": {job.error}" if job.error else "")
+                if self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, updated_at = ?, finished_at = ? WHERE id = ? AND status = 'queued'",
+                    (error, now, now, job.id)
+                ).rowcount:
+                    metrics.inc("jobs_total", type=job.type, status="failed")
+                    self._changed_locked()
+                continue
+            
+            job.status, job.attempts, job.started_at, job.updated_at = "running", job.attempts + 1, now, now
+            claimed = self._conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = ?, started_at = ?, updated_at = ?, owner = ?, lease_until = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (job.attempts, now, now, self.owner, now + self.lease_seconds, job.id)
+            ).rowcount
+            if claimed:
+                break
+        self.busy += 1
+        self._changed_locked()
+        return job
+    
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None, retry_after: float = 0.0):
+        now = time.time()
+        with self._changed:
+            # Only while the lease is still ours: after it expired the job may be running elsewhere
+            if status == "queued":
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', error = ?, updated_at = ?, run_after = ?, owner = NULL "
+                    "WHERE id = ? AND owner = ?",
+                    (error, now, now + retry_after, job.id, self.owner)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ?, finished_at = ?, owner = NULL "
+                    "WHERE id = ? AND owner = ?",
+                    (status, dumps_str(result) if result is not None else None, error, now, now, job.id, self.owner)
+                )
+            self.busy -= 1
+            self._busy_time += now - job.started_at
+            self._changed_locked()
+            
+        metrics.observe("job_run_seconds", now - job.started_at, type=job.type)
+        if status != "queued":
+            metrics.observe("job_latency_seconds", now - job.created_at, type=job.type)
+            metrics.inc("jobs_total", type=job.type, status=status)
+    
+    def _work(self):
+        while True:
+            with self._changed:
+                job = None
+                while not self._stopping:
+                    job = self._claim()
+                    if job is not None:
+                        break
+                    self._changed.wait(self.poll_interval)
+                if job is None:
+                    return
+                    
+            metrics.observe("job_wait_seconds", job.started_at - job.created_at, type=job.type)
+            self._run(job)
+    
+    def _run(self, job: Job):
+        handler = self.handlers.get(job.type)
+        if handler is None:
+            self._finish(job, "failed", error=f"No handler registered for job type: {job.type}")
+            return
+            
+        try:
+            result = handler(job.payload)
+        except RetryJob as e:
+            if job.attempts < self.max_attempts:
+                logger.info(f"🔁 Job {job.id} retrying in {e.delay:.0f}s: {str(e)}")
+                self._finish(job, "queued", error=str(e), retry_after=e.delay)
+            else:
+                self._finish(job, "failed", error=str(e))
+        except CancelledError:
+            # Interrupted by shutdown; the next start resumes it
+            self._finish(job, "queued", error="interrupted")
+        except Exception as e:
+            logger.error(f"❌ Job {job.id} ({job.type}) failed: {str(e)}")
+            self._finish(job, "failed", error=str(e))
+        else:
+            self._finish(job, "succeeded", result=result)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Queue depth per status, worker utilisation and job latency quantiles"""
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            busy, busy_time = self.busy, self._busy_time
+        uptime = time.monotonic() - self._started_at if self._started_at else 0.0
+        snapshot = metrics.snapshot()
+        return {
+            "storage": str(self.db_path),
+            "workers": self.workers,
+            "running": bool(self._threads) and not self._stopping,
+            "jobs": {status: counts.get(status, 0) for status in ("queued", "running", *TERMINAL_STATES)},
+            "busy_workers": busy,
+            "utilisation": busy_time / (uptime * self.workers) if uptime else 0.0,
+            "latency": {name: snapshot.get(name, {}) for name in ("job_wait_seconds", "job_run_seconds", "job_latency_seconds")}
+        }
+    
+    def shutdown(self, timeout: float = 5.0):
+        """Stop the workers; jobs still running are resumed by the next start"""
+        with self._changed:
+            self._stopping = True
+            self._changed.notify_all()
+            threads, self._threads = self._threads, []
+        for thread in threads:
+            thread.join(timeout)
+
+# Global job queue
+job_queue = JobQueue(
+    db_path=os.environ.get("AI_JOB_DB", "/tmp/job_storage/jobs.db"),
+    workers=int(os.environ.get("AI_JOB_WORKERS", "2"))
+)
+atexit.register(job_queue.shutdown)
+
+def submit_job(job_type: str, payload: Dict[str, Any]) -> Job:
+    """Queue a job for the background workers"""
+    return job_queue.submit(job_type, payload)
+
+def get_job(job_id: str) -> Optional[Job]:
+    """Current state of a job"""
+    return job_queue.get(job_id)
+
+def get_job_stats() -> Dict[str, Any]:
+    """Job queue statistics"""
+    return job_queue.get_stats()
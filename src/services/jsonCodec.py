@@ -0,0 +1,147 @@
+"""
+JSON Codec
+Fast JSON encoding for API responses and service storage (orjson when
+installed, compact stdlib json otherwise) and negotiated gzip/br compression
+of response bodies
+"""
+
+import json
+import gzip
+import enum
+import uuid
+import datetime
+import dataclasses
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple, Union
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Optional fast encoder
+try:
+    import orjson
+    JSON_BACKEND = "orjson"
+except ImportError:
+    orjson = None
+    JSON_BACKEND = "json"
+
+# Optional Brotli support (gzip is always available)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+COMPRESSION_THRESHOLD = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+def _native(obj: Any) -> Any:
+    """What orjson encodes natively but stdlib json does not (dataclasses, datetimes, enums, UUIDs, numpy)"""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError
+
+def _key(key: Any) -> Any:
+    """Dict key as orjson's OPT_NON_STR_KEYS writes it"""
+    if key is None or isinstance(key, (str, int, float, bool)):
+        return key
+    if isinstance(key, (datetime.datetime, datetime.date, datetime.time, enum.Enum, uuid.UUID)):
+        return _native(key)
+    raise TypeError(f"Dict key must be str, int, float, bool, None, datetime, enum or UUID, not {type(key).__name__}")
+
+def _with_json_keys(obj: Any) -> Any:
+    """Copy of obj with dict keys stdlib json accepts"""
+    if isinstance(obj, dict):
+        return {_key(key): _with_json_keys(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_with_json_keys(value) for value in obj]
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return _with_json_keys(_native(obj))
+    return obj
+
+def dumps(obj: Any, default: Callable[[Any], Any] = str) -> bytes:
+    """
+    Compact UTF-8 JSON; values the encoder does not know are passed through default
+    The stdlib fallback encodes what orjson does natively the same way
+    (dataclasses, ISO datetimes, enums, UUIDs, numpy, non-str keys)
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    
+    def encode(value: Any) -> Any:
+        try:
+            return _native(value)
+        except TypeError:
+            return default(value)
+    
+    try:
+        text = json.dumps(obj, default=encode, separators=(",", ":"), ensure_ascii=False)
+    except TypeError:
+        # A dict key stdlib json rejects (e.g. a datetime): rewrite the keys and retry
+        text = json.dumps(_with_json_keys(obj), default=encode, separators=(",", ":"), ensure_ascii=False)
+    return text.encode("utf-8")
+
+def dumps_str(obj: Any, default: Callable[[Any], Any] = str) -> str:
+    return dumps(obj, default).decode("utf-8")
+
+def loads(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dump_file(obj: Any, path: Union[str, Path]):
+    """Write obj as compact JSON"""
+    with open(path, 'wb') as f:
+        f.write(dumps(obj))
+
+def load_file(path: Union[str, Path]) -> Any:
+    with open(path, 'rb') as f:
+        return loads(f.read())
+
+def _accepted(accept_encoding: str) -> dict:
+    """Encodings from an Accept-Encoding header with their q-values"""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred supported content coding ('br' or 'gzip') for the client, or None"""
+    accepted = _accepted(accept_encoding)
+    candidates = [name for name in (("br", "gzip") if brotli is not None else ("gzip",))
+                  if accepted.get(name, accepted.get("*", 0.0)) > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda name: accepted.get(name, accepted.get("*", 0.0)))
+
+def compress(body: bytes, accept_encoding: str, threshold: int = COMPRESSION_THRESHOLD) -> Tuple[bytes, Optional[str]]:
+    """Compress body for the client when it is large enough; returns (body, content coding or None)"""
+    if len(body) < threshold:
+        return body, None
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY), encoding
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0), encoding
+    return body, None
@@ -3,18 +3,43 @@ MCP (Model Context Protocol) Integration Service
 Provides enhanced context management and tool integration for AI models
 """
 
-import json
+import re
 import asyncio
-from typing import Dict, List, Any, Optional, Callable
+import threading
+from typing import Dict, List, Any, Optional, Callable, FrozenSet
 from dataclasses import dataclass, asdict
 from datetime import datetime
 import logging
 from pathlib import Path
 
+try:
+    from .requestDeadline import DeadlineExceeded, within_deadline
+    from .jsonCodec import dump_file, load_file, dumps_str, loads
+except ImportError:
+    # Handle relative imports when running as script
+    import os
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    
+    from requestDeadline import DeadlineExceeded, within_deadline
+    from jsonCodec import dump_file, load_file, dumps_str, loads
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Contexts appended to the log before it is folded into contexts.json
+CONTEXT_LOG_COMPACT_EVERY = 256
+
+# Words too common to make a search match
+_STOP_WORDS = frozenset(
+    "a an and are as at be by for from in is it of on or that the this to with about what how".split()
+)
+
+def search_terms(text: str) -> FrozenSet[str]:
+    """Lowercased words of text, without stop words"""
+    return frozenset(word for word in re.findall(r"\w+", text.lower()) if word not in _STOP_WORDS)
+
 @dataclass
 class MCPTool:
     name: str
@@ -53,6 +78,15 @@ class MCPService:
         self.contexts: Dict[str, MCPContext] = {}
         self.resources: Dict[str, MCPResource] = {}
         self.is_initialized = False
+        # Bumped on every change to tools, contexts or resources, so callers can cache derived views
+        self.version = 0
+        # Contexts may be added from background workers while requests read them
+        self._lock = threading.RLock()
+        # Serializes writes of contexts.json and the context log
+        self._persist_lock = threading.Lock()
+        self._logged_contexts = 0
+        # Search terms of each string context, computed once when it is added
+        self._context_terms: Dict[str, FrozenSet[str]] = {}
         
         logger.info(f"🔧 Initializing MCP service with storage: {storage_path}")
         self._initialize()
@@ -64,6 +98,7 @@ class MCPService:
             self._load_contexts()
             self._load_resources()
             self.is_initialized = True
+            self.version += 1
             logger.info(f"✅ MCP service initialized with {len(self.tools)} tools, {len(self.contexts)} contexts")
         except Exception as e:
             logger.error(f"❌ MCP service initialization failed: {str(e)}")
@@ -93,7 +128,8 @@ class MCPService:
                 "type": "object",
                 "properties": {
                     "query": {"type": "string", "description": "Search query"},
-                    "limit": {"type": "integer", "description": "Maximum results", "default": 10}
+                    "limit": {"type": "integer", "description": "Maximum results", "default": 10},
+                    "min_score": {"type": "number", "description": "Fraction of the query's words a match must contain", "default": 0.0}
                 },
                 "required": ["query"]
             },
@@ -134,27 +170,35 @@ class MCPService:
             handler=handler
         )
         self.tools[name] = tool
+        self.version += 1
         logger.info(f"🔧 Registered MCP tool: {name}")
     
     def add_context(self, name: str, content: Any, metadata: Optional[Dict[str, Any]] = None) -> str:
-        """Add a new context"""
+        """
+        Add a new context
+        It is appended to contexts.jsonl rather than rewriting contexts.json;
+        every CONTEXT_LOG_COMPACT_EVERY contexts the log is folded into it
+        """
         if metadata is None:
             metadata = {}
         
-        context_id = f"ctx_{len(self.contexts)}_{int(datetime.now().timestamp())}"
-        now = datetime.now()
-        
-        context = MCPContext(
-            id=context_id,
-            name=name,
-            content=content,
-            metadata=metadata,
-            created_at=now,
-            updated_at=now
-        )
-        
-        self.contexts[context_id] = context
-        self._save_contexts()
+        with self._lock:
+            context_id = f"ctx_{len(self.contexts)}_{int(datetime.now().timestamp())}"
+            now = datetime.now()
+            
+            context = MCPContext(
+                id=context_id,
+                name=name,
+                content=content,
+                metadata=metadata,
+                created_at=now,
+                updated_at=now
+            )
+            
+            self.contexts[context_id] = context
+            self._index_context(context)
+            self.version += 1
+        self._log_context(context)
         
         logger.info(f"📝 Added context: {context_id} ({name})")
         return context_id
@@ -170,6 +214,7 @@ class MCPService:
         )
         
         self.resources[uri] = resource
+        self.version += 1
         self._save_resources()
         
         logger.info(f"📎 Added resource: {uri} ({name})")
@@ -195,9 +240,9 @@ class MCPService:
                         "error": f"Required parameter '{param}' missing",
                         "tool": tool_name
                     }
-            
-            # Call the tool handler
-            result = await tool.handler(parameters)
+                    
+            # Call the tool handler (cancelled at the request deadline)
+            result = await within_deadline(tool.handler(parameters), f"tool:{tool_name}")
             
             logger.info(f"🔧 Tool called: {tool_name}")
             return {
@@ -211,7 +256,8 @@ class MCPService:
             return {
                 "success": False,
                 "error": str(e),
-                "tool": tool_name
+                "tool": tool_name,
+                "deadline_exceeded": isinstance(e, DeadlineExceeded)
             }
     
     # Tool handlers
@@ -224,8 +270,7 @@ class MCPService:
             if not path.exists():
                 return {"error": f"File not found: {file_path}"}
             
-            with open(path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = await asyncio.to_thread(path.read_text, encoding='utf-8')
             
             return {
                 "file_path": file_path,
@@ -243,31 +288,8 @@ class MCPService:
             query = parameters["query"].lower()
             limit = parameters.get("limit", 10)
             
-            results = []
-            
-            # Search contexts
-            for context_id, context in self.contexts.items():
-                if isinstance(context.content, str) and query in context.content.lower():
-                    results.append({
-                        "type": "context",
-                        "id": context_id,
-                        "name": context.name,
-                        "content_preview": context.content[:200] + "...",
-                        "metadata": context.metadata
-                    })
-            
-            # Search resources
-            for uri, resource in self.resources.items():
-                if (query in resource.name.lower() or 
-                    query in resource.description.lower() or
-                    (isinstance(resource.content, str) and query in resource.content.lower())):
-                    results.append({
-                        "type": "resource",
-                        "uri": uri,
-                        "name": resource.name,
-                        "description": resource.description,
-                        "mime_type": resource.mime_type
-                    })
+            # Scans every stored context; keep it off the event loop
+            results = await asyncio.to_thread(self._search, query, parameters.get("min_score", 0.0))
             
             return {
                 "query": query,
@@ -278,6 +300,53 @@ class MCPService:
         except Exception as e:
             return {"error": str(e)}
     
+    def _search(self, query: str, min_score: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Contexts and resources sharing words with the query, best first
+        A match's score is the fraction of the query's words it contains;
+        only matches scoring above min_score are returned
+        """
+        terms = search_terms(query)
+        if not terms:
+            return []
+        
+        def score(words: FrozenSet[str]) -> float:
+            return len(terms & words) / len(terms)
+        
+        results = []
+        
+        # Search contexts
+        with self._lock:
+            contexts = [(self.contexts[context_id], words) for context_id, words in self._context_terms.items()]
+        for context, words in contexts:
+            match = score(words)
+            if match > min_score:
+                results.append({
+                    "type": "context",
+                    "id": context.id,
+                    "name": context.name,
+                    "content_preview": context.content[:200] + "...",
+                    "metadata": context.metadata,
+                    "score": match
+                })
+        
+        # Search resources
+        for uri, resource in list(self.resources.items()):
+            text = " ".join([resource.name, resource.description, resource.content if isinstance(resource.content, str) else ""])
+            match = score(search_terms(text))
+            if match > min_score:
+                results.append({
+                    "type": "resource",
+                    "uri": uri,
+                    "name": resource.name,
+                    "description": resource.description,
+                    "mime_type": resource.mime_type,
+                    "score": match
+                })
+        
+        results.sort(key=lambda result: result["score"], reverse=True)
+        return results
+    
     async def _handle_get_context(self, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Handle get_context tool"""
         try:
@@ -331,47 +400,75 @@ class MCPService:
         except Exception as e:
             return {"error": str(e)}
     
+    def _index_context(self, context: MCPContext):
+        """Make a string context searchable (caller holds the lock)"""
+        if isinstance(context.content, str):
+            self._context_terms[context.id] = search_terms(context.content)
+    
+    @staticmethod
+    def _context_dict(context: MCPContext) -> Dict[str, Any]:
+        ctx_dict = asdict(context)
+        ctx_dict['created_at'] = context.created_at.isoformat()
+        ctx_dict['updated_at'] = context.updated_at.isoformat()
+        return ctx_dict
+    
+    @staticmethod
+    def _context_from_dict(ctx_data: Dict[str, Any]) -> MCPContext:
+        ctx_data['created_at'] = datetime.fromisoformat(ctx_data['created_at'])
+        ctx_data['updated_at'] = datetime.fromisoformat(ctx_data['updated_at'])
+        return MCPContext(**ctx_data)
+    
     def _load_contexts(self):
-        """Load contexts from storage"""
+        """Load contexts from storage, then the ones logged since it was last written"""
         try:
             contexts_file = self.storage_path / "contexts.json"
             if contexts_file.exists():
-                with open(contexts_file, 'r') as f:
-                    contexts_data = json.load(f)
-                    for ctx_data in contexts_data:
-                        ctx_data['created_at'] = datetime.fromisoformat(ctx_data['created_at'])
-                        ctx_data['updated_at'] = datetime.fromisoformat(ctx_data['updated_at'])
-                        context = MCPContext(**ctx_data)
-                        self.contexts[context.id] = context
+                for ctx_data in load_file(contexts_file):
+                    context = self._context_from_dict(ctx_data)
+                    self.contexts[context.id] = context
+            
+            log_file = self.storage_path / "contexts.jsonl"
+            if log_file.exists():
+                with open(log_file, "rb") as f:
+                    for line in f:
+                        if line.strip():
+                            context = self._context_from_dict(loads(line))
+                            self.contexts[context.id] = context
+                            self._logged_contexts += 1
+            
+            for context in self.contexts.values():
+                self._index_context(context)
         except Exception as e:
             logger.warning(f"⚠️ Could not load contexts: {str(e)}")
     
-    def _save_contexts(self):
-        """Save contexts to storage"""
+    def _log_context(self, context: MCPContext):
+        """Append one context to the log, folding the log into contexts.json when it grows long"""
         try:
-            contexts_file = self.storage_path / "contexts.json"
-            contexts_data = []
-            for context in self.contexts.values():
-                ctx_dict = asdict(context)
-                ctx_dict['created_at'] = context.created_at.isoformat()
-                ctx_dict['updated_at'] = context.updated_at.isoformat()
-                contexts_data.append(ctx_dict)
-            
-            with open(contexts_file, 'w') as f:
-                json.dump(contexts_data, f, indent=2)
+            with self._persist_lock:
+                with open(self.storage_path / "contexts.jsonl", "a") as f:
+                    f.write(dumps_str(self._context_dict(context)) + "\n")
+                self._logged_contexts += 1
+                if self._logged_contexts >= CONTEXT_LOG_COMPACT_EVERY:
+                    self._compact_contexts()
         except Exception as e:
-            logger.error(f"❌ Could not save contexts: {str(e)}")
+            logger.error(f"❌ Could not save context {context.id}: {str(e)}")
+    
+    def _compact_contexts(self):
+        """Rewrite contexts.json with every context and drop the log it now covers (caller holds the persist lock)"""
+        with self._lock:
+            contexts = list(self.contexts.values())
+        dump_file([self._context_dict(context) for context in contexts], self.storage_path / "contexts.json")
+        (self.storage_path / "contexts.jsonl").unlink(missing_ok=True)
+        self._logged_contexts = 0
     
     def _load_resources(self):
         """Load resources from storage"""
         try:
             resources_file = self.storage_path / "resources.json"
             if resources_file.exists():
-                with open(resources_file, 'r') as f:
-                    resources_data = json.load(f)
-                    for res_data in resources_data:
-                        resource = MCPResource(**res_data)
-                        self.resources[resource.uri] = resource
+                for res_data in load_file(resources_file):
+                    resource = MCPResource(**res_data)
+                    self.resources[resource.uri] = resource
         except Exception as e:
             logger.warning(f"⚠️ Could not load resources: {str(e)}")
     
@@ -381,8 +478,7 @@ class MCPService:
             resources_file = self.storage_path / "resources.json"
             resources_data = [asdict(resource) for resource in self.resources.values()]
             
-            with open(resources_file, 'w') as f:
-                json.dump(resources_data, f, indent=2)
+            dump_file(resources_data, resources_file)
         except Exception as e:
             logger.error(f"❌ Could not save resources: {str(e)}")
     
@@ -397,7 +493,7 @@ class MCPService:
                 }
                 for tool in self.tools.values()
             ],
-            "contexts": list(self.contexts.keys()),
+            "contexts": list(self.contexts),
             "resources": list(self.resources.keys()),
             "storage_path": str(self.storage_path),
             "initialized": self.is_initialized
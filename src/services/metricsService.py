@@ -0,0 +1,191 @@
+"""
+Metrics Service
+Log-bucketed latency histograms and counters for the local AI pipeline,
+exposed in Prometheus text format
+"""
+
+import math
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Any, Optional, Tuple
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+def log_buckets(smallest: float = 0.0005, largest: float = 120.0, factor: float = 2 ** 0.5) -> List[float]:
+    """Upper bounds growing geometrically (~±20% relative error at factor sqrt(2))"""
+    count = math.ceil(math.log(largest / smallest) / math.log(factor)) + 1
+    return [smallest * factor ** i for i in range(count)]
+
+DEFAULT_BUCKETS = log_buckets()
+
+class LatencyHistogram:
+    """
+    Fixed log-bucketed histogram
+    observe() is a bisect over the bucket bounds plus three increments
+    """
+    
+    def __init__(self, buckets: List[float] = DEFAULT_BUCKETS):
+        self.bounds = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+    
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by interpolating inside the bucket that contains it"""
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return 0.0
+            
+        rank = q * total
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                upper = self.bounds[index] if index < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.bounds[-1]
+    
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99)
+        }
+
+class MetricsRegistry:
+    """
+    Registry of labelled histograms, counters and gauges
+    Metric handles are cached per label set so the hot path is a dict lookup
+    """
+    
+    QUANTILES = (0.5, 0.95, 0.99)
+    
+    def __init__(self, prefix: str = "ai"):
+        self.prefix = prefix
+        self.help: Dict[str, str] = {}
+        self.histograms: Dict[str, Dict[LabelSet, LatencyHistogram]] = {}
+        self.counters: Dict[str, Dict[LabelSet, float]] = {}
+        self.gauges: Dict[str, Dict[LabelSet, float]] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _labels(labels: Dict[str, Any]) -> LabelSet:
+        return tuple(sorted((key, str(value)) for key, value in labels.items()))
+    
+    def describe(self, name: str, help_text: str):
+        self.help[name] = help_text
+    
+    def histogram(self, name: str, **labels) -> LatencyHistogram:
+        key = self._labels(labels)
+        series = self.histograms.get(name)
+        if series is None or key not in series:
+            with self._lock:
+                series = self.histograms.setdefault(name, {})
+                series.setdefault(key, LatencyHistogram())
+        return series[key]
+    
+    def observe(self, name: str, value: float, **labels):
+        self.histogram(name, **labels).observe(value)
+    
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observe the wall time of the enclosed block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+    
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._labels(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+    
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges.setdefault(name, {})[self._labels(labels)] = value
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Quantile summary of every histogram (for JSON status endpoints)"""
+        return {
+            name: {",".join(f"{k}={v}" for k, v in key) or "all": histogram.snapshot() for key, histogram in series.items()}
+            for name, series in self.histograms.items()
+        }
+    
+    @staticmethod
+    def _format_labels(labels: LabelSet, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(labels) + ([extra] if extra else [])
+        if not pairs:
+            return ""
+        escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+        return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+    
+    def render_prometheus(self) -> str:
+        """Render all metrics in Prometheus text exposition format (0.0.4)"""
+        lines: List[str] = []
+        
+        for name, series in sorted(self.histograms.items()):
+            full_name = f"{self.prefix}_{name}"
+            lines.append(f"# HELP {full_name} {self.help.get(name, name)}")
+            lines.append(f"# TYPE {full_name} histogram")
+            for labels, histogram in sorted(series.items()):
+                with histogram._lock:
+                    counts, count, total = list(histogram.counts), histogram.count, histogram.sum
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.bounds, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{full_name}_bucket{self._format_labels(labels, ('le', f'{bound:.6g}'))} {cumulative}")
+                lines.append(f"{full_name}_bucket{self._format_labels(labels, ('le', '+Inf'))} {count}")
+                lines.append(f"{full_name}_sum{self._format_labels(labels)} {total}")
+                lines.append(f"{full_name}_count{self._format_labels(labels)} {count}")
+                
+            lines.append(f"# HELP {full_name}_quantile Estimated quantiles of {full_name}")
+            lines.append(f"# TYPE {full_name}_quantile gauge")
+            for labels, histogram in sorted(series.items()):
+                for q in self.QUANTILES:
+                    lines.append(f"{full_name}_quantile{self._format_labels(labels, ('quantile', str(q)))} {histogram.quantile(q)}")
+                    
+        for metric_type, metrics in (("counter", self.counters), ("gauge", self.gauges)):
+            for name, series in sorted(metrics.items()):
+                full_name = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {full_name} {self.help.get(name, name)}")
+                lines.append(f"# TYPE {full_name} {metric_type}")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{full_name}{self._format_labels(labels)} {value}")
+                    
+        return "\n".join(lines) + "\n"
+
+# Global metrics registry
+metrics = MetricsRegistry()
+metrics.describe("request_duration_seconds", "End-to-end orchestrator request latency by request type")
+metrics.describe("step_duration_seconds", "Latency of individual pipeline steps")
+metrics.describe("requests_total", "Orchestrator requests by type and outcome")
+metrics.describe("job_wait_seconds", "Time background jobs spend queued before a worker picks them up")
+metrics.describe("job_run_seconds", "Time background jobs spend running, per attempt")
+metrics.describe("job_latency_seconds", "Background job submission to completion")
+metrics.describe("job_queue_depth", "Background jobs waiting for a worker")
+metrics.describe("job_workers_busy", "Background job workers currently running a job")
+
+def get_metrics_text() -> str:
+    """Prometheus exposition of all AI metrics"""
+    return metrics.render_prometheus()
@@ -4,24 +4,78 @@ Implements local RAG pipeline using Nexa SDK components
 """
 
 import os
-import json
+import time
+import heapq
 import asyncio
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from dataclasses import dataclass, field, replace
 import logging
 from pathlib import Path
 import hashlib
+import threading
+from collections import OrderedDict, Counter
+
+# Import local AI service for reranking
+try:
+    from .localAIService import local_ai_service
+    from .requestDeadline import DeadlineExceeded, remaining, within_deadline
+    from .tracingService import tracer
+    from .contextPacker import PackedContext, pack_context, context_budget
+    from .jsonCodec import dump_file, load_file, dumps_str, loads
+    from .hashingEmbedder import hashing_embedder
+except ImportError:
+    # Handle relative imports when running as script
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    
+    from localAIService import local_ai_service
+    from requestDeadline import DeadlineExceeded, remaining, within_deadline
+    from tracingService import tracer
+    from contextPacker import PackedContext, pack_context, context_budget
+    from jsonCodec import dump_file, load_file, dumps_str, loads
+    from hashingEmbedder import hashing_embedder
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Answer prompt and the generation length it reserves room for
+ANSWER_PROMPT = """
+Based on the following context documents, please answer the question: {query}
+
+Context:
+{context}
+
+Please provide a comprehensive answer based on the context provided. If the context doesn't contain enough information, mention that.
+
+Answer:"""
+ANSWER_MAX_TOKENS = 500
+
+# Candidates recalled by cosine similarity for the reranker to reorder
+RERANK_CANDIDATE_K = 100
+
+# Compact the embedding matrix once this fraction of its rows (and at least this many) are dead
+COMPACT_DEAD_FRACTION = float(os.environ.get("AI_RAG_COMPACT_DEAD_FRACTION", "0.25"))
+COMPACT_MIN_DEAD_ROWS = int(os.environ.get("AI_RAG_COMPACT_MIN_DEAD_ROWS", "32"))
+
+# Embedding model ids; documents stored before models were tagged used the mock embedder.
+# Unless AI_RAG_EMBEDDING_MODEL names one, the first registered embedder (e.g. Nexa)
+# is the target, and the built-in hashing embedder only while none is registered
+MOCK_EMBEDDING_MODEL = "mock-md5-384"
+BUILTIN_EMBEDDING_MODELS = (MOCK_EMBEDDING_MODEL, hashing_embedder.model_id)
+EMBEDDING_MODEL = os.environ.get("AI_RAG_EMBEDDING_MODEL")
+
+# Background re-embedding: documents per batch and documents per second
+MIGRATION_BATCH_SIZE = int(os.environ.get("AI_RAG_MIGRATION_BATCH_SIZE", "32"))
+MIGRATION_RATE = float(os.environ.get("AI_RAG_MIGRATION_RATE", "200"))
+
 @dataclass
 class Document:
     id: str
     content: str
     metadata: Dict[str, Any]
     embedding: Optional[List[float]] = None
+    embedding_model: Optional[str] = None
 
 @dataclass
 class RAGResult:
@@ -30,6 +84,76 @@ class RAGResult:
     sources: List[Document]
     confidence: float
     error: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    rerank_status: str = "disabled"
+    degraded: bool = False
+    scores: List[float] = field(default_factory=list)
+    context: Dict[str, Any] = field(default_factory=dict)  # context packing report
+
+@dataclass
+class EmbeddingMatrix:
+    """
+    Row-aligned documents and their embeddings, appended to in place
+    A row is live while `live` maps its document id to it. Deleting or
+    replacing a document only updates `live`; the dead row stays (masked out
+    of search) until compaction swaps in a matrix without it
+    """
+    model: str = MOCK_EMBEDDING_MODEL
+    documents: List[Document] = field(default_factory=list)
+    vectors: List[List[float]] = field(default_factory=list)
+    live: Dict[str, int] = field(default_factory=dict)
+    
+    def append(self, doc: Document):
+        # Document first: readers walk the vectors and look up the row's document
+        self.documents.append(doc)
+        self.vectors.append(doc.embedding)
+        self.live[doc.id] = len(self.vectors) - 1
+    
+    @property
+    def dead_rows(self) -> int:
+        return len(self.vectors) - len(self.live)
+    
+    def compacted(self) -> "EmbeddingMatrix":
+        """A copy holding only the live rows"""
+        rows = sorted(self.live.values())
+        documents = [self.documents[row] for row in rows]
+        return EmbeddingMatrix(
+            model=self.model,
+            documents=documents,
+            vectors=[self.vectors[row] for row in rows],
+            live={doc.id: row for row, doc in enumerate(documents)}
+        )
+
+@dataclass
+class EmbeddingMigration:
+    """Progress of a background re-embedding of the store into another model"""
+    target: str
+    batch_size: int
+    rate: float  # documents per second
+    state: str = "running"  # running, complete, cancelled, failed
+    total: int = 0
+    embedded: int = 0
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    # Target-model vectors by document id, with the document version they were computed for
+    vectors: Dict[str, Tuple[Document, List[float]]] = field(default_factory=dict, repr=False)
+    cancelled: threading.Event = field(default_factory=threading.Event, repr=False)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        coverage = 1.0 if self.state == "complete" else (self.embedded / self.total if self.total else 0.0)
+        return {
+            "target": self.target,
+            "state": self.state,
+            "embedded": self.embedded,
+            "total": self.total,
+            "coverage": min(coverage, 1.0),
+            "rate": self.rate,
+            "elapsed_s": elapsed,
+            "eta_s": max(self.total - self.embedded, 0) / self.rate if self.state == "running" else 0.0,
+            "error": self.error
+        }
 
 class LocalRAGService:
     """
@@ -44,6 +168,33 @@ class LocalRAGService:
         self.documents: Dict[str, Document] = {}
         self.embeddings_index: Dict[str, List[float]] = {}
         self.is_initialized = False
+        # Bumped on every change to the document set, so callers can cache derived views
+        self.version = 0
+        
+        # Embedders by model id: each maps a batch of texts to their vectors
+        self.embedders: Dict[str, Callable[[List[str]], List[List[float]]]] = {
+            MOCK_EMBEDDING_MODEL: lambda texts: [self._generate_mock_embedding(text) for text in texts],
+            hashing_embedder.model_id: hashing_embedder
+        }
+        self.configured_model = EMBEDDING_MODEL
+        self.target_model = EMBEDDING_MODEL or hashing_embedder.model_id
+        self.migration: Optional[EmbeddingMigration] = None
+        
+        # Searched without locking: queries take a reference to the current matrix,
+        # writers append under the lock and compaction or a finished migration
+        # swaps in a new matrix
+        self.matrix = EmbeddingMatrix(model=self.target_model)
+        self.compact_dead_fraction = COMPACT_DEAD_FRACTION
+        self.compact_min_dead_rows = COMPACT_MIN_DEAD_ROWS
+        self.compactions = 0
+        self._index_lock = threading.Lock()
+        self._persist_lock = threading.Lock()
+        self._compacting = False
+        
+        # Recently embedded queries, so batch callers can embed up front
+        self.query_cache_size = 1024
+        self._query_embeddings: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._query_lock = threading.Lock()
         
         logger.info(f"🗄️ Initializing RAG service with storage: {storage_path}")
         self._initialize()
@@ -53,8 +204,11 @@ class LocalRAGService:
         try:
             # Load existing documents if any
             self._load_documents()
+            self.target_model = self._default_target()
             self.is_initialized = True
-            logger.info(f"✅ RAG service initialized with {len(self.documents)} documents")
+            self.version += 1
+            logger.info(f"✅ RAG service initialized with {len(self.documents)} documents ({self.matrix.model} embeddings)")
+            self._migrate_to_target()
         except Exception as e:
             logger.error(f"❌ RAG service initialization failed: {str(e)}")
             self.is_initialized = False
@@ -65,38 +219,105 @@ class LocalRAGService:
         embeddings_file = self.storage_path / "embeddings.json"
         
         if docs_file.exists():
-            with open(docs_file, 'r') as f:
-                docs_data = json.load(f)
-                for doc_data in docs_data:
-                    doc = Document(**doc_data)
-                    self.documents[doc.id] = doc
+            for doc_data in load_file(docs_file):
+                doc = Document(**doc_data)
+                doc.embedding_model = doc.embedding_model or MOCK_EMBEDDING_MODEL
+                self.documents[doc.id] = doc
         
         if embeddings_file.exists():
-            with open(embeddings_file, 'r') as f:
-                self.embeddings_index = json.load(f)
+            self.embeddings_index = load_file(embeddings_file)
+        
+        # Deletions and updates logged since the store was last written
+        tombstones_file = self.storage_path / "tombstones.jsonl"
+        if tombstones_file.exists():
+            with open(tombstones_file, "rb") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    tombstone = loads(line)
+                    self._tombstone(tombstone["id"])
+                    if tombstone.get("replacement"):
+                        doc = Document(**tombstone["replacement"])
+                        self.documents[doc.id] = doc
+                        self.embeddings_index[doc.id] = doc.embedding
+        
+        # Serve with the model most of the stored vectors came from until a migration switches over
+        models = Counter(doc.embedding_model for doc in self.documents.values())
+        self.matrix = EmbeddingMatrix(model=models.most_common(1)[0][0] if models else self.target_model)
+        for doc in self.documents.values():
+            self.matrix.append(doc)
     
     def _save_documents(self):
         """Save documents to storage"""
         docs_file = self.storage_path / "documents.json"
         embeddings_file = self.storage_path / "embeddings.json"
         
-        # Save documents
-        docs_data = []
-        for doc in self.documents.values():
-            doc_dict = {
-                "id": doc.id,
-                "content": doc.content,
-                "metadata": doc.metadata,
-                "embedding": doc.embedding
-            }
-            docs_data.append(doc_dict)
-        
-        with open(docs_file, 'w') as f:
-            json.dump(docs_data, f, indent=2)
-        
-        # Save embeddings index
-        with open(embeddings_file, 'w') as f:
-            json.dump(self.embeddings_index, f, indent=2)
+        # Snapshot and truncate the tombstones under one persist lock: a delete
+        # that misses the snapshot cannot append its tombstone until the old
+        # log is gone, so it is never dropped with the tombstones the snapshot covers
+        with self._persist_lock:
+            with self._index_lock:
+                documents = list(self.documents.values())
+                embeddings_index = dict(self.embeddings_index)
+            
+            # Save documents
+            docs_data = []
+            for doc in documents:
+                doc_dict = {
+                    "id": doc.id,
+                    "content": doc.content,
+                    "metadata": doc.metadata,
+                    "embedding": doc.embedding,
+                    "embedding_model": doc.embedding_model
+                }
+                docs_data.append(doc_dict)
+            
+            dump_file(docs_data, docs_file)
+            
+            # Save embeddings index
+            dump_file(embeddings_index, embeddings_file)
+            
+            # The store no longer holds deleted documents
+            (self.storage_path / "tombstones.jsonl").unlink(missing_ok=True)
+    
+    def _write_tombstones(self, doc_ids: List[str], replacement: Optional[Document] = None):
+        """
+        Log deletions without rewriting the document store
+        An update is the tombstone of the old version carrying its replacement
+        """
+        now = time.time()
+        records = []
+        for doc_id in doc_ids:
+            record = {"id": doc_id, "deleted_at": now}
+            if replacement is not None:
+                record["replacement"] = {
+                    "id": replacement.id,
+                    "content": replacement.content,
+                    "metadata": replacement.metadata,
+                    "embedding": replacement.embedding,
+                    "embedding_model": replacement.embedding_model
+                }
+            records.append(dumps_str(record) + "\n")
+        with self._persist_lock:
+            with open(self.storage_path / "tombstones.jsonl", "a") as f:
+                f.write("".join(records))
+    
+    def _index_document(self, doc: Document):
+        """Make doc the live version of its id (caller holds the index lock)"""
+        if doc.embedding_model != self.matrix.model:
+            # Embedded just before a migration switched models
+            doc.embedding, doc.embedding_model = self._embed([doc.content], self.matrix.model)[0], self.matrix.model
+        self.documents[doc.id] = doc
+        self.embeddings_index[doc.id] = doc.embedding
+        self.matrix.append(doc)
+    
+    def _tombstone(self, doc_id: str) -> bool:
+        """Mask a document out of search (caller holds the index lock, or is loading)"""
+        if self.documents.pop(doc_id, None) is None:
+            return False
+        self.embeddings_index.pop(doc_id, None)
+        self.matrix.live.pop(doc_id, None)
+        return True
     
     def _generate_doc_id(self, content: str) -> str:
         """Generate unique document ID"""
@@ -119,16 +340,18 @@ class LocalRAGService:
                 metadata=metadata
             )
             
-            # Generate embedding for the document (placeholder)
-            # TODO: Integrate with local AI service for actual embeddings
-            doc.embedding = self._generate_mock_embedding(content)
+            # Generate embedding for the document with the model currently served
+            doc.embedding_model = self.matrix.model
+            doc.embedding = (await asyncio.to_thread(self._embed, [content], doc.embedding_model))[0]
             
             # Store document
-            self.documents[doc_id] = doc
-            self.embeddings_index[doc_id] = doc.embedding
+            with self._index_lock:
+                self._index_document(doc)
+            self.version += 1
             
-            # Save to disk
-            self._save_documents()
+            # Save to disk (off the event loop: the whole store is rewritten)
+            await asyncio.to_thread(self._save_documents)
+            self._maybe_compact()
             
             logger.info(f"📄 Document added: {doc_id} ({len(content)} chars)")
             return doc_id
@@ -137,6 +360,285 @@ class LocalRAGService:
             logger.error(f"❌ Failed to add document: {str(e)}")
             raise
     
+    async def add_documents(self, documents: List[Tuple[str, Dict[str, Any]]], persist: bool = True) -> List[str]:
+        """
+        Add many (content, metadata) documents, embedded as one batch
+        With persist=False the store is not rewritten; call persist() once the
+        last batch is in (streaming ingestion adds many batches in a row)
+        """
+        model = self.matrix.model
+        embeddings = await asyncio.to_thread(self._embed, [content for content, _ in documents], model)
+        doc_ids = []
+        with self._index_lock:
+            for (content, metadata), embedding in zip(documents, embeddings):
+                doc = Document(id=self._generate_doc_id(content), content=content, metadata=metadata or {},
+                               embedding=embedding, embedding_model=model)
+                self._index_document(doc)
+                doc_ids.append(doc.id)
+        self.version += 1
+        
+        if persist:
+            await asyncio.to_thread(self.persist)
+        self._maybe_compact()
+        logger.info(f"📄 Added {len(doc_ids)} documents in one batch")
+        return doc_ids
+    
+    async def delete_documents(self, doc_ids: List[str], persist: bool = True) -> int:
+        """
+        Delete documents by id; returns how many existed
+        They drop out of search at once. Storage only gets a tombstone
+        appended (persist=False skips even that; call persist() later), and
+        the dead rows are compacted away in the background
+        """
+        with self._index_lock:
+            deleted = [doc_id for doc_id in doc_ids if self._tombstone(doc_id)]
+        if deleted:
+            self.version += 1
+            if persist:
+                await asyncio.to_thread(self._write_tombstones, deleted)
+            self._maybe_compact()
+            logger.info(f"🪦 Deleted {len(deleted)} documents")
+        return len(deleted)
+    
+    async def delete_document(self, doc_id: str) -> bool:
+        """Delete one document; False if it does not exist"""
+        return await self.delete_documents([doc_id]) == 1
+    
+    async def update_document(
+        self,
+        doc_id: str,
+        content: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Optional[Document]:
+        """
+        Replace a document's content and/or metadata, keeping its id
+        The new version is appended to the index and the old row tombstoned;
+        storage gets the tombstone with the new version. Returns None if the
+        document does not exist
+        """
+        current = self.documents.get(doc_id)
+        if current is None:
+            return None
+        
+        content = current.content if content is None else content
+        doc = Document(
+            id=doc_id,
+            content=content,
+            metadata=current.metadata if metadata is None else metadata,
+            embedding=current.embedding,
+            embedding_model=current.embedding_model
+        )
+        if content != current.content:
+            doc.embedding_model = self.matrix.model
+            doc.embedding = (await asyncio.to_thread(self._embed, [content], doc.embedding_model))[0]
+        with self._index_lock:
+            if doc_id not in self.documents:
+                # Deleted while re-embedding
+                return None
+            self._index_document(doc)
+        self.version += 1
+        
+        await asyncio.to_thread(self._write_tombstones, [doc_id], doc)
+        self._maybe_compact()
+        logger.info(f"✏️ Document updated: {doc_id} ({len(content)} chars)")
+        return doc
+    
+    def _maybe_compact(self):
+        """Start a background compaction once enough of the matrix is dead"""
+        matrix = self.matrix
+        dead = matrix.dead_rows
+        if dead < self.compact_min_dead_rows or dead < self.compact_dead_fraction * len(matrix.vectors):
+            return
+        with self._index_lock:
+            if self._compacting:
+                return
+            self._compacting = True
+        threading.Thread(target=self._run_compaction, name="rag-compaction", daemon=True).start()
+    
+    def _run_compaction(self):
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"❌ RAG compaction failed: {str(e)}")
+        finally:
+            self._compacting = False
+    
+    def compact(self) -> int:
+        """
+        Drop dead rows from the embedding matrix and fold the tombstones into storage
+        Writers wait while the live rows are copied; queries keep searching
+        the old matrix until the new one is swapped in. Returns the rows dropped
+        """
+        start = time.perf_counter()
+        with self._index_lock:
+            matrix = self.matrix
+            self.matrix = matrix.compacted()
+            self.compactions += 1
+        dropped = len(matrix.vectors) - len(self.matrix.vectors)
+        swapped = time.perf_counter()
+        
+        self.persist()
+        logger.info(
+            f"🧹 Compacted RAG index: dropped {dropped} dead rows, {len(self.matrix.vectors)} live "
+            f"(swap {(swapped - start) * 1000:.1f}ms, persist {(time.perf_counter() - swapped) * 1000:.1f}ms)"
+        )
+        return dropped
+    
+    def persist(self):
+        """Write the document store to disk"""
+        self._save_documents()
+    
+    def register_embedder(self, model_id: str, embed: Callable[[List[str]], List[List[float]]]):
+        """
+        Make an embedding model available under model_id
+        If it is the configured model and the stored vectors come from another
+        one, a background migration to it starts
+        """
+        self.embedders[model_id] = embed
+        self.target_model = self._default_target()
+        if model_id == self.target_model:
+            self._migrate_to_target()
+    
+    def _default_target(self) -> str:
+        """
+        Model to converge on: the configured one, else the first registered
+        embedder that is not built in. Failing both, a store embedded by a
+        model not registered yet keeps it (its embedder may be registered later);
+        otherwise the hashing embedder replaces the mock
+        """
+        if self.configured_model:
+            return self.configured_model
+        registered = [model_id for model_id in self.embedders if model_id not in BUILTIN_EMBEDDING_MODELS]
+        if registered:
+            return registered[0]
+        if self.matrix.model not in BUILTIN_EMBEDDING_MODELS:
+            return self.matrix.model
+        return hashing_embedder.model_id
+    
+    def _embed(self, texts: List[str], model: Optional[str] = None) -> List[List[float]]:
+        """Embed a batch of texts with one model (the one being served by default)"""
+        return self.embedders[model or self.matrix.model](texts)
+    
+    @property
+    def embedding_model(self) -> str:
+        """Model of the vectors queries are currently served from"""
+        return self.matrix.model
+    
+    def _migrate_to_target(self):
+        """Start re-embedding into the configured model if any stored vector comes from another"""
+        if not self.is_initialized or self.target_model not in self.embedders:
+            return
+        if self.migration is not None and self.migration.state == "running":
+            return
+        if self.matrix.model != self.target_model or any(
+            doc.embedding_model != self.target_model for doc in list(self.documents.values())
+        ):
+            logger.info(f"🔁 Stored embeddings are not all {self.target_model}; migrating in the background")
+            self.start_migration(self.target_model, pin=False)
+    
+    def start_migration(
+        self,
+        model_id: str,
+        batch_size: int = MIGRATION_BATCH_SIZE,
+        rate: float = MIGRATION_RATE,
+        pin: bool = True
+    ) -> EmbeddingMigration:
+        """
+        Re-embed every document with model_id in the background
+        Runs in batches of batch_size, throttled to `rate` documents per
+        second. Queries keep using the current vectors until every document
+        has a model_id vector; then the index switches over at once.
+        pin keeps model_id the target when other embedders are registered later
+        """
+        if model_id not in self.embedders:
+            raise ValueError(f"Unknown embedding model: {model_id}")
+        if batch_size < 1 or rate <= 0:
+            raise ValueError("batch_size and rate must be positive")
+        with self._index_lock:
+            if self.migration is not None and self.migration.state == "running":
+                if self.migration.target == model_id:
+                    return self.migration
+                raise RuntimeError(f"A migration to {self.migration.target} is already running")
+            migration = EmbeddingMigration(target=model_id, batch_size=batch_size, rate=rate)
+            self.migration = migration
+            self.target_model = model_id
+            if pin:
+                self.configured_model = model_id
+        threading.Thread(target=self._run_migration, args=(migration,), name="rag-embedding-migration", daemon=True).start()
+        logger.info(f"🚚 Embedding migration to {model_id} started ({batch_size} per batch, {rate:.0f} docs/s)")
+        return migration
+    
+    def cancel_migration(self) -> bool:
+        """Stop a running migration; the current model keeps being served"""
+        migration = self.migration
+        if migration is None or migration.state != "running":
+            return False
+        migration.cancelled.set()
+        return True
+    
+    def _needs_embedding(self, doc: Document, migration: EmbeddingMigration) -> bool:
+        if doc.embedding_model == migration.target:
+            return False
+        entry = migration.vectors.get(doc.id)
+        # Documents updated since they were embedded need it again
+        return entry is None or entry[0] is not doc
+    
+    def _run_migration(self, migration: EmbeddingMigration):
+        try:
+            while not migration.cancelled.is_set():
+                with self._index_lock:
+                    pending = [doc for doc in self.documents.values() if self._needs_embedding(doc, migration)]
+                migration.total = migration.embedded + len(pending)
+                if not pending and self._switch_embeddings(migration):
+                    break
+                
+                for offset in range(0, len(pending), migration.batch_size):
+                    if migration.cancelled.is_set():
+                        break
+                    batch_start = time.perf_counter()
+                    batch = pending[offset:offset + migration.batch_size]
+                    for doc, vector in zip(batch, self._embed([doc.content for doc in batch], migration.target)):
+                        migration.vectors[doc.id] = (doc, vector)
+                    migration.embedded += len(batch)
+                    # Throttle so the migration leaves capacity for serving
+                    migration.cancelled.wait(max(0.0, len(batch) / migration.rate - (time.perf_counter() - batch_start)))
+            else:
+                migration.state = "cancelled"
+                self.target_model = self.matrix.model
+                if self.configured_model == migration.target:
+                    self.configured_model = self.matrix.model
+                logger.info(f"🛑 Embedding migration to {migration.target} cancelled at {migration.embedded}/{migration.total}")
+        except Exception as e:
+            migration.state, migration.error = "failed", str(e)
+            logger.error(f"❌ Embedding migration to {migration.target} failed: {str(e)}")
+        finally:
+            migration.finished_at = time.time()
+            migration.vectors.clear()
+    
+    def _switch_embeddings(self, migration: EmbeddingMigration) -> bool:
+        """
+        Atomically serve from the migrated vectors
+        Returns False if documents changed since the last batch, so the
+        migration needs another pass first
+        """
+        with self._index_lock:
+            if any(self._needs_embedding(doc, migration) for doc in self.documents.values()):
+                return False
+            matrix = EmbeddingMatrix(model=migration.target)
+            for doc in list(self.documents.values()):
+                if doc.embedding_model != migration.target:
+                    doc = replace(doc, embedding=migration.vectors[doc.id][1], embedding_model=migration.target)
+                    self.documents[doc.id] = doc
+                    self.embeddings_index[doc.id] = doc.embedding
+                matrix.append(doc)
+            previous, self.matrix = self.matrix.model, matrix
+            migration.state = "complete"
+        self.version += 1
+        
+        self.persist()
+        logger.info(f"✅ Switched RAG embeddings from {previous} to {migration.target} ({len(matrix.vectors)} documents)")
+        return True
+    
     def _generate_mock_embedding(self, text: str) -> List[float]:
         """Generate mock embedding (replace with actual Nexa SDK embedding)"""
         # Simple hash-based mock embedding
@@ -155,6 +657,56 @@ class LocalRAGService:
         
         return embedding[:384]
     
+    def _get_query_embedding(self, query: str, model: Optional[str] = None) -> List[float]:
+        """Query embedding, served from the cache when it was embedded recently"""
+        model = model or self.matrix.model
+        with self._query_lock:
+            embedding = self._query_embeddings.get((model, query))
+            if embedding is not None:
+                self._query_embeddings.move_to_end((model, query))
+                return embedding
+        return self._cache_query_embeddings([query], self._embed([query], model), model)[0]
+    
+    def _cache_query_embeddings(self, queries: List[str], embeddings: List[List[float]], model: str) -> List[List[float]]:
+        with self._query_lock:
+            for query, embedding in zip(queries, embeddings):
+                self._query_embeddings[(model, query)] = embedding
+                self._query_embeddings.move_to_end((model, query))
+            while len(self._query_embeddings) > self.query_cache_size:
+                self._query_embeddings.popitem(last=False)
+        return embeddings
+    
+    async def embed_queries(self, queries: List[str]) -> int:
+        """
+        Embed many queries in one batch ahead of retrieval
+        Returns the number of queries that were not already cached
+        """
+        model = self.matrix.model
+        with self._query_lock:
+            missing = [query for query in dict.fromkeys(queries) if (model, query) not in self._query_embeddings]
+        if missing:
+            self._cache_query_embeddings(missing, await asyncio.to_thread(self._embed, missing, model), model)
+        return len(missing)
+    
+    async def group_queries(self, queries: List[str], threshold: float = 0.9) -> List[List[int]]:
+        """
+        Group query indexes whose embeddings are similar enough to share one retrieval
+        All queries are embedded in one batch; each joins the first group whose
+        leader it matches at cosine >= threshold, or leads a new group
+        """
+        model = self.matrix.model
+        await self.embed_queries(queries)
+        embeddings = [self._get_query_embedding(query, model) for query in queries]
+        groups: List[List[int]] = []
+        for index, embedding in enumerate(embeddings):
+            for group in groups:
+                if self._calculate_similarity(embeddings[group[0]], embedding) >= threshold:
+                    group.append(index)
+                    break
+            else:
+                groups.append([index])
+        return groups
+    
     def _calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """Calculate cosine similarity between embeddings"""
         try:
@@ -172,6 +724,24 @@ class LocalRAGService:
         except:
             return 0.0
     
+    def _search(self, query: str, top_k: int) -> List[Tuple[Document, float]]:
+        """Top k live documents of the current matrix by cosine similarity to the query"""
+        # Embed the query with the model of the matrix being searched
+        matrix = self.matrix
+        live = matrix.live
+        query_embedding = self._get_query_embedding(query, matrix.model)
+        
+        # Calculate similarities over the live rows of the current matrix
+        similarities = []
+        for row, vector in enumerate(matrix.vectors):
+            doc = matrix.documents[row]
+            if vector and live.get(doc.id) == row:
+                similarity = self._calculate_similarity(query_embedding, vector)
+                similarities.append((doc, similarity))
+        
+        # Partial selection of the top k (cheap even for large candidate pools)
+        return heapq.nlargest(top_k, similarities, key=lambda x: x[1])
+    
     async def retrieve_documents(self, query: str, top_k: int = 5) -> List[Tuple[Document, float]]:
         """
         Retrieve most relevant documents for a query
@@ -181,19 +751,8 @@ class LocalRAGService:
                 logger.warning("⚠️ No documents in RAG system")
                 return []
             
-            # Generate query embedding
-            query_embedding = self._generate_mock_embedding(query)
-            
-            # Calculate similarities
-            similarities = []
-            for doc_id, doc in self.documents.items():
-                if doc.embedding:
-                    similarity = self._calculate_similarity(query_embedding, doc.embedding)
-                    similarities.append((doc, similarity))
-            
-            # Sort by similarity and return top k
-            similarities.sort(key=lambda x: x[1], reverse=True)
-            results = similarities[:top_k]
+            # Embedding and scanning are CPU-bound; keep them off the event loop
+            results = await asyncio.to_thread(self._search, query, top_k)
             
             logger.info(f"🔍 Retrieved {len(results)} documents for query: {query[:50]}...")
             return results
@@ -202,27 +761,77 @@ class LocalRAGService:
             logger.error(f"❌ Document retrieval failed: {str(e)}")
             return []
     
-    async def generate_answer(self, query: str, context_docs: List[Document]) -> str:
+    async def rerank_candidates(
+        self,
+        query: str,
+        candidates: List[Tuple[Document, float]],
+        batch_size: int = 16,
+        budget_s: Optional[float] = None
+    ) -> Tuple[List[Tuple[Document, float]], str]:
+        """
+        Rerank recalled candidates with the local reranker in batches
+        Stops early once the latency budget would be exceeded; candidates that
+        were not reranked keep their recall order behind the reranked ones
+        """
+        start = time.perf_counter()
+        scored: List[Tuple[float, int]] = []
+        batch_times: List[float] = []
+        status = "complete"
+        
+        for offset in range(0, len(candidates), batch_size):
+            if budget_s is not None:
+                elapsed = time.perf_counter() - start
+                expected = sum(batch_times) / len(batch_times) if batch_times else 0.0
+                if elapsed + expected > budget_s:
+                    status = "truncated" if scored else "skipped"
+                    break
+            
+            batch = candidates[offset:offset + batch_size]
+            batch_start = time.perf_counter()
+            response = await local_ai_service.rerank_documents(query, [doc.content for doc, _ in batch])
+            batch_times.append(time.perf_counter() - batch_start)
+            
+            if not response.success:
+                status = "failed" if not scored else "truncated"
+                break
+            
+            for index, _, score in response.metadata["ranked_documents"]:
+                scored.append((score, offset + index))
+        
+        scored.sort(key=lambda x: x[0], reverse=True)
+        reranked_positions = {position for _, position in scored}
+        ordered = [candidates[position] for _, position in scored]
+        ordered.extend(c for position, c in enumerate(candidates) if position not in reranked_positions)
+        
+        logger.info(f"🔄 Reranked {len(scored)}/{len(candidates)} candidates ({status}) in {(time.perf_counter() - start) * 1000:.1f}ms")
+        return ordered, status
+    
+    def pack_documents(
+        self,
+        query: str,
+        context_docs: List[Document],
+        scores: Optional[List[float]] = None,
+        max_context_tokens: Optional[int] = None
+    ) -> PackedContext:
+        """Pack the most relevant, non-redundant documents into the answer prompt's token budget"""
+        if scores is None:
+            # Documents are already in relevance order
+            scores = [float(len(context_docs) - i) for i in range(len(context_docs))]
+        budget = context_budget(ANSWER_PROMPT.format(query=query, context=""), ANSWER_MAX_TOKENS, limit=max_context_tokens)
+        return pack_context([(doc.content, score) for doc, score in zip(context_docs, scores)], budget, label="Document {}:")
+    
+    async def generate_answer(self, query: str, context_docs: List[Document], packed: Optional[PackedContext] = None) -> str:
         """
         Generate answer using retrieved context
         """
         try:
             # Build context from retrieved documents
-            context = "\n\n".join([
-                f"Document {i+1}:\n{doc.content[:500]}..."
-                for i, doc in enumerate(context_docs)
-            ])
+            if packed is None:
+                packed = self.pack_documents(query, context_docs)
+            context = packed.text
             
             # Create prompt for local AI
-            prompt = f"""
-Based on the following context documents, please answer the question: {query}
-
-Context:
-{context}
-
-Please provide a comprehensive answer based on the context provided. If the context doesn't contain enough information, mention that.
-
-Answer:"""
+            prompt = ANSWER_PROMPT.format(query=query, context=context)
             
             # TODO: Integrate with local AI service for actual generation
             # For now, return a structured response
@@ -247,10 +856,33 @@ The context contains {len(context_docs)} relevant documents that provide informa
             logger.error(f"❌ Answer generation failed: {str(e)}")
             return f"I apologize, but I encountered an error while generating an answer: {str(e)}"
     
-    async def query(self, question: str, top_k: int = 5) -> RAGResult:
+    async def query(
+        self,
+        question: str,
+        top_k: int = 5,
+        rerank: bool = False,
+        candidate_k: int = RERANK_CANDIDATE_K,
+        rerank_batch_size: int = 16,
+        rerank_budget_ms: Optional[float] = 250.0,
+        max_context_tokens: Optional[int] = None,
+        candidates: Optional[List[Tuple[Document, float]]] = None,
+        answer: bool = True
+    ) -> RAGResult:
         """
         Main RAG query function
+        With rerank enabled, a larger candidate pool is recalled by cosine
+        similarity and reranked within rerank_budget_ms (timed from the start
+        of reranking, not of the query) before the best
+        top_k documents are passed to generation. Their text is packed into
+        the prompt's token budget (capped by max_context_tokens).
+        candidates, when given, replaces the recall step (e.g. one recall
+        shared by similar questions); reranking and the answer still use question.
+        With answer=False the result stops at the packed context, for callers
+        that generate from the sources themselves
         """
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+        
         try:
             if not self.is_initialized:
                 return RAGResult(
@@ -261,31 +893,82 @@ The context contains {len(context_docs)} relevant documents that provide informa
                     error="RAG service not initialized"
                 )
             
-            # Retrieve relevant documents
-            retrieved_docs = await self.retrieve_documents(question, top_k)
+            # Retrieve relevant documents (stage 1: vector recall)
+            recall_k = max(candidate_k, top_k) if rerank else top_k
+            if candidates is not None:
+                retrieved_docs = list(candidates[:recall_k])
+            else:
+                with tracer.span("rag.retrieve", recall_k=recall_k) as span:
+                    retrieved_docs = await self.retrieve_documents(question, recall_k)
+                    span.set_attribute("documents", len(retrieved_docs))
+            timings["retrieval_ms"] = (time.perf_counter() - start) * 1000
             
             if not retrieved_docs:
+                timings["total_ms"] = (time.perf_counter() - start) * 1000
                 return RAGResult(
                     success=True,
-                    answer="I couldn't find any relevant documents to answer your question. Please try rephrasing your query or add more documents to the knowledge base.",
+                    answer="I couldn't find any relevant documents to answer your question. Please try rephrasing your query or add more documents to the knowledge base." if answer else "",
                     sources=[],
-                    confidence=0.0
+                    confidence=0.0,
+                    timings=timings
                 )
             
+            # Stage 2: rerank the candidate pool within the latency budget
+            rerank_status = "disabled"
+            if rerank and len(retrieved_docs) > 1:
+                # The budget covers reranking alone; retrieval time is not charged to it
+                budget_s = rerank_budget_ms / 1000 if rerank_budget_ms is not None else None
+                    
+                # Never spend past the request deadline on reranking
+                left = remaining()
+                if left is not None:
+                    budget_s = left if budget_s is None else min(budget_s, left)
+                    
+                if budget_s is not None and budget_s <= 0:
+                    rerank_status = "skipped"
+                else:
+                    rerank_start = time.perf_counter()
+                    with tracer.span("rag.rerank", candidates=len(retrieved_docs)) as span:
+                        retrieved_docs, rerank_status = await self.rerank_candidates(
+                            question, retrieved_docs, rerank_batch_size, budget_s
+                        )
+                        span.set_attribute("status", rerank_status)
+                    timings["rerank_ms"] = (time.perf_counter() - rerank_start) * 1000
+            
+            retrieved_docs = retrieved_docs[:top_k]
+            
             # Extract documents and calculate average confidence
             docs = [doc for doc, score in retrieved_docs]
-            avg_confidence = sum(score for _, score in retrieved_docs) / len(retrieved_docs)
+            scores = [score for _, score in retrieved_docs]
+            avg_confidence = sum(scores) / len(scores)
             
-            # Generate answer
-            answer = await self.generate_answer(question, docs)
+            # Generate answer; past the deadline, degrade to the retrieved sources
+            generation_start = time.perf_counter()
+            packed = self.pack_documents(question, docs, scores, max_context_tokens)
+            degraded = False
+            text = ""
+            if answer:
+                try:
+                    with tracer.span("rag.generate_answer", documents=len(docs), context_tokens=packed.tokens_used):
+                        text = await within_deadline(self.generate_answer(question, docs, packed), "rag_generation")
+                except DeadlineExceeded:
+                    logger.warning(f"⏱️ RAG generation skipped at deadline, returning sources only: {question[:50]}...")
+                    degraded = True
+                timings["generation_ms"] = (time.perf_counter() - generation_start) * 1000
+            timings["total_ms"] = (time.perf_counter() - start) * 1000
             
             logger.info(f"✅ RAG query completed: {question[:50]}... (confidence: {avg_confidence:.2f})")
             
             return RAGResult(
                 success=True,
-                answer=answer,
+                answer=text,
                 sources=docs,
-                confidence=avg_confidence
+                confidence=avg_confidence,
+                timings=timings,
+                rerank_status=rerank_status,
+                degraded=degraded,
+                scores=scores,
+                context=packed.report()
             )
             
         except Exception as e:
@@ -295,16 +978,32 @@ The context contains {len(context_docs)} relevant documents that provide informa
                 answer="",
                 sources=[],
                 confidence=0.0,
-                error=str(e)
+                error=str(e),
+                timings=timings
             )
     
+    @property
+    def state_version(self) -> Tuple:
+        """Cheap token that changes whenever get_stats would"""
+        migration = self.migration
+        return (self.version, len(self.matrix.vectors), self.compactions,
+                migration and (migration.state, migration.embedded, migration.total))
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get RAG service statistics"""
+        matrix = self.matrix
         return {
             "initialized": self.is_initialized,
             "total_documents": len(self.documents),
             "storage_path": str(self.storage_path),
             "embeddings_count": len(self.embeddings_index),
+            "index_rows": len(matrix.vectors),
+            "dead_rows": matrix.dead_rows,
+            "dead_fraction": matrix.dead_rows / len(matrix.vectors) if matrix.vectors else 0.0,
+            "compactions": self.compactions,
+            "embedding_model": matrix.model,
+            "target_embedding_model": self.target_model,
+            "migration": self.migration.to_dict() if self.migration else None,
             "avg_doc_length": sum(len(doc.content) for doc in self.documents.values()) / len(self.documents) if self.documents else 0
         }
     
@@ -338,21 +1037,83 @@ The context contains {len(context_docs)} relevant documents that provide informa
 rag_service = LocalRAGService()
 
 # Async interface functions
-async def query_rag(question: str, top_k: int = 5) -> Dict[str, Any]:
-    """Query the RAG system"""
-    result = await rag_service.query(question, top_k)
+def _result_dict(result: RAGResult, full_content: bool = False) -> Dict[str, Any]:
+    """JSON-ready result; sources carry 200-character previews unless full_content"""
     return {
         "success": result.success,
         "answer": result.answer,
-        "sources": [{"id": doc.id, "content": doc.content[:200] + "...", "metadata": doc.metadata} for doc in result.sources],
+        "sources": [
+            {"id": doc.id, "content": doc.content if full_content else doc.content[:200] + "...", "metadata": doc.metadata, "score": score}
+            for doc, score in zip(result.sources, result.scores)
+        ],
         "confidence": result.confidence,
-        "error": result.error
+        "error": result.error,
+        "timings": result.timings,
+        "rerank": result.rerank_status,
+        "degraded": result.degraded,
+        "context": result.context
     }
 
+async def query_rag(question: str, top_k: int = 5, full_content: bool = False, **kwargs) -> Dict[str, Any]:
+    """
+    Query the RAG system (pass rerank=True for two-stage retrieval)
+    full_content returns whole source passages, e.g. to pack them into a prompt
+    """
+    return _result_dict(await rag_service.query(question, top_k, **kwargs), full_content)
+
+async def query_rag_shared(questions: List[str], top_k: int = 5, threshold: float = 0.9, full_content: bool = False, **kwargs) -> List[Dict[str, Any]]:
+    """
+    Retrieve context for many questions at once, without generating answers
+    Questions similar enough to each other share the recall of the first of
+    them (retrieval_query); each question is still reranked and packed on
+    its own. Results are in question order, with an empty answer
+    """
+    groups = await rag_service.group_queries(questions, threshold)
+    recall_k = max(kwargs.get("candidate_k", RERANK_CANDIDATE_K), top_k) if kwargs.get("rerank") else top_k
+    recalled = await asyncio.gather(*(rag_service.retrieve_documents(questions[group[0]], recall_k) for group in groups))
+    
+    group_of = {index: position for position, group in enumerate(groups) for index in group}
+    results = await asyncio.gather(*(
+        rag_service.query(question, top_k, candidates=recalled[group_of[index]], answer=False, **kwargs)
+        for index, question in enumerate(questions)
+    ))
+    shared = []
+    for index, (question, result) in enumerate(zip(questions, results)):
+        group = groups[group_of[index]]
+        shared.append({**_result_dict(result, full_content), "query": question,
+                       "retrieval_query": questions[group[0]], "shared_by": len(group)})
+    logger.info(f"🔗 Context for {len(questions)} queries from {len(groups)} shared retrievals")
+    return shared
+
 async def add_document_to_rag(content: str, metadata: Optional[Dict[str, Any]] = None) -> str:
     """Add document to RAG system"""
     return await rag_service.add_document(content, metadata)
 
+def get_embedding_status() -> Dict[str, Any]:
+    """Embedding model being served, the models available and migration progress"""
+    return {
+        "model": rag_service.embedding_model,
+        "target": rag_service.target_model,
+        "available": sorted(rag_service.embedders),
+        "migration": rag_service.migration.to_dict() if rag_service.migration else None
+    }
+
+def start_embedding_migration(model_id: str, **kwargs) -> Dict[str, Any]:
+    """Start re-embedding the RAG store with another model in the background"""
+    return rag_service.start_migration(model_id, **kwargs).to_dict()
+
+def cancel_embedding_migration() -> bool:
+    """Stop the running embedding migration"""
+    return rag_service.cancel_migration()
+
+async def delete_document_from_rag(doc_id: str) -> bool:
+    """Delete a document from the RAG system"""
+    return await rag_service.delete_document(doc_id)
+
+async def update_document_in_rag(doc_id: str, content: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None) -> Optional[Document]:
+    """Update a document in the RAG system"""
+    return await rag_service.update_document(doc_id, content, metadata)
+
 def get_rag_stats() -> Dict[str, Any]:
     """Get RAG service statistics"""
     return rag_service.get_stats()
@@ -0,0 +1,75 @@
+"""
+Request Deadline Propagation
+Carries the deadline of the current AI request through every service call
+via a context variable, so work can be skipped, degraded or cancelled once
+the caller can no longer use the result
+"""
+
+import time
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Optional
+
+# Absolute deadline on the time.monotonic() clock, None when unbounded
+_current_deadline: ContextVar[Optional[float]] = ContextVar("ai_request_deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    """Raised when work cannot finish before the request deadline"""
+    
+    def __init__(self, step: str):
+        super().__init__(f"Deadline exceeded during {step}")
+        self.step = step
+
+def deadline_from_timeout(timeout_ms: Optional[float]) -> Optional[float]:
+    """Absolute deadline for a relative timeout in milliseconds"""
+    return time.monotonic() + timeout_ms / 1000 if timeout_ms else None
+
+def current_deadline() -> Optional[float]:
+    return _current_deadline.get()
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (None when unbounded)"""
+    deadline = _current_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+@contextmanager
+def deadline_scope(deadline: Optional[float]):
+    """Apply a deadline to the enclosed block (an enclosing, earlier deadline still wins)"""
+    outer = _current_deadline.get()
+    if deadline is None or (outer is not None and outer <= deadline):
+        yield outer
+        return
+        
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+async def within_deadline(awaitable: Awaitable[Any], step: str, grace: float = 0.0) -> Any:
+    """
+    Await with the time left on the current deadline; cancels the work when it runs out
+    A grace period lets inner steps hit the deadline first and return partial results
+    """
+    left = remaining()
+    if left is not None:
+        left += grace
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        # Never started: discard the work without awaiting it
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        elif asyncio.isfuture(awaitable):
+            awaitable.cancel()
+        raise DeadlineExceeded(step)
+        
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(step)
@@ -0,0 +1,206 @@
+"""
+Tracing Service
+Lightweight span tracing for the local AI pipeline. Spans nest through a
+context variable, are timed with the monotonic clock and are exported in an
+OpenTelemetry-like shape to an in-memory ring and optionally a JSONL file
+"""
+
+import os
+import atexit
+import time
+import random
+import threading
+from collections import deque, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Any, Optional, Deque
+import logging
+
+try:
+    from .jsonCodec import dumps
+except ImportError:
+    # Handle relative imports when running as script
+    import sys
+    sys.path.append(os.path.dirname(__file__))
+    
+    from jsonCodec import dumps
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Fraction of new traces that are recorded (child spans follow their root)
+TRACE_SAMPLE_RATE = float(os.environ.get("AI_TRACE_SAMPLE_RATE", "0.1"))
+# JSONL file that finished spans are appended to (ring buffer only when unset)
+TRACE_EXPORT_PATH = os.environ.get("AI_TRACE_FILE")
+TRACE_RING_SIZE = int(os.environ.get("AI_TRACE_RING_SIZE", "2048"))
+
+# Wall-clock anchor so monotonic span times can be reported as unix nanoseconds
+_EPOCH_NS = time.time_ns() - time.monotonic_ns()
+
+class Span:
+    """A timed operation within a trace"""
+    
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "status", "status_message")
+    
+    recording = True
+    
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.monotonic_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "UNSET"
+        self.status_message: Optional[str] = None
+    
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+    
+    def set_error(self, error: BaseException):
+        self.status = "ERROR"
+        self.status_message = f"{type(error).__name__}: {error}"
+    
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.monotonic_ns()
+        return (end - self.start_ns) / 1e6
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": _EPOCH_NS + self.start_ns,
+            "endTimeUnixNano": _EPOCH_NS + (self.end_ns or self.start_ns),
+            "durationMs": self.duration_ms,
+            "attributes": self.attributes,
+            "status": {"code": f"STATUS_CODE_{self.status}", **({"message": self.status_message} if self.status_message else {})}
+        }
+
+class _NonRecordingSpan:
+    """Stand-in for spans of unsampled traces; keeps the sampling decision for children"""
+    
+    recording = False
+    
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.span_id = None
+    
+    def set_attribute(self, key: str, value: Any):
+        pass
+    
+    def set_error(self, error: BaseException):
+        pass
+
+_current_span: ContextVar[Optional[Any]] = ContextVar("ai_current_span", default=None)
+
+class Tracer:
+    """
+    Creates spans and exports the finished ones
+    The sampling decision is made once per trace at its root span, so an
+    unsampled request costs one context variable lookup per span
+    """
+    
+    def __init__(self, sample_rate: float = TRACE_SAMPLE_RATE, export_path: Optional[str] = TRACE_EXPORT_PATH,
+                 ring_size: int = TRACE_RING_SIZE):
+        self.sample_rate = sample_rate
+        self.export_path = export_path
+        self.spans: Deque[Span] = deque(maxlen=ring_size)
+        self.exported = 0
+        self._file = None
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Record the enclosed block as a child of the current span (or as a new trace)"""
+        parent = _current_span.get()
+        if parent is None:
+            trace_id = f"{random.getrandbits(128):032x}"
+            sampled = random.random() < self.sample_rate
+        else:
+            trace_id = parent.trace_id
+            sampled = parent.recording
+            
+        span = Span(name, trace_id, parent.span_id if parent else None, attributes) if sampled else _NonRecordingSpan(trace_id)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            if sampled:
+                span.end_ns = time.monotonic_ns()
+                if span.status == "UNSET":
+                    span.status = "OK"
+                self._export(span, root=parent is None)
+    
+    def _export(self, span: Span, root: bool):
+        with self._lock:
+            self.spans.append(span)
+            self.exported += 1
+            if not self.export_path:
+                return
+            try:
+                if self._file is None:
+                    self._file = open(self.export_path, 'ab')
+                self._file.write(dumps(span.to_dict()) + b"\n")
+                if root:
+                    self._file.flush()
+            except Exception as e:
+                logger.error(f"❌ Trace export to {self.export_path} failed: {str(e)}")
+                self.export_path = None
+    
+    def recent_traces(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Most recent traces in the ring, newest first, with spans in start order"""
+        with self._lock:
+            spans = list(self.spans)
+            
+        traces: "OrderedDict[str, List[Span]]" = OrderedDict()
+        for span in reversed(spans):
+            if span.trace_id not in traces:
+                if len(traces) == limit:
+                    continue
+                traces[span.trace_id] = []
+            traces[span.trace_id].append(span)
+            
+        result = []
+        for trace_id, trace_spans in traces.items():
+            trace_spans.sort(key=lambda s: s.start_ns)
+            root = next((s for s in trace_spans if s.parent_id is None), trace_spans[0])
+            result.append({
+                "traceId": trace_id,
+                "root": root.name,
+                "durationMs": root.duration_ms,
+                "spans": [s.to_dict() for s in trace_spans]
+            })
+        return result
+    
+    def shutdown(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+def current_span():
+    """Span of the running operation (None outside any trace)"""
+    return _current_span.get()
+
+# Global tracer instance
+tracer = Tracer()
+atexit.register(tracer.shutdown)
+
+def get_recent_traces(limit: int = 20) -> Dict[str, Any]:
+    """Recent traces for the debug endpoint"""
+    return {
+        "sample_rate": tracer.sample_rate,
+        "export_path": tracer.export_path,
+        "spans_exported": tracer.exported,
+        "traces": tracer.recent_traces(limit)
+    }
@@ -0,0 +1,89 @@
+"""
+Test configuration
+The services and routes are imported the way the scripts import them: by
+module name, with src/services and src/routes on sys.path. Factories for
+stores, queues, crawlers and orchestrators, the polling helper and the two
+app clients are shared as fixtures
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, os.path.join(ROOT, 'src', 'services'))
+sys.path.insert(0, os.path.join(ROOT, 'src', 'routes'))
+
+@pytest.fixture
+def wait_until():
+    """Poll predicate until it holds, failing after timeout seconds"""
+    def wait(predicate, timeout: float = 5.0):
+        end = time.monotonic() + timeout
+        while not predicate():
+            assert time.monotonic() < end, "timed out"
+            time.sleep(0.01)
+    return wait
+
+@pytest.fixture
+def make_store(tmp_path):
+    """
+    LocalRAGService factory, in tmp_path unless given a path; calling it again simulates a restart
+    Keyword arguments are set as attributes of the new store
+    """
+    from ragService import LocalRAGService
+    
+    def make(path=None, **attributes):
+        rag = LocalRAGService(storage_path=str(path or tmp_path))
+        for name, value in attributes.items():
+            setattr(rag, name, value)
+        return rag
+    return make
+
+@pytest.fixture
+def make_queue(tmp_path):
+    """JobQueue factory sharing one database in tmp_path; every queue is shut down afterwards"""
+    from jobQueue import JobQueue
+    queues = []
+    
+    def make(**kwargs):
+        queue = JobQueue(db_path=str(tmp_path / "jobs.db"), poll_interval=0.05, **kwargs)
+        queues.append(queue)
+        return queue
+    yield make
+    for queue in queues:
+        queue.shutdown()
+
+@pytest.fixture
+def make_crawler(tmp_path, make_store):
+    """DirectoryCrawler factory over a store in tmp_path/rag"""
+    from directoryCrawler import DirectoryCrawler
+    return lambda: DirectoryCrawler(rag=make_store(tmp_path / "rag"))
+
+@pytest.fixture
+def make_orchestrator():
+    """LocalAIOrchestrator factory whose requests are handled by route instead of the services"""
+    from aiOrchestrator import LocalAIOrchestrator
+    
+    def make(route, **kwargs):
+        orchestrator = LocalAIOrchestrator(**kwargs)
+        orchestrator._route_request = route
+        return orchestrator
+    return make
+
+@pytest.fixture
+def flask_client():
+    flask = pytest.importorskip("flask")
+    import ai_routes
+    app = flask.Flask(__name__)
+    ai_routes.register_ai_routes(app)
+    return app.test_client()
+
+@pytest.fixture
+def asgi_client():
+    pytest.importorskip("starlette")
+    pytest.importorskip("httpx")
+    from starlette.testclient import TestClient
+    import ai_asgi
+    return TestClient(ai_asgi.app)
@@ -0,0 +1,108 @@
+"""
+Admission control: per-type concurrency limits with bounded queues, and
+HTTP 429 with Retry-After from both apps when a request is shed
+"""
+
+import asyncio
+
+import pytest
+
+from aiOrchestrator import AdmissionGate, AdmissionRejected, orchestrator
+
+def test_gate_queues_past_the_limit_and_hands_slots_over():
+    gate = AdmissionGate("generate", limit=1, max_queue=4)
+    order = []
+    
+    async def worker(name):
+        await gate.acquire()
+        order.append(name)
+        await asyncio.sleep(0.01)
+        gate.release(0.01)
+    
+    async def main():
+        await asyncio.gather(*(worker(name) for name in "abc"))
+        
+    asyncio.run(main())
+    assert order == ["a", "b", "c"]
+    assert gate.active == 0 and gate.admitted == 3 and gate.shed == 0
+
+def test_gate_sheds_when_the_queue_is_full():
+    gate = AdmissionGate("generate", limit=1, max_queue=1)
+    
+    async def main():
+        await gate.acquire()
+        queued = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await gate.acquire()
+        gate.release()
+        await queued
+        gate.release()
+        return rejected.value
+        
+    error = asyncio.run(main())
+    assert error.reason == "queue_full"
+    assert error.retry_after >= 1
+    assert gate.shed == 1 and gate.active == 0
+
+def test_gate_sheds_when_the_predicted_wait_is_too_long():
+    gate = AdmissionGate("generate", limit=1, max_wait=1.0)
+    gate.service_time = 5.0
+    
+    async def main():
+        await gate.acquire()
+        try:
+            with pytest.raises(AdmissionRejected) as rejected:
+                await gate.acquire()
+        finally:
+            gate.release()
+        return rejected.value
+        
+    error = asyncio.run(main())
+    assert error.reason == "deadline"
+    assert error.retry_after == 5.0
+
+def test_cancelled_waiter_leaves_the_queue():
+    gate = AdmissionGate("generate", limit=1, max_queue=4)
+    
+    async def main():
+        await gate.acquire()
+        waiter = asyncio.ensure_future(gate.acquire())
+        await asyncio.sleep(0)
+        assert gate.get_status()["queued"] == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        gate.release()
+        
+    asyncio.run(main())
+    status = gate.get_status()
+    assert status["active"] == 0 and status["queued"] == 0
+
+@pytest.fixture
+def saturated(monkeypatch):
+    """A generate gate that is busy and has no room to queue"""
+    gate = AdmissionGate("generate", limit=1, max_queue=0)
+    gate.active = 1
+    gate.service_time = 3.0
+    monkeypatch.setitem(orchestrator.admission, "generate", gate)
+    return gate
+
+def test_flask_sheds_with_429_and_retry_after(flask_client, saturated):
+    response = flask_client.post('/api/ai/generate', json={"prompt": "Write about local AI"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+    assert response.get_json()["reason"] == "queue_full"
+    assert saturated.shed == 1
+
+def test_asgi_sheds_with_429_and_retry_after(asgi_client, saturated):
+    response = asgi_client.post('/api/ai/generate', json={"prompt": "Write about local AI"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "3"
+    assert response.json()["reason"] == "queue_full"
+    assert saturated.shed == 1
+
+@pytest.mark.parametrize("timeout_ms", [0, -5, "soon", True, float("inf")])
+def test_malformed_timeout_is_rejected_with_400(flask_client, timeout_ms):
+    response = flask_client.post('/api/ai/generate', json={"prompt": "Write about local AI", "timeout_ms": timeout_ms})
+    assert response.status_code == 400
+    assert "timeout_ms" in response.get_json()["error"]
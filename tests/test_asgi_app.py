@@ -0,0 +1,54 @@
+"""
+ASGI app: the native ASGI routes answer like the Flask blueprint, with the
+same validation errors, status codes and bodies
+"""
+
+import pytest
+
+def body(response):
+    # Flask test responses and httpx responses decode JSON differently
+    return response.get_json() if hasattr(response, "get_json") else response.json()
+
+def post(client, path, payload=None, raw=None, headers=None):
+    if raw is not None:
+        # The Flask test client takes a raw body as data, httpx as content
+        key = "data" if hasattr(client, "application") else "content"
+        return client.post(path, **{key: raw}, headers={"Content-Type": "application/json", **(headers or {})})
+    return client.post(path, json=payload, headers=headers or {})
+
+@pytest.fixture
+def clients(flask_client, asgi_client):
+    return flask_client, asgi_client
+
+def test_generate_answers_alike(clients):
+    responses = [post(client, "/api/ai/generate", {"prompt": "Write a summary of local AI", "max_tokens": 50}) for client in clients]
+    assert [response.status_code for response in responses] == [200, 200]
+    flask_body, asgi_body = (body(response) for response in responses)
+    assert flask_body["success"] and asgi_body["success"]
+    assert set(flask_body) == set(asgi_body)
+    assert flask_body["text"] == asgi_body["text"]
+
+@pytest.mark.parametrize("path, payload, raw, headers, error", [
+    ("/api/ai/generate", None, b"{not json", None, "JSON data required"),
+    ("/api/ai/generate", {"max_tokens": 50}, None, None, "Prompt required"),
+    ("/api/ai/generate", {"prompt": "local AI"}, None, {"X-Request-Timeout-Ms": "soon"}, None),
+    ("/api/ai/rag/query", {"top_k": 3}, None, None, "Query required")
+])
+def test_invalid_requests_are_rejected_alike(clients, path, payload, raw, headers, error):
+    for client in clients:
+        response = post(client, path, payload, raw, headers)
+        assert response.status_code == 400
+        assert body(response)["success"] is False
+        if error:
+            assert body(response)["error"] == error
+
+def test_unknown_job_is_not_found_on_both(clients):
+    for client in clients:
+        response = client.get("/api/ai/jobs/no-such-job")
+        assert response.status_code == 404
+        assert body(response) == {"success": False, "error": "Job not found"}
+
+def test_capabilities_are_identical(clients):
+    flask_response, asgi_response = (client.get("/api/ai/capabilities", headers={"Accept-Encoding": "identity"}) for client in clients)
+    assert body(flask_response) == body(asgi_response)
+    assert flask_response.headers["ETag"] == asgi_response.headers["ETag"]
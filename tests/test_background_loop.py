@@ -0,0 +1,77 @@
+"""
+Background event loop: every request thread runs its coroutines on one
+long-lived loop, in the caller's context, and work a caller gives up on is
+cancelled
+"""
+
+import time
+import asyncio
+import threading
+import contextvars
+import concurrent.futures
+
+import pytest
+
+from ai_common import BackgroundEventLoop
+
+REQUEST_ID = contextvars.ContextVar("request_id", default=None)
+
+@pytest.fixture
+def loop():
+    loop = BackgroundEventLoop(name="test-event-loop")
+    yield loop
+    loop.shutdown()
+
+async def current_loop():
+    return asyncio.get_running_loop(), threading.current_thread().name
+
+def test_request_threads_share_one_loop(loop):
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: loop.run(current_loop()), range(8)))
+    assert len({id(running) for running, _ in results}) == 1
+    assert {thread for _, thread in results} == {"test-event-loop"}
+
+def test_requests_overlap_on_the_loop(loop):
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda _: loop.run(asyncio.sleep(0.1)), range(4)))
+    assert time.perf_counter() - start < 0.3
+
+def test_coroutines_run_in_the_caller_context(loop):
+    async def read():
+        return REQUEST_ID.get()
+        
+    token = REQUEST_ID.set("request-1")
+    try:
+        assert loop.run(read()) == "request-1"
+    finally:
+        REQUEST_ID.reset(token)
+
+def test_abandoned_work_is_cancelled(loop):
+    cancelled = threading.Event()
+    
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+            
+    with pytest.raises(concurrent.futures.TimeoutError):
+        loop.run(slow(), timeout=0.05)
+    assert cancelled.wait(1)
+
+def test_errors_reach_the_caller_and_the_loop_survives(loop):
+    async def fail():
+        raise ValueError("bad request")
+        
+    with pytest.raises(ValueError):
+        loop.run(fail())
+    assert loop.run(asyncio.sleep(0, result="ok")) == "ok"
+
+def test_shutdown_stops_the_thread_and_a_later_run_restarts_it(loop):
+    loop.run(asyncio.sleep(0))
+    thread = loop._thread
+    loop.shutdown()
+    assert not thread.is_alive() and not loop.running
+    assert loop.run(asyncio.sleep(0, result="restarted")) == "restarted"
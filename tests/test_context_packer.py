@@ -0,0 +1,52 @@
+"""
+Context packing: passages go in by relevance, near-duplicates are dropped,
+and the packed context never exceeds its token budget
+"""
+
+import pytest
+
+from contextPacker import context_budget, count_tokens, pack_context
+
+def passage(topic: str, words: int = 40) -> str:
+    return " ".join(f"{topic}{i}" for i in range(words))
+
+def test_passages_are_packed_by_relevance():
+    candidates = [(passage("low"), 0.1), (passage("high"), 0.9), (passage("mid"), 0.5)]
+    packed = pack_context(candidates, budget=10_000)
+    assert packed.sources == [1, 2, 0]
+    assert packed.text.startswith("high0")
+    assert packed.tokens_saved == 0
+
+def test_near_duplicates_are_dropped():
+    text = passage("privacy")
+    packed = pack_context([(text, 0.9), (text + " again", 0.8), (passage("costs"), 0.7)], budget=10_000)
+    assert packed.sources == [0, 2]
+    assert packed.dropped_duplicates == 1
+
+@pytest.mark.parametrize("budget", [40, 75, 130, 200])
+def test_packed_context_stays_within_the_budget(budget):
+    candidates = [(passage(topic, 30), score) for topic, score in (("a", 0.9), ("b", 0.8), ("c", 0.7), ("d", 0.6))]
+    packed = pack_context(candidates, budget=budget, min_passage_tokens=8, label="[Source {}]")
+    assert packed.tokens_used <= budget
+    assert count_tokens(packed.text) <= budget
+    assert packed.passages[0].startswith("[Source 1]\n")
+
+def test_a_passage_that_does_not_fit_is_truncated_at_a_word_boundary():
+    first, second = passage("first", 20), passage("second", 100)
+    packed = pack_context([(first, 0.9), (second, 0.8)], budget=count_tokens(first) + 50, min_passage_tokens=8)
+    assert packed.truncated == 1
+    cut = packed.passages[1]
+    assert second.startswith(cut) and second[len(cut)] == " "
+    assert packed.tokens_saved > 0
+
+def test_a_passage_with_too_little_room_left_is_skipped():
+    first = passage("first", 20)
+    packed = pack_context([(first, 0.9), (passage("second", 100), 0.8)], budget=count_tokens(first) + 10, min_passage_tokens=32)
+    assert packed.sources == [0]
+    assert packed.dropped_over_budget == 1
+
+def test_context_budget_leaves_room_for_the_prompt_and_answer():
+    prompt = "Write about local AI"
+    assert context_budget(prompt, max_tokens=500, context_window=4096) == 4096 - 500 - count_tokens(prompt)
+    assert context_budget(prompt, max_tokens=500, context_window=4096, limit=100) == 100
+    assert context_budget(prompt, max_tokens=5000, context_window=4096) == 0
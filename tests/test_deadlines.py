@@ -0,0 +1,103 @@
+"""
+Deadline propagation: work past the request deadline is cancelled or
+skipped, and RAG degrades to its retrieved sources instead of failing
+"""
+
+import time
+import asyncio
+
+import pytest
+
+from requestDeadline import DeadlineExceeded, deadline_scope, remaining, within_deadline
+from aiOrchestrator import AIRequest, AIResponse
+from ai_common import DEFAULT_REQUEST_TIMEOUT_MS, parse_batch_requests
+
+def test_earlier_enclosing_deadline_wins():
+    now = time.monotonic()
+    with deadline_scope(now + 1):
+        with deadline_scope(now + 10):
+            assert remaining() <= 1
+        with deadline_scope(now + 0.5):
+            assert remaining() <= 0.5
+    assert remaining() is None
+
+def test_work_past_the_deadline_is_cancelled():
+    cancelled = []
+    
+    async def slow():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+    
+    async def main():
+        with deadline_scope(time.monotonic() + 0.02):
+            await within_deadline(slow(), "slow_step")
+            
+    with pytest.raises(DeadlineExceeded) as exceeded:
+        asyncio.run(main())
+    assert exceeded.value.step == "slow_step"
+    assert cancelled == [True]
+
+def test_work_is_not_started_once_the_deadline_has_passed():
+    started = []
+    
+    async def step():
+        started.append(True)
+    
+    async def main():
+        with deadline_scope(time.monotonic() - 1):
+            await within_deadline(step(), "late_step")
+            
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(main())
+    assert started == []
+
+def test_rag_query_degrades_to_sources_at_the_deadline(make_store, monkeypatch):
+    rag = make_store()
+    
+    async def slow_answer(*args, **kwargs):
+        await asyncio.sleep(1)
+        return "too late"
+        
+    monkeypatch.setattr(rag, "generate_answer", slow_answer)
+    
+    async def main():
+        await rag.add_documents([("Local AI keeps data on device", {}), ("RAG retrieves passages", {})])
+        with deadline_scope(time.monotonic() + 0.1):
+            return await rag.query("local AI", top_k=2)
+            
+    start = time.perf_counter()
+    result = asyncio.run(main())
+    assert time.perf_counter() - start < 0.8
+    assert result.success and result.degraded
+    assert result.answer == ""
+    assert len(result.sources) == 2
+
+def test_orchestrator_returns_a_deadline_error_instead_of_waiting(make_orchestrator):
+    async def route(request):
+        await asyncio.sleep(1)
+        return AIResponse(id=request.id, success=True, result=None, metadata={})
+        
+    orchestrator = make_orchestrator(route, coalesce=False)
+    request = AIRequest(id="slow", type="generate", prompt="hello", parameters={"timeout_ms": 50})
+    
+    start = time.perf_counter()
+    response = asyncio.run(orchestrator.process_request(request))
+    assert time.perf_counter() - start < 0.8
+    assert not response.success
+    assert response.metadata["deadline_exceeded"] is True
+
+def test_batch_items_get_the_default_deadline():
+    requests, max_concurrency = parse_batch_requests({
+        "requests": [{"type": "generate", "prompt": "a"}, {"type": "generate", "prompt": "b", "parameters": {"timeout_ms": 500}}],
+        "max_concurrency": 2
+    })
+    assert [request.parameters["timeout_ms"] for request in requests] == [DEFAULT_REQUEST_TIMEOUT_MS, 500]
+    assert max_concurrency == 2
+
+@pytest.mark.parametrize("max_concurrency", [None, "many", 0, True])
+def test_batch_rejects_a_bad_max_concurrency(max_concurrency):
+    with pytest.raises(ValueError, match="max_concurrency"):
+        parse_batch_requests({"requests": [{"type": "generate", "prompt": "a"}], "max_concurrency": max_concurrency})
@@ -0,0 +1,90 @@
+"""
+Directory crawler: re-crawls skip unchanged files and replace or remove the
+documents of changed and deleted ones. Fewer than MIN_POOL_FILES files are
+parsed on threads, so no worker processes are spawned
+"""
+
+import os
+import asyncio
+
+import pytest
+
+from directoryCrawler import DirectoryCrawler, MIN_POOL_FILES
+
+FILES = {
+    "privacy.md": "# Privacy\n\nLocal AI keeps customer data on your own servers.\n",
+    "costs.md": "# Costs\n\nLocal inference replaces per-token API fees with fixed hardware.\n",
+    "seo.txt": "Keyword research and meta descriptions improve blog rankings.\n",
+    "notes.json": '{"title": "RAG", "content": "Retrieval grounds answers in your documents."}\n'
+}
+
+@pytest.fixture
+def content(tmp_path):
+    root = tmp_path / "content"
+    root.mkdir()
+    for name, text in FILES.items():
+        (root / name).write_text(text)
+    return root
+
+def crawl(crawler: DirectoryCrawler, root):
+    return asyncio.run(crawler.crawl([str(root)]))
+
+def doc_ids(crawler: DirectoryCrawler, root, name: str):
+    return crawler.manifest[os.path.join(str(root), name)]["doc_ids"]
+
+def test_first_crawl_adds_every_file(make_crawler, content):
+    assert len(FILES) < MIN_POOL_FILES
+    crawler = make_crawler()
+    report = crawl(crawler, content)
+    assert report.files_seen == len(FILES)
+    assert report.added == len(FILES)
+    assert report.errors == {}
+    assert len(crawler.rag.documents) == report.chunks_added >= len(FILES)
+    assert crawler._pool is None
+
+def test_recrawl_skips_unchanged_files(make_crawler, content):
+    crawler = make_crawler()
+    crawl(crawler, content)
+    documents = set(crawler.rag.documents)
+    
+    report = crawl(crawler, content)
+    assert report.unchanged == len(FILES)
+    assert report.added == report.changed == report.deleted == 0
+    assert report.skip_rate == 1.0
+    assert set(crawler.rag.documents) == documents
+
+def test_recrawl_replaces_changed_and_removes_deleted_files(make_crawler, content):
+    crawler = make_crawler()
+    crawl(crawler, content)
+    old_privacy = doc_ids(crawler, content, "privacy.md")
+    old_costs = doc_ids(crawler, content, "costs.md")
+    
+    (content / "privacy.md").write_text(FILES["privacy.md"] + "\nNothing leaves the building.\n")
+    (content / "costs.md").unlink()
+    touched = content / "seo.txt"
+    stat = touched.stat()
+    os.utime(touched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    (content / "images.md").write_text("# Images\n\nResize blog images before publishing.\n")
+    
+    report = crawl(crawler, content)
+    assert report.changed == 1
+    assert report.deleted == 1
+    assert report.added == 1
+    assert report.unchanged_content == 1
+    assert report.unchanged == 1
+    assert not set(old_privacy + old_costs) & set(crawler.rag.documents)
+    assert set(doc_ids(crawler, content, "privacy.md")) <= set(crawler.rag.documents)
+    assert any("Nothing leaves the building" in doc.content for doc in crawler.rag.documents.values())
+
+def test_manifest_and_deletions_survive_a_restart(make_crawler, content):
+    crawler = make_crawler()
+    crawl(crawler, content)
+    (content / "costs.md").unlink()
+    crawl(crawler, content)
+    documents = set(crawler.rag.documents)
+    
+    restarted = make_crawler()
+    assert set(restarted.rag.documents) == documents
+    report = crawl(restarted, content)
+    assert report.unchanged == len(FILES) - 1
+    assert report.added == report.changed == report.deleted == 0
@@ -0,0 +1,104 @@
+"""
+Streaming ingestion: uploads are chunked and embedded as blocks arrive,
+whatever the block boundaries, and malformed or oversized records fail the
+upload without losing what was already stored
+"""
+
+import json
+import asyncio
+
+import pytest
+
+from documentIngest import IngestTooLarge, StreamingIngester, ingest_format
+
+RECORDS = [
+    {"content": "Local AI keeps customer data on your own servers", "metadata": {"topic": "privacy"}},
+    {"content": "Café owners ask how retrieval grounds answers in documents", "metadata": {"topic": "rag"}},
+    {"content": "Resize blog images before the vision model sees them"}
+]
+
+def ingest(ingester: StreamingIngester, data: bytes, block_size: int):
+    async def main():
+        for start in range(0, len(data), block_size):
+            await ingester.feed(data[start:start + block_size])
+        return await ingester.finish()
+    return asyncio.run(main())
+
+def ndjson(records) -> bytes:
+    return "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode()
+
+@pytest.mark.parametrize("block_size", [1, 7, 4096])
+def test_ndjson_records_are_ingested_across_block_boundaries(make_store, block_size):
+    rag = make_store()
+    ingester = StreamingIngester(format="ndjson", source="notes.jsonl", metadata={"batch": 1}, rag=rag, batch_size=2)
+    report = ingest(ingester, ndjson(RECORDS), block_size)
+    
+    assert report.documents == report.chunks == len(RECORDS)
+    assert report.batches == 2
+    assert report.bytes_received == len(ndjson(RECORDS))
+    assert sorted(doc.content for doc in rag.documents.values()) == sorted(record["content"] for record in RECORDS)
+    privacy = next(doc for doc in rag.documents.values() if doc.content == RECORDS[0]["content"])
+    assert privacy.metadata["topic"] == "privacy"
+    assert privacy.metadata["batch"] == 1
+    assert privacy.metadata["source"] == "notes.jsonl"
+    
+    # Persisted at the end of the upload
+    assert len(make_store().documents) == len(RECORDS)
+
+def test_text_upload_is_chunked_as_one_document(make_store):
+    rag = make_store()
+    paragraphs = [f"Paragraph {i} on local AI blog automation and retrieval. " * 4 for i in range(20)]
+    data = "\n\n".join(paragraphs).encode()
+    report = ingest(StreamingIngester(format="text", rag=rag, chunk_chars=400), data, 100)
+    
+    assert report.documents == 1
+    assert report.chunks == len(rag.documents) > 1
+    assert all(len(doc.content) <= 400 for doc in rag.documents.values())
+    assert [doc.metadata["chunk"] for doc in rag.documents.values()] == list(range(report.chunks))
+
+def test_records_without_content_are_skipped(make_store):
+    rag = make_store()
+    data = ndjson([RECORDS[0], {"content": ""}, {"metadata": {}}, {"content": "x", "metadata": []}, [1, 2]]) + b"\n\n"
+    report = ingest(StreamingIngester(format="ndjson", rag=rag), data, 4096)
+    assert report.documents == 1
+    assert report.skipped == 4
+
+def test_malformed_line_fails_after_storing_earlier_records(make_store):
+    rag = make_store()
+    ingester = StreamingIngester(format="ndjson", rag=rag, batch_size=1)
+    with pytest.raises(ValueError):
+        ingest(ingester, ndjson(RECORDS[:2]) + b"{not json\n" + ndjson(RECORDS[2:]), 16)
+    ingester.close()
+    assert len(make_store().documents) == 2
+
+def test_oversized_record_is_rejected_before_its_line_ends(make_store):
+    ingester = StreamingIngester(format="ndjson", rag=make_store(), max_record_bytes=1000)
+    
+    async def main():
+        await ingester.feed(b'{"content": "' + b"x" * 2000)
+        
+    with pytest.raises(IngestTooLarge) as too_large:
+        asyncio.run(main())
+    assert too_large.value.limit == 1000
+    assert "NDJSON record" in str(too_large.value)
+
+def test_oversized_upload_is_rejected(make_store):
+    ingester = StreamingIngester(format="text", rag=make_store(), max_bytes=100)
+    with pytest.raises(IngestTooLarge):
+        ingest(ingester, b"x" * 101, 50)
+
+def test_format_follows_the_content_type():
+    assert ingest_format("application/x-ndjson; charset=utf-8") == "ndjson"
+    assert ingest_format("application/jsonl") == "ndjson"
+    assert ingest_format("text/markdown") == "text"
+    assert ingest_format(None) == "text"
+    with pytest.raises(ValueError):
+        StreamingIngester(format="pdf")
+
+def test_ingest_endpoints_reject_malformed_ndjson(flask_client, asgi_client):
+    headers = {"Content-Type": "application/x-ndjson"}
+    flask_response = flask_client.post("/api/ai/rag/ingest", data=b"{not json\n", headers=headers)
+    asgi_response = asgi_client.post("/api/ai/rag/ingest", content=b"{not json\n", headers=headers)
+    for status, body in ((flask_response.status_code, flask_response.get_json()), (asgi_response.status_code, asgi_response.json())):
+        assert status == 400
+        assert body["ingested"]["documents"] == 0
@@ -0,0 +1,91 @@
+"""
+Embedding migration: documents are re-embedded in the background while the
+old vectors keep serving, then the index switches over at once
+"""
+
+import time
+import asyncio
+import hashlib
+
+import pytest
+
+TEXTS = [f"Post {i} on local AI, retrieval and blog automation" for i in range(10)]
+
+def sha_embedding(texts):
+    """A second 384-dimensional model to migrate to"""
+    return [[byte / 255.0 - 0.5 for byte in hashlib.sha256(text.encode()).digest()] * 12 for text in texts]
+
+@pytest.fixture
+def make_store(make_store):
+    def make(pin_model: bool = True):
+        rag = make_store()
+        # Keep serving the current model until a test migrates explicitly
+        if pin_model:
+            rag.configured_model = rag.embedding_model
+        return rag
+    return make
+
+@pytest.fixture
+def wait_for(wait_until):
+    return lambda migration: wait_until(lambda: migration.state != "running")
+
+def test_queries_use_the_old_model_until_the_switch(make_store, wait_for):
+    rag = make_store()
+    asyncio.run(rag.add_documents([(text, {}) for text in TEXTS]))
+    old_model = rag.embedding_model
+    rag.register_embedder("sha-384", sha_embedding)
+    
+    migration = rag.start_migration("sha-384", batch_size=2, rate=40)
+    time.sleep(0.05)
+    assert migration.state == "running"
+    assert rag.embedding_model == old_model
+    assert len(asyncio.run(rag.retrieve_documents("local AI", 3))) == 3
+    
+    wait_for(migration)
+    assert migration.state == "complete"
+    assert migration.embedded == len(TEXTS)
+    assert rag.embedding_model == "sha-384"
+    assert {doc.embedding_model for doc in rag.documents.values()} == {"sha-384"}
+    assert len(asyncio.run(rag.retrieve_documents("local AI", 3))) == 3
+
+def test_documents_changed_during_migration_are_reembedded(make_store, wait_for):
+    rag = make_store()
+    ids = asyncio.run(rag.add_documents([(text, {}) for text in TEXTS]))
+    rag.register_embedder("sha-384", sha_embedding)
+    
+    migration = rag.start_migration("sha-384", batch_size=2, rate=40)
+    asyncio.run(rag.update_document(ids[0], content="Rewritten while migrating"))
+    new_ids = asyncio.run(rag.add_documents([("Added while migrating", {})]))
+    wait_for(migration)
+    
+    assert migration.state == "complete"
+    for doc_id in (ids[0], *new_ids):
+        doc = rag.documents[doc_id]
+        assert doc.embedding_model == "sha-384"
+        assert doc.embedding == sha_embedding([doc.content])[0]
+
+def test_cancelled_migration_keeps_serving_the_old_model(make_store, wait_for):
+    rag = make_store()
+    asyncio.run(rag.add_documents([(text, {}) for text in TEXTS]))
+    old_model = rag.embedding_model
+    rag.register_embedder("sha-384", sha_embedding)
+    
+    migration = rag.start_migration("sha-384", batch_size=1, rate=5)
+    time.sleep(0.05)
+    assert rag.cancel_migration()
+    wait_for(migration)
+    
+    assert migration.state == "cancelled"
+    assert rag.embedding_model == old_model
+    assert rag.target_model == old_model
+
+def test_switched_store_reloads_with_the_new_model(make_store, wait_for):
+    rag = make_store()
+    asyncio.run(rag.add_documents([(text, {}) for text in TEXTS]))
+    rag.register_embedder("sha-384", sha_embedding)
+    wait_for(rag.start_migration("sha-384", rate=1000))
+    rag.persist()
+    
+    restarted = make_store(pin_model=False)
+    assert restarted.embedding_model == "sha-384"
+    assert restarted.migration is None
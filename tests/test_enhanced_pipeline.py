@@ -0,0 +1,99 @@
+"""
+Enhanced pipeline: steps run as a dependency graph, so RAG retrieval and the
+context lookup overlap, generation sees both outputs, and a failed step only
+empties its own output
+"""
+
+import time
+import asyncio
+
+import pytest
+
+import aiOrchestrator
+from aiOrchestrator import AIRequest, PipelineStep, run_pipeline
+
+def sleeper(value, seconds=0.1):
+    async def run(outputs):
+        await asyncio.sleep(seconds)
+        return value
+    return run
+
+def test_independent_steps_run_concurrently():
+    async def combine(outputs):
+        return outputs["a"] + outputs["b"]
+        
+    steps = [PipelineStep("sum", combine, depends_on=("a", "b")), PipelineStep("a", sleeper(1)), PipelineStep("b", sleeper(2))]
+    start = time.perf_counter()
+    outputs, timings = asyncio.run(run_pipeline(steps))
+    
+    assert time.perf_counter() - start < 0.18
+    assert outputs == {"a": 1, "b": 2, "sum": 3}
+    assert timings["sum"]["started_ms"] >= max(timings["a"]["duration_ms"], timings["b"]["duration_ms"])
+
+def test_failed_step_yields_none_for_its_dependents():
+    async def fail(outputs):
+        raise RuntimeError("retrieval down")
+    
+    async def dependent(outputs):
+        return outputs["fail"] is None
+        
+    steps = [PipelineStep("fail", fail), PipelineStep("dependent", dependent, depends_on=("fail", "not_in_graph"))]
+    outputs, timings = asyncio.run(run_pipeline(steps))
+    assert outputs == {"fail": None, "dependent": True}
+    assert timings["fail"]["error"] == "retrieval down"
+    assert "error" not in timings["dependent"]
+
+@pytest.fixture
+def orchestrator(make_orchestrator, monkeypatch):
+    orchestrator = make_orchestrator(None, coalesce=False)
+    monkeypatch.setitem(orchestrator.services_status, "local_ai", True)
+    monkeypatch.setattr(orchestrator, "_store_enhanced_context", lambda *args: None)
+    return orchestrator
+
+def test_enhanced_request_overlaps_retrieval_and_lookup(orchestrator, monkeypatch):
+    prompts = []
+    
+    async def query_rag(query, top_k, full_content=False):
+        await asyncio.sleep(0.1)
+        return {"success": True, "answer": "", "sources": [{"content": "Local AI keeps data on your servers", "score": 0.9}]}
+    
+    async def call_mcp_tool(name, arguments):
+        await asyncio.sleep(0.1)
+        return {"success": True, "result": {"results": [{"content_preview": "Earlier answer about privacy"}], "total_found": 1}}
+    
+    async def generate_text(prompt, max_tokens, temperature):
+        prompts.append(prompt)
+        return {"success": True, "text": "Local AI protects privacy", "tokens_used": 5}
+        
+    monkeypatch.setattr(aiOrchestrator, "query_rag", query_rag)
+    monkeypatch.setattr(aiOrchestrator, "call_mcp_tool", call_mcp_tool)
+    monkeypatch.setattr(aiOrchestrator, "generate_text", generate_text)
+    
+    request = AIRequest(id="e1", type="enhanced", prompt="Why run AI locally?", parameters={})
+    start = time.perf_counter()
+    response = asyncio.run(orchestrator._handle_enhanced_request(request))
+    
+    assert time.perf_counter() - start < 0.18
+    assert response.success and response.result["final_result"] == "Local AI protects privacy"
+    steps = {step["step"]: step for step in response.result["steps"]}
+    assert steps["rag_query"]["sources"] == 1
+    assert steps["context_lookup"]["matches"] == 1
+    assert steps["text_generation"]["context"]["passages"] == 2
+    assert steps["context_storage"]["background"]
+    assert "Local AI keeps data on your servers" in prompts[0] and "Earlier answer about privacy" in prompts[0]
+
+def test_enhanced_request_without_rag_only_generates(orchestrator, monkeypatch):
+    async def unexpected(*args, **kwargs):
+        raise AssertionError("retrieval ran")
+    
+    async def generate_text(prompt, max_tokens, temperature):
+        return {"success": True, "text": "Answer", "tokens_used": 1}
+        
+    monkeypatch.setattr(aiOrchestrator, "query_rag", unexpected)
+    monkeypatch.setattr(aiOrchestrator, "call_mcp_tool", unexpected)
+    monkeypatch.setattr(aiOrchestrator, "generate_text", generate_text)
+    
+    request = AIRequest(id="e2", type="enhanced", prompt="Why run AI locally?", parameters={"use_rag": False})
+    response = asyncio.run(orchestrator._handle_enhanced_request(request))
+    assert response.success
+    assert [step["step"] for step in response.result["steps"]] == ["text_generation", "context_storage"]
@@ -0,0 +1,63 @@
+"""
+Hashing embedder: vectors are deterministic, unit length and of the
+configured dimension, and texts sharing vocabulary score closer than
+unrelated ones
+"""
+
+import math
+import subprocess
+import sys
+
+import pytest
+
+from hashingEmbedder import NUMPY_AVAILABLE, HashingEmbedder
+
+TEXTS = [
+    "Local AI keeps customer data on your own servers",
+    "Keep customer data on local servers with local AI",
+    "Resize blog images before publishing them"
+]
+
+def cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+@pytest.mark.parametrize("dim", [8, 384, 1024])
+def test_vectors_have_the_configured_dimension_and_unit_length(dim):
+    for vector in HashingEmbedder(dim=dim)(TEXTS):
+        assert len(vector) == dim
+        assert math.sqrt(sum(value * value for value in vector)) == pytest.approx(1.0)
+
+def test_embeddings_are_deterministic():
+    assert HashingEmbedder()(TEXTS) == HashingEmbedder()(TEXTS)
+    embedder = HashingEmbedder()
+    assert embedder(TEXTS[:1]) == embedder(TEXTS[:1]) == [embedder.embed_one(TEXTS[0])]
+
+def test_embeddings_are_stable_across_processes():
+    # crc32 rather than hash(), so PYTHONHASHSEED does not change the vectors
+    script = "from hashingEmbedder import HashingEmbedder; print(HashingEmbedder(dim=16, use_numpy=False).embed_one('local AI servers'))"
+    outputs = {
+        subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True,
+                       env={"PYTHONHASHSEED": seed, "PYTHONPATH": ":".join(sys.path)}).stdout
+        for seed in ("1", "2")
+    }
+    assert len(outputs) == 1
+
+def test_shared_vocabulary_scores_higher():
+    privacy, paraphrase, images = HashingEmbedder()(TEXTS)
+    assert cosine(privacy, paraphrase) > cosine(privacy, images) + 0.3
+
+def test_text_without_tokens_embeds_to_zeros():
+    assert HashingEmbedder(dim=8)(["", "the and of", "!!!"]) == [[0.0] * 8] * 3
+
+@pytest.mark.skipif(not NUMPY_AVAILABLE, reason="numpy not installed")
+def test_numpy_and_pure_python_batches_agree():
+    fast, slow = HashingEmbedder(use_numpy=True)(TEXTS), HashingEmbedder(use_numpy=False)(TEXTS)
+    for a, b in zip(fast, slow):
+        assert a == pytest.approx(b)
+
+def test_model_id_changes_with_dimension_and_ngrams():
+    assert HashingEmbedder(dim=384).model_id == "hashing-v1-384"
+    assert HashingEmbedder(dim=256).model_id != HashingEmbedder(dim=384).model_id
+    assert HashingEmbedder(ngram_range=(1, 1)).model_id != HashingEmbedder().model_id
+    with pytest.raises(ValueError):
+        HashingEmbedder(dim=0)
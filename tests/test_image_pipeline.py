@@ -0,0 +1,85 @@
+"""
+Image pipeline: preprocessed images are cached by content in memory and on
+disk, and an unreadable image fails only its own item of a batch
+"""
+
+import asyncio
+
+import pytest
+
+import localAIService
+from localAIService import ImagePreprocessor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+def write_image(path, color):
+    if Image is not None:
+        Image.new("RGB", (640, 480), color).save(path, "PNG")
+    else:
+        path.write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(color) * 100)
+    return str(path)
+
+@pytest.fixture
+def preprocessor(tmp_path):
+    preprocessor = ImagePreprocessor(cache_dir=str(tmp_path / "cache"), size=(64, 64), max_workers=2)
+    yield preprocessor
+    preprocessor.shutdown()
+
+def test_second_preprocess_is_a_memory_hit(tmp_path, preprocessor):
+    path = write_image(tmp_path / "red.png", (255, 0, 0))
+    first = preprocessor.preprocess(path)
+    assert not first["cached"]
+    assert first["format"] == "PNG"
+    if Image is not None:
+        assert (first["width"], first["height"]) == (640, 480)
+        with Image.open(first["thumbnail"]) as thumbnail:
+            assert max(thumbnail.size) <= 64
+            
+    second = preprocessor.preprocess(path)
+    assert second["cached"] and second["digest"] == first["digest"]
+    assert (preprocessor.cache_hits, preprocessor.cache_misses) == (1, 1)
+
+def test_same_content_at_another_path_is_a_hit(tmp_path, preprocessor):
+    first = preprocessor.preprocess(write_image(tmp_path / "a.png", (0, 255, 0)))
+    copy = preprocessor.preprocess(write_image(tmp_path / "b.png", (0, 255, 0)))
+    other = preprocessor.preprocess(write_image(tmp_path / "c.png", (0, 0, 255)))
+    assert copy["cached"] and copy["digest"] == first["digest"]
+    assert not other["cached"] and other["digest"] != first["digest"]
+
+def test_disk_cache_survives_a_new_preprocessor(tmp_path, preprocessor):
+    path = write_image(tmp_path / "red.png", (255, 0, 0))
+    preprocessor.preprocess(path)
+    restarted = ImagePreprocessor(cache_dir=preprocessor.cache_dir, size=preprocessor.size)
+    assert restarted.preprocess(path)["cached"]
+    assert (restarted.cache_hits, restarted.cache_misses) == (1, 0)
+
+def test_memory_cache_is_bounded(tmp_path):
+    preprocessor = ImagePreprocessor(cache_dir=str(tmp_path / "cache"), memory_entries=2, digest_entries=2)
+    for n in range(4):
+        preprocessor.preprocess(write_image(tmp_path / f"{n}.png", (n, n, n)))
+    assert len(preprocessor._memory) == 2
+    assert len(preprocessor._digests) == 2
+
+def test_changed_file_is_hashed_again(tmp_path, preprocessor):
+    path = write_image(tmp_path / "image.png", (255, 0, 0))
+    first = preprocessor.preprocess(path)
+    write_image(tmp_path / "image.png", (0, 0, 0))
+    assert preprocessor.preprocess(path)["digest"] != first["digest"]
+
+def test_batch_reports_unreadable_images_per_item(tmp_path, preprocessor, monkeypatch):
+    service = localAIService.local_ai_service
+    monkeypatch.setattr(service, "image_preprocessor", preprocessor)
+    red = write_image(tmp_path / "red.png", (255, 0, 0))
+    items = [("Describe", red), ("Describe", str(tmp_path / "missing.png")), ("Text only", None), ("Again", red)]
+    
+    response = asyncio.run(service.process_multimodal_batch(items, batch_size=2))
+    assert response.success
+    results, errors = response.metadata["results"], response.metadata["errors"]
+    assert results[1] is None and "Image preprocessing failed" in errors[1]
+    assert all(results[index] is not None and errors[index] is None for index in (0, 2, 3))
+    assert response.metadata["images"] == 2
+    # The repeated image is preprocessed once
+    assert response.metadata["cache_misses"] == 1
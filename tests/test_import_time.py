@@ -0,0 +1,19 @@
+"""
+Import-time budget: localAIService imports within budget in a fresh
+interpreter and leaves the Nexa bindings and process pools for first use,
+measured the same way (best of five) as scripts/check_import_time.py
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from check_import_time import DEFERRED_MODULES, measure
+
+BUDGET_MS = 100.0
+
+def test_local_ai_service_imports_within_budget():
+    best_us, imported = min((measure('localAIService') for _ in range(5)), key=lambda run: run[0])
+    assert best_us / 1000 <= BUDGET_MS
+    assert not [module for module in DEFERRED_MODULES if module in imported]
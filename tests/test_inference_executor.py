@@ -0,0 +1,91 @@
+"""
+Inference executor: tasks run off the event loop in the configured pool,
+per-worker health is tracked, errors are attributed to their worker and a
+shut-down executor refuses new work
+"""
+
+import os
+import asyncio
+import threading
+
+import pytest
+
+from localAIService import InferenceExecutor
+
+def run(executor: InferenceExecutor, task: str, *args):
+    return asyncio.run(executor.run(task, *args))
+
+@pytest.fixture
+def make_executor():
+    executors = []
+    
+    def make(mode, **kwargs):
+        executor = InferenceExecutor(mode=mode, max_workers=2, **kwargs)
+        executors.append(executor)
+        return executor
+    yield make
+    for executor in executors:
+        executor.shutdown()
+
+@pytest.mark.parametrize("mode", ["inline", "thread"])
+def test_tasks_return_results_and_record_worker_health(make_executor, mode):
+    executor = make_executor(mode)
+    assert run(executor, "generate", "Write a summary of local AI", "default", {}).startswith("[LOCAL AI SUMMARY]")
+    assert run(executor, "rerank", "local AI", ["a", "b"], "default") == [(0, "a", 0.9), (1, "b", 0.8)]
+    
+    health = executor.health()
+    assert health["mode"] == mode
+    assert health["in_flight"] == 0
+    assert sum(worker["tasks"] for worker in health["workers"].values()) == 2
+    assert health["started"] == (mode == "thread")
+
+def test_thread_mode_keeps_work_off_the_event_loop(make_executor):
+    executor = make_executor("thread")
+    
+    async def main():
+        ticks = 0
+        task = asyncio.ensure_future(executor.run("generate", "local AI", "default", {}))
+        while not task.done():
+            ticks += 1
+            await asyncio.sleep(0)
+        return ticks, task.result()
+        
+    ticks, result = asyncio.run(main())
+    assert ticks > 0 and result
+    [worker_id] = executor.health()["workers"]
+    assert worker_id != f"{os.getpid()}:{threading.current_thread().name}"
+
+def test_errors_are_attributed_to_the_worker(make_executor):
+    executor = make_executor("thread")
+    with pytest.raises(RuntimeError):
+        run(executor, "multimodal", "Describe", {"no_image_path": True}, "default")
+    [worker] = executor.health()["workers"].values()
+    assert worker["errors"] == 1 and worker["last_error"]
+
+def test_pool_start_and_shutdown_change_the_version(make_executor):
+    executor = make_executor("thread")
+    assert executor.version == 0
+    run(executor, "embeddings", "local AI", "default")
+    run(executor, "embeddings", "local AI", "default")
+    assert executor.version == 1
+    
+    executor.shutdown()
+    assert executor.version == 2
+    assert executor.health(live=False) == {"mode": "thread", "max_workers": 2, "started": False, "shutdown": True}
+    with pytest.raises(RuntimeError):
+        run(executor, "embeddings", "local AI", "default")
+
+def test_process_mode_runs_tasks_in_worker_processes(make_executor):
+    executor = make_executor("process")
+    embeddings = run(executor, "embeddings", ["local AI", "privacy"], "default")
+    assert len(embeddings) == 2 and len(embeddings[0]) == 300
+    
+    health = executor.health()
+    [worker_id] = health["workers"]
+    assert worker_id.split(":")[0] != str(os.getpid())
+    assert health["workers"][worker_id]["alive"]
+    assert health["live_processes"] >= 1
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        InferenceExecutor(mode="gpu")
@@ -0,0 +1,109 @@
+"""
+Job queue: jobs run on the worker pool, survive a restart, are not retried
+past max_attempts, and are never run twice by processes sharing the database
+"""
+
+import time
+import threading
+
+from jobQueue import RetryJob
+
+def test_job_runs_and_stores_its_result(make_queue, wait_until):
+    queue = make_queue()
+    queue.register_handler("echo", lambda payload: {"echo": payload["text"]})
+    job = queue.submit("echo", {"text": "hello"})
+    wait_until(lambda: queue.get(job.id).done)
+    finished = queue.get(job.id)
+    assert finished.status == "succeeded"
+    assert finished.result == {"echo": "hello"}
+    assert finished.attempts == 1
+
+def test_jobs_resume_after_a_restart(make_queue, wait_until):
+    # The first process dies with one job running and one still queued
+    stuck = threading.Event()
+    crashed = make_queue(workers=1, lease_seconds=0.3)
+    crashed.register_handler("echo", lambda payload: stuck.wait())
+    first = crashed.submit("echo", {"text": "first"})
+    second = crashed.submit("echo", {"text": "second"})
+    wait_until(lambda: crashed.get(first.id).status == "running")
+    crashed._stopping = True
+    
+    restarted = make_queue(lease_seconds=0.3)
+    restarted.register_handler("echo", lambda payload: payload["text"])
+    try:
+        restarted.start()
+        wait_until(lambda: restarted.get(first.id).done and restarted.get(second.id).done)
+        assert restarted.get(first.id).status == "succeeded"
+        assert restarted.get(first.id).attempts == 2
+        assert restarted.get(second.id).result == "second"
+    finally:
+        stuck.set()
+
+def test_interrupted_job_on_its_last_attempt_is_failed(make_queue, wait_until):
+    stuck = threading.Event()
+    crashed = make_queue(workers=1, max_attempts=1, lease_seconds=0.3)
+    crashed.register_handler("echo", lambda payload: stuck.wait())
+    job = crashed.submit("echo", {"text": "once"})
+    wait_until(lambda: crashed.get(job.id).status == "running")
+    crashed._stopping = True
+    
+    ran = []
+    restarted = make_queue(max_attempts=1, lease_seconds=0.3)
+    restarted.register_handler("echo", lambda payload: ran.append(payload))
+    try:
+        restarted.start()
+        wait_until(lambda: restarted.get(job.id).done)
+        failed = restarted.get(job.id)
+        assert failed.status == "failed"
+        assert "last attempt" in failed.error
+        time.sleep(0.1)
+        assert ran == []
+    finally:
+        stuck.set()
+
+def test_retry_stops_at_max_attempts(make_queue, wait_until):
+    attempts = []
+    
+    def overloaded(payload):
+        attempts.append(True)
+        raise RetryJob("overloaded", delay=0.0)
+        
+    queue = make_queue(max_attempts=3)
+    queue.register_handler("busy", overloaded)
+    job = queue.submit("busy", {})
+    wait_until(lambda: queue.get(job.id).done)
+    failed = queue.get(job.id)
+    assert failed.status == "failed"
+    assert failed.attempts == 3
+    assert len(attempts) == 3
+
+def test_a_live_process_keeps_its_running_job(make_queue, wait_until):
+    release = threading.Event()
+    first = make_queue(workers=1, lease_seconds=0.3)
+    first.register_handler("echo", lambda payload: release.wait(5) and payload["text"])
+    job = first.submit("echo", {"text": "mine"})
+    wait_until(lambda: first.get(job.id).status == "running")
+    
+    # A second process starting on the same database leaves the leased job alone
+    second = make_queue(lease_seconds=0.3)
+    second.register_handler("echo", lambda payload: "stolen")
+    try:
+        second.start()
+        time.sleep(1.0)
+        assert second.get(job.id).status == "running"
+        assert second.get(job.id).attempts == 1
+        release.set()
+        wait_until(lambda: first.get(job.id).done)
+        assert first.get(job.id).result == "mine"
+    finally:
+        release.set()
+
+def test_queues_sharing_a_database_run_each_job_once(make_queue, wait_until):
+    runs = []
+    queues = [make_queue(workers=4) for _ in range(3)]
+    for queue in queues:
+        queue.register_handler("count", lambda payload: runs.append(payload["n"]))
+    jobs = [queues[n % len(queues)].submit("count", {"n": n}) for n in range(60)]
+    wait_until(lambda: all(queues[0].get(job.id).done for job in jobs))
+    assert sorted(runs) == list(range(60))
+    assert {queues[0].get(job.id).attempts for job in jobs} == {1}
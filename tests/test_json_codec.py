@@ -0,0 +1,81 @@
+"""
+JSON codec: the stdlib fallback encodes what orjson does natively the same
+way, including non-str dict keys, and large bodies are compressed only for
+clients that accept it
+"""
+
+import enum
+import gzip
+import uuid
+import datetime
+import dataclasses
+
+import pytest
+
+import jsonCodec
+
+class Kind(enum.Enum):
+    POST = "post"
+
+@dataclasses.dataclass
+class Source:
+    id: str
+    score: float
+
+WHEN = datetime.datetime(2024, 5, 1, 12, 30)
+ID = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(jsonCodec, "orjson", None)
+    return request.param
+
+def test_native_types_encode_alike(backend):
+    value = {"kind": Kind.POST, "at": WHEN, "id": ID, "sources": [Source("doc-1", 0.5)], "text": "café"}
+    assert jsonCodec.loads(jsonCodec.dumps(value)) == {
+        "kind": "post",
+        "at": "2024-05-01T12:30:00",
+        "id": str(ID),
+        "sources": [{"id": "doc-1", "score": 0.5}],
+        "text": "café"
+    }
+    assert jsonCodec.dumps({"a": [1, 2]}) == b'{"a":[1,2]}'
+
+def test_non_str_keys_encode_alike(backend):
+    value = {3: "int", 2.5: "float", True: "bool", None: "none", WHEN: "datetime", Kind.POST: "enum", ID: "uuid"}
+    assert jsonCodec.loads(jsonCodec.dumps(value)) == {
+        "3": "int",
+        "2.5": "float",
+        "true": "bool",
+        "null": "none",
+        "2024-05-01T12:30:00": "datetime",
+        "post": "enum",
+        str(ID): "uuid"
+    }
+    # Keys nested inside lists are rewritten too
+    assert jsonCodec.loads(jsonCodec.dumps([{"counts": {WHEN: 1}}])) == [{"counts": {"2024-05-01T12:30:00": 1}}]
+
+def test_unknown_values_go_through_default(backend):
+    assert jsonCodec.loads(jsonCodec.dumps({"value": object()}, default=lambda value: "custom")) == {"value": "custom"}
+
+def test_unsupported_keys_are_rejected(monkeypatch):
+    monkeypatch.setattr(jsonCodec, "orjson", None)
+    with pytest.raises(TypeError):
+        jsonCodec.dumps({(1, 2): "tuple"})
+
+def test_files_round_trip(tmp_path, backend):
+    path = tmp_path / "data.json"
+    jsonCodec.dump_file({"documents": [1, 2, 3]}, path)
+    assert jsonCodec.load_file(path) == {"documents": [1, 2, 3]}
+
+def test_large_bodies_are_gzipped_for_clients_that_accept_it(monkeypatch):
+    monkeypatch.setattr(jsonCodec, "brotli", None)
+    body = b"x" * jsonCodec.COMPRESSION_THRESHOLD
+    compressed, encoding = jsonCodec.compress(body, "gzip;q=0.8, identity")
+    assert encoding == "gzip" and gzip.decompress(compressed) == body
+    assert jsonCodec.compress(body, "identity") == (body, None)
+    assert jsonCodec.compress(body, "gzip;q=0") == (body, None)
+    assert jsonCodec.compress(b"small", "gzip") == (b"small", None)
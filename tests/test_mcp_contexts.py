@@ -0,0 +1,36 @@
+"""
+MCP contexts: adding one appends to a log instead of rewriting the store,
+the log is folded in periodically, and search matches words, not the
+whole query as a substring
+"""
+
+import asyncio
+
+import mcpService
+from mcpService import MCPService
+
+def search(mcp: MCPService, query: str, **parameters):
+    return asyncio.run(mcp.call_tool("search_documents", {"query": query, **parameters}))["result"]
+
+def test_added_contexts_are_logged_and_survive_a_restart(tmp_path, monkeypatch):
+    monkeypatch.setattr(mcpService, "CONTEXT_LOG_COMPACT_EVERY", 4)
+    mcp = MCPService(storage_path=str(tmp_path))
+    ids = [mcp.add_context(f"Note {n}", f"Local AI note {n}") for n in range(6)]
+    
+    # Four were folded into contexts.json; the last two are only in the log
+    assert (tmp_path / "contexts.json").exists()
+    assert len((tmp_path / "contexts.jsonl").read_text().splitlines()) == 2
+    restarted = MCPService(storage_path=str(tmp_path))
+    assert set(restarted.contexts) == set(ids)
+    assert restarted.contexts[ids[-1]].content == "Local AI note 5"
+
+def test_search_matches_words_and_ranks_by_overlap(tmp_path):
+    mcp = MCPService(storage_path=str(tmp_path))
+    mcp.add_context("Privacy", "Local AI keeps customer data on your own servers")
+    mcp.add_context("Costs", "Local inference replaces per-token API fees")
+    
+    found = search(mcp, "Why does local AI keep customer data private?")
+    assert [match["name"] for match in found["results"]] == ["Privacy", "Costs"]
+    assert found["results"][0]["score"] > found["results"][1]["score"]
+    assert search(mcp, "local AI customer data", min_score=0.5)["total_found"] == 1
+    assert search(mcp, "the of and")["total_found"] == 0
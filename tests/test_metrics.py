@@ -0,0 +1,69 @@
+"""
+Metrics: log-bucketed histograms place values by upper bound, estimate
+quantiles within a bucket's width, and render Prometheus text exposition
+"""
+
+import pytest
+
+from metricsService import DEFAULT_BUCKETS, LatencyHistogram, MetricsRegistry, log_buckets
+
+def test_log_buckets_grow_geometrically_to_the_largest_bound():
+    buckets = log_buckets(0.001, 1.0, 2.0)
+    assert buckets[0] == 0.001 and buckets[-1] >= 1.0
+    assert all(upper / lower == pytest.approx(2.0) for lower, upper in zip(buckets, buckets[1:]))
+    assert DEFAULT_BUCKETS == sorted(DEFAULT_BUCKETS)
+
+def test_values_land_in_the_first_bucket_at_or_above_them():
+    histogram = LatencyHistogram([1.0, 2.0, 4.0])
+    for value in (0.5, 1.0, 1.5, 4.0, 10.0):
+        histogram.observe(value)
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.count == 5
+    assert histogram.sum == pytest.approx(17.0)
+
+def test_quantiles_interpolate_inside_the_bucket():
+    histogram = LatencyHistogram([1.0, 2.0, 4.0])
+    for value in (0.5, 1.5, 3.0, 3.5):
+        histogram.observe(value)
+    assert histogram.quantile(0.25) == pytest.approx(1.0)
+    assert histogram.quantile(0.5) == pytest.approx(2.0)
+    assert histogram.quantile(0.75) == pytest.approx(3.0)
+    assert LatencyHistogram().quantile(0.5) == 0.0
+
+def test_default_buckets_keep_quantiles_within_their_relative_error():
+    histogram = LatencyHistogram()
+    values = [0.001 * (i + 1) for i in range(1000)]
+    for value in values:
+        histogram.observe(value)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 1000
+    assert snapshot["p50"] == pytest.approx(0.5, rel=0.2)
+    assert snapshot["p95"] == pytest.approx(0.95, rel=0.2)
+    assert snapshot["p99"] == pytest.approx(0.99, rel=0.2)
+
+def test_prometheus_text_has_cumulative_buckets_and_escaped_labels():
+    registry = MetricsRegistry(prefix="test")
+    registry.describe("request_duration_seconds", "Request latency")
+    registry.histogram("request_duration_seconds", type="generate")
+    for value in (0.001, 0.01, 0.1):
+        registry.observe("request_duration_seconds", value, type="generate")
+    registry.inc("requests_total", type='say "hi"\n', outcome="ok")
+    registry.set_gauge("queue_depth", 3)
+    
+    lines = registry.render_prometheus().splitlines()
+    assert "# HELP test_request_duration_seconds Request latency" in lines
+    assert "# TYPE test_request_duration_seconds histogram" in lines
+    buckets = [line for line in lines if line.startswith("test_request_duration_seconds_bucket")]
+    counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+    assert counts == sorted(counts)
+    assert buckets[-1] == 'test_request_duration_seconds_bucket{type="generate",le="+Inf"} 3'
+    assert 'test_request_duration_seconds_count{type="generate"} 3' in lines
+    assert any(line.startswith('test_request_duration_seconds_quantile{type="generate",quantile="0.95"} ') for line in lines)
+    assert "# TYPE test_requests_total counter" in lines
+    assert 'test_requests_total{outcome="ok",type="say \\"hi\\"\\n"} 1' in lines
+    assert "test_queue_depth 3" in lines
+
+def test_metrics_endpoints_serve_prometheus_text(flask_client, asgi_client):
+    for response in (flask_client.get("/api/ai/metrics"), asgi_client.get("/api/ai/metrics")):
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
@@ -0,0 +1,71 @@
+"""
+Model weights: weight files are mapped read-only and viewed without copying,
+empty files load as empty weights, and the Nexa probe reports the bindings
+it actually found
+"""
+
+import sys
+import array
+import logging
+
+import pytest
+
+import localAIService
+from localAIService import MappedWeights, probe_nexa_capabilities
+
+@pytest.fixture
+def weights_file(tmp_path):
+    path = tmp_path / "default.bin"
+    path.write_bytes(array.array("f", [0.5, 1.5, 2.5, 3.5]).tobytes())
+    return path
+
+def test_views_are_zero_copy_and_read_only(weights_file):
+    weights = MappedWeights(str(weights_file))
+    assert weights.size == 16
+    assert weights.view(fmt="f").tolist() == [0.5, 1.5, 2.5, 3.5]
+    tensor = weights.view(offset=8, length=8, fmt="f")
+    assert tensor.tolist() == [2.5, 3.5]
+    assert tensor.obj is weights.view().obj
+    with pytest.raises(TypeError):
+        weights.view()[0] = 1
+    weights.prefetch()
+    tensor.release()
+    weights.close()
+
+def test_empty_weights_file_maps_to_an_empty_view(tmp_path):
+    (tmp_path / "empty.bin").write_bytes(b"")
+    weights = MappedWeights(str(tmp_path / "empty.bin"))
+    assert weights.size == 0
+    assert weights.view().tolist() == []
+    weights.prefetch()
+    weights.close()
+
+def test_worker_model_maps_its_weights_file_once(weights_file, monkeypatch):
+    monkeypatch.setattr(localAIService, "_worker_models", {})
+    monkeypatch.setattr(localAIService, "MODEL_WEIGHTS_DIR", str(weights_file.parent))
+    model = localAIService._load_worker_model("default")
+    assert model["weights_path"] == str(weights_file)
+    assert model["weights"].size == 16
+    assert localAIService._load_worker_model("default") is model
+    assert localAIService._load_worker_model("missing")["weights"] is None
+    model["weights"].close()
+
+@pytest.fixture
+def bindings(tmp_path, monkeypatch):
+    """A fresh probe of an empty bindings directory (the probe adds it to sys.path)"""
+    monkeypatch.setattr(sys, "path", list(sys.path))
+    monkeypatch.setattr(localAIService, "NEXA_BINDINGS_PATH", str(tmp_path))
+    monkeypatch.setattr(localAIService, "_nexa_capabilities", None)
+    return tmp_path
+
+def test_probe_logs_the_bindings_it_found(bindings, caplog):
+    (bindings / "llm.py").write_text("")
+    with caplog.at_level(logging.INFO, logger=localAIService.logger.name):
+        assert probe_nexa_capabilities() == {"llm": True, "embedder": False, "vlm": False}
+    assert "Nexa SDK Python bindings available: llm" in caplog.text
+    assert "embedder module found" not in caplog.text
+
+def test_probe_warns_when_no_bindings_are_installed(bindings, caplog):
+    with caplog.at_level(logging.INFO, logger=localAIService.logger.name):
+        assert not any(probe_nexa_capabilities().values())
+    assert "No Nexa SDK Python bindings found" in caplog.text
@@ -0,0 +1,46 @@
+"""
+Orchestrator history: request and response history is bounded, while the
+lifetime, recent-window and EWMA aggregates are kept as responses arrive
+"""
+
+import asyncio
+
+import pytest
+
+from aiOrchestrator import AIRequest, AIResponse, RunningStats
+
+def test_running_stats_track_lifetime_window_and_ewma():
+    stats = RunningStats(window=2, alpha=0.5)
+    for success, seconds in ((True, 1.0), (False, 3.0), (True, 5.0)):
+        stats.record(success, seconds)
+    snapshot = stats.snapshot()
+    assert stats.total == 3
+    assert snapshot["avg_processing_time"] == pytest.approx(3.0)
+    assert snapshot["success_rate"] == pytest.approx(2 / 3)
+    assert snapshot["ewma_processing_time"] == pytest.approx(3.5)
+    assert snapshot["recent"] == {"window": 2, "avg_processing_time": pytest.approx(4.0), "success_rate": pytest.approx(0.5)}
+
+def test_empty_stats_report_zeros():
+    snapshot = RunningStats().snapshot()
+    assert snapshot["avg_processing_time"] == snapshot["success_rate"] == snapshot["ewma_processing_time"] == 0
+    assert snapshot["recent"]["window"] == 0
+
+def test_history_is_bounded_but_counts_are_lifetime(make_orchestrator):
+    async def route(request):
+        if request.prompt.startswith("fail"):
+            raise RuntimeError("model unavailable")
+        return AIResponse(id=request.id, success=True, result="ok", metadata={})
+        
+    orchestrator = make_orchestrator(route, coalesce=False, history_capacity=3)
+    for n in range(5):
+        prompt = f"fail {n}" if n == 4 else f"Write about local AI {n}"
+        asyncio.run(orchestrator.process_request(AIRequest(id=f"r{n}", type="generate", prompt=prompt, parameters={})))
+        
+    assert [request.id for request in orchestrator.request_history] == ["r2", "r3", "r4"]
+    assert len(orchestrator.response_history) == 3
+    status = orchestrator.get_status()
+    assert status["request_count"] == status["response_count"] == 5
+    assert status["history_capacity"] == 3
+    assert status["success_rate"] == pytest.approx(0.8)
+    assert status["recent"]["window"] == 3
+    assert status["recent"]["success_rate"] == pytest.approx(2 / 3)
@@ -0,0 +1,86 @@
+"""
+RAG deletes and updates: tombstoned documents drop out of search at once,
+stay gone after a restart, and compaction folds them into storage
+"""
+
+import asyncio
+
+import pytest
+
+from ragService import LocalRAGService
+
+TEXTS = [f"Document {i} about local AI blog automation topic {i}" for i in range(6)]
+
+@pytest.fixture
+def make_store(make_store):
+    # Compact only when a test asks for it
+    return lambda: make_store(compact_min_dead_rows=10**6)
+
+def add_all(rag: LocalRAGService):
+    return asyncio.run(rag.add_documents([(text, {"n": i}) for i, text in enumerate(TEXTS)]))
+
+def search_ids(rag: LocalRAGService, query: str = "local AI blog automation"):
+    return {doc.id for doc, _ in asyncio.run(rag.retrieve_documents(query, len(TEXTS)))}
+
+def test_deleted_document_drops_out_of_search(make_store):
+    rag = make_store()
+    ids = add_all(rag)
+    assert asyncio.run(rag.delete_document(ids[0]))
+    assert ids[0] not in search_ids(rag)
+    assert not asyncio.run(rag.delete_document(ids[0]))
+
+def test_deletes_and_updates_survive_a_restart(tmp_path, make_store):
+    rag = make_store()
+    ids = add_all(rag)
+    rag.persist()
+    asyncio.run(rag.delete_document(ids[0]))
+    asyncio.run(rag.update_document(ids[1], content="Rewritten post about privacy", metadata={"updated": True}))
+    
+    # Only tombstones were written since the last persist
+    assert (tmp_path / "tombstones.jsonl").exists()
+    restarted = make_store()
+    assert ids[0] not in restarted.documents
+    assert restarted.documents[ids[1]].content == "Rewritten post about privacy"
+    assert restarted.documents[ids[1]].metadata == {"updated": True}
+    assert ids[0] not in search_ids(restarted)
+
+def test_compaction_folds_tombstones_into_storage(tmp_path, make_store):
+    rag = make_store()
+    ids = add_all(rag)
+    for doc_id in ids[:3]:
+        asyncio.run(rag.delete_document(doc_id))
+    assert rag.matrix.dead_rows == 3
+    
+    assert rag.compact() == 3
+    assert rag.matrix.dead_rows == 0
+    assert not (tmp_path / "tombstones.jsonl").exists()
+    restarted = make_store()
+    assert set(restarted.documents) == set(ids[3:])
+
+class DeleteOnFirstAcquire:
+    """A lock that runs a delete just before persist() first takes it"""
+    
+    def __init__(self, lock, delete):
+        self._lock = lock
+        self._delete = delete
+    
+    def __enter__(self):
+        delete, self._delete = self._delete, None
+        if delete is not None:
+            delete()
+        return self._lock.__enter__()
+    
+    def __exit__(self, *exc_info):
+        return self._lock.__exit__(*exc_info)
+
+def test_delete_during_persist_is_not_resurrected(make_store):
+    rag = make_store()
+    ids = add_all(rag)
+    
+    # The delete (and its tombstone) lands between persist() starting and it taking the lock
+    rag._persist_lock = DeleteOnFirstAcquire(rag._persist_lock, lambda: asyncio.run(rag.delete_document(ids[0])))
+    rag.persist()
+    
+    restarted = make_store()
+    assert ids[0] not in restarted.documents
+    assert len(restarted.documents) == len(TEXTS) - 1
@@ -0,0 +1,66 @@
+"""
+Bulk blog retrieval: similar topics share one recall, each topic gets its
+reranked and packed context without an answer being generated, and the
+shared context is cheap to coalesce on
+"""
+
+import asyncio
+
+import pytest
+
+import ragService
+from ragService import query_rag_shared
+from aiOrchestrator import AIRequest
+from ai_common import parse_bulk_blog_request
+
+DOCUMENTS = [
+    "Local AI keeps customer data on your own servers",
+    "Retrieval augmented generation grounds answers in your documents",
+    "Image preprocessing resizes photos before the vision model sees them"
+]
+
+def test_shared_retrieval_returns_context_without_answers(make_store, monkeypatch):
+    rag = make_store()
+    asyncio.run(rag.add_documents([(text, {}) for text in DOCUMENTS]))
+    monkeypatch.setattr(ragService, "rag_service", rag)
+    
+    async def no_answers(*args, **kwargs):
+        raise AssertionError("an answer was generated")
+        
+    monkeypatch.setattr(rag, "generate_answer", no_answers)
+    questions = ["local AI data privacy", "local AI data privacy", "preprocessing images"]
+    results = asyncio.run(query_rag_shared(questions, 2, threshold=0.99, full_content=True))
+    
+    assert [result["query"] for result in results] == questions
+    assert all(result["success"] and result["answer"] == "" for result in results)
+    assert all(len(result["sources"]) == 2 and result["context"] for result in results)
+    assert results[0]["shared_by"] == results[1]["shared_by"] == 2
+    assert "generation_ms" not in results[0]["timings"]
+
+def test_coalescing_key_digests_the_shared_retrieval(make_orchestrator):
+    orchestrator = make_orchestrator(None, coalesce=True)
+    retrieval = {
+        "success": True,
+        "retrieval_query": "local AI",
+        "sources": [{"id": "doc-1", "content": "x" * 100_000, "score": 0.9}],
+        "context": {"tokens_used": 25_000}
+    }
+    
+    def key(retrieval):
+        request = AIRequest(id="r", type="enhanced", prompt="Write about local AI", parameters={}, context={"retrieval": retrieval})
+        return orchestrator._coalescing_key(request)
+        
+    assert len(key(retrieval)) < 500
+    assert key(retrieval) == key(dict(retrieval, context={"tokens_used": 1}))
+    assert key(retrieval) != key(dict(retrieval, sources=[{"id": "doc-2", "content": "x", "score": 0.9}]))
+
+@pytest.mark.parametrize("options", [
+    {"max_concurrency": None},
+    {"max_concurrency": "4"},
+    {"share_threshold": None},
+    {"share_threshold": "high"},
+    {"share_threshold": 2}
+])
+def test_bulk_request_rejects_bad_options(options):
+    with pytest.raises(ValueError):
+        parse_bulk_blog_request({"topics": ["local AI"], **options})
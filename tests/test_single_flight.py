@@ -0,0 +1,138 @@
+"""
+Request coalescing: identical in-flight requests share one execution, and
+cancelled callers neither break the others nor leak the work
+"""
+
+import time
+import asyncio
+
+from aiOrchestrator import AIRequest, AIResponse, SingleFlight
+
+def rag_request(request_id: str, prompt: str = "What is local AI?") -> AIRequest:
+    return AIRequest(id=request_id, type="rag_query", prompt=prompt, parameters={"top_k": 3})
+
+def test_identical_requests_share_one_execution(make_orchestrator):
+    calls = []
+    
+    async def route(request):
+        calls.append(request.id)
+        await asyncio.sleep(0.05)
+        return AIResponse(id=request.id, success=True, result={"answer": "shared"}, metadata={})
+        
+    orchestrator = make_orchestrator(route, coalesce=True)
+    
+    async def main():
+        return await asyncio.gather(
+            orchestrator.process_request(rag_request("a")),
+            orchestrator.process_request(rag_request("b", "  what is LOCAL ai? ")),
+            orchestrator.process_request(rag_request("c"))
+        )
+        
+    responses = asyncio.run(main())
+    assert len(calls) == 1
+    assert [response.id for response in responses] == ["a", "b", "c"]
+    assert all(response.result == {"answer": "shared"} for response in responses)
+    assert sum(bool(response.metadata.get("coalesced")) for response in responses) == 2
+    assert orchestrator.single_flight.coalesced == 2
+
+def test_different_requests_run_separately(make_orchestrator):
+    calls = []
+    
+    async def route(request):
+        calls.append(request.prompt)
+        return AIResponse(id=request.id, success=True, result=None, metadata={})
+        
+    orchestrator = make_orchestrator(route, coalesce=True)
+    
+    async def main():
+        await asyncio.gather(
+            orchestrator.process_request(rag_request("a", "first question")),
+            orchestrator.process_request(rag_request("b", "second question"))
+        )
+        
+    asyncio.run(main())
+    assert sorted(calls) == ["first question", "second question"]
+
+def test_cancelled_waiter_does_not_cancel_shared_work():
+    flight = SingleFlight()
+    finished = []
+    
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(True)
+        return "done"
+    
+    async def main():
+        first = asyncio.ensure_future(flight.run("key", work))
+        second = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await second
+        return first, result
+        
+    first, result = asyncio.run(main())
+    assert first.cancelled()
+    assert result == ("done", True)
+    assert finished == [True]
+
+def test_work_is_cancelled_once_every_waiter_is_gone():
+    flight = SingleFlight()
+    cancelled = []
+    
+    async def work():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+    
+    async def main():
+        callers = [asyncio.ensure_future(flight.run("key", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for caller in callers:
+            caller.cancel()
+        await asyncio.gather(*callers, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        
+    asyncio.run(main())
+    assert cancelled == [True]
+    assert flight._inflight == {}
+
+def test_caller_after_every_waiter_cancelled_starts_a_new_flight():
+    flight = SingleFlight()
+    started = []
+    
+    async def work():
+        started.append(True)
+        await asyncio.sleep(0.05 if len(started) == 1 else 0)
+        return len(started)
+    
+    async def main():
+        abandoned = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0.01)
+        abandoned.cancel()
+        await asyncio.gather(abandoned, return_exceptions=True)
+        # The abandoned work has not finished cancelling yet
+        return await flight.run("key", work)
+        
+    assert asyncio.run(main()) == (2, False)
+    assert len(started) == 2
+
+def test_caller_with_later_deadline_starts_its_own_flight():
+    flight = SingleFlight()
+    started = []
+    
+    async def work():
+        started.append(True)
+        await asyncio.sleep(0.02)
+        return len(started)
+    
+    async def main():
+        early = asyncio.ensure_future(flight.run("key", work, time.monotonic() + 0.01))
+        await asyncio.sleep(0)
+        late = asyncio.ensure_future(flight.run("key", work, time.monotonic() + 10))
+        return await asyncio.gather(early, late)
+        
+    (_, early_shared), (_, late_shared) = asyncio.run(main())
+    assert len(started) == 2
+    assert not early_shared and not late_shared
@@ -0,0 +1,87 @@
+"""
+Status snapshots: the cached status and capabilities bodies are rebuilt only
+when configuration or health changes, so request traffic keeps their ETags
+"""
+
+import asyncio
+
+import pytest
+
+from aiOrchestrator import AIRequest, orchestrator
+from ai_common import VersionedSnapshot, capabilities_snapshot, encoded_etag, matching_etag, status_snapshot
+
+def generate(request_id: str):
+    request = AIRequest(id=request_id, type="generate", prompt=f"Write about local AI {request_id}", parameters={})
+    return asyncio.run(orchestrator.process_request(request))
+
+def test_requests_leave_the_status_etag_unchanged():
+    # The first request starts the inference pool, which is a health change
+    assert generate("warmup").success
+    _, status_etag = status_snapshot.get()
+    _, capabilities_etag = capabilities_snapshot.get()
+    builds = status_snapshot.builds
+    
+    for n in range(3):
+        assert generate(f"request-{n}").success
+    assert status_snapshot.get()[1] == status_etag
+    assert capabilities_snapshot.get()[1] == capabilities_etag
+    assert status_snapshot.builds == builds
+    
+    # Not just cached: a fresh build of the same state has the same body
+    status_snapshot._key = None
+    assert status_snapshot.get()[1] == status_etag
+
+def test_snapshot_rebuilds_only_when_the_version_changes():
+    state = {"version": 1}
+    snapshot = VersionedSnapshot(lambda: state["version"], lambda: {"version": state["version"]})
+    body, etag = snapshot.get()
+    assert snapshot.get() == (body, etag)
+    assert snapshot.builds == 1
+    
+    state["version"] = 2
+    assert snapshot.get()[1] != etag
+    assert snapshot.builds == 2
+
+def test_if_none_match_matches_the_tag_and_its_encoded_variants():
+    etag = '"abc"'
+    assert encoded_etag(etag, "gzip") == '"abc-gzip"'
+    assert matching_etag('"abc"', etag) == etag
+    assert matching_etag('W/"abc"', etag) == etag
+    assert matching_etag('"old", "abc-gzip"', etag) == '"abc-gzip"'
+    assert matching_etag("*", etag) == etag
+    assert matching_etag('"old"', etag) is None
+    assert matching_etag(None, etag) is None
+
+@pytest.fixture(params=["flask_client", "asgi_client"])
+def client(request):
+    return request.getfixturevalue(request.param)
+
+def body(response) -> bytes:
+    # Flask test responses and httpx responses name the body differently
+    return response.data if hasattr(response, "data") else response.content
+
+@pytest.mark.parametrize("path", ["/api/ai/status", "/api/ai/capabilities"])
+def test_unchanged_snapshot_is_answered_with_304(client, path):
+    first = client.get(path, headers={"Accept-Encoding": "identity"})
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"]
+    
+    revalidated = client.get(path, headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+    assert body(revalidated) == b""
+    
+    stale = client.get(path, headers={"Accept-Encoding": "identity", "If-None-Match": '"stale"'})
+    assert stale.status_code == 200
+
+def test_compressed_status_has_its_own_etag(client):
+    identity_etag = client.get("/api/ai/status", headers={"Accept-Encoding": "identity"}).headers["ETag"]
+    compressed = client.get("/api/ai/status", headers={"Accept-Encoding": "gzip"})
+    if compressed.headers.get("Content-Encoding") != "gzip":
+        pytest.skip("status body is below the compression threshold")
+    assert compressed.headers["ETag"] == encoded_etag(identity_etag, "gzip")
+    
+    revalidated = client.get("/api/ai/status", headers={"Accept-Encoding": "gzip", "If-None-Match": compressed.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == compressed.headers["ETag"]
@@ -0,0 +1,89 @@
+"""
+Tracing: the sampling decision is made at the root span and followed by its
+children, and finished spans are exported to the ring and a JSONL file
+"""
+
+import json
+import asyncio
+
+import pytest
+
+from tracingService import Tracer, current_span
+
+def test_sampled_trace_records_nested_spans(tmp_path):
+    tracer = Tracer(sample_rate=1.0, export_path=str(tmp_path / "traces.jsonl"))
+    with tracer.span("request", type="generate") as root:
+        with tracer.span("retrieve") as child:
+            assert current_span() is child
+        assert current_span() is root
+    assert current_span() is None
+    
+    assert child.trace_id == root.trace_id
+    assert child.parent_id == root.span_id
+    assert root.parent_id is None
+    assert root.status == child.status == "OK"
+    assert root.end_ns >= child.end_ns >= child.start_ns >= root.start_ns
+    
+    [trace] = tracer.recent_traces()
+    assert trace["root"] == "request"
+    assert [span["name"] for span in trace["spans"]] == ["request", "retrieve"]
+    
+    # Children are written as they finish; the root flushes the file
+    exported = [json.loads(line) for line in (tmp_path / "traces.jsonl").read_text().splitlines()]
+    assert [span["name"] for span in exported] == ["retrieve", "request"]
+    assert exported[1]["attributes"] == {"type": "generate"}
+    assert exported[0]["parentSpanId"] == exported[1]["spanId"]
+    tracer.shutdown()
+
+def test_unsampled_trace_records_nothing():
+    tracer = Tracer(sample_rate=0.0, export_path=None)
+    with tracer.span("request") as root:
+        with tracer.span("retrieve") as child:
+            child.set_attribute("ignored", True)
+    assert not root.recording and not child.recording
+    assert child.trace_id == root.trace_id
+    assert tracer.exported == 0 and tracer.recent_traces() == []
+
+def test_children_follow_the_root_sampling_decision():
+    tracer = Tracer(sample_rate=0.5, export_path=None)
+    for _ in range(200):
+        with tracer.span("request"):
+            with tracer.span("step"):
+                pass
+    spans = list(tracer.spans)
+    roots = [span for span in spans if span.parent_id is None]
+    assert 40 < len(roots) < 160
+    assert len(spans) == 2 * len(roots)
+
+def test_errors_mark_the_span_and_propagate():
+    tracer = Tracer(sample_rate=1.0, export_path=None)
+    with pytest.raises(ValueError):
+        with tracer.span("request"):
+            raise ValueError("bad prompt")
+    [span] = tracer.spans
+    assert span.to_dict()["status"] == {"code": "STATUS_CODE_ERROR", "message": "ValueError: bad prompt"}
+
+def test_concurrent_tasks_keep_separate_traces():
+    tracer = Tracer(sample_rate=1.0, export_path=None)
+    
+    async def request(name):
+        with tracer.span(name):
+            await asyncio.sleep(0.01)
+            with tracer.span(f"{name}.step"):
+                await asyncio.sleep(0.01)
+    
+    async def main():
+        await asyncio.gather(request("a"), request("b"))
+        
+    asyncio.run(main())
+    traces = {trace["root"]: [span["name"] for span in trace["spans"]] for trace in tracer.recent_traces()}
+    assert traces == {"a": ["a", "a.step"], "b": ["b", "b.step"]}
+
+def test_ring_keeps_the_latest_spans():
+    tracer = Tracer(sample_rate=1.0, export_path=None, ring_size=3)
+    for n in range(5):
+        with tracer.span(f"request-{n}"):
+            pass
+    assert [trace["root"] for trace in tracer.recent_traces()] == ["request-4", "request-3", "request-2"]
+    assert [trace["root"] for trace in tracer.recent_traces(limit=1)] == ["request-4"]
+    assert tracer.exported == 5